@@ -19,6 +19,21 @@ GROUP_MAPPING = MAPPINGS.get('GROUP_MAPPING', {})
 KNOWN_TAXONOMIC_STATUSES = MAPPINGS.get('KNOWN_TAXONOMIC_STATUSES', [])
 FIELDS_TO_DELETE = MAPPINGS.get('FIELDS_TO_DELETE', {})
 
+def reload_config():
+    """
+    Re-reads the YAML configs and updates the constants above in place, so
+    modules that imported them by name see the new values too.
+    """
+    SCRAPING_RULES.clear()
+    SCRAPING_RULES.update(load_yaml_config('scraping_rules.yaml'))
+    MAPPINGS.clear()
+    MAPPINGS.update(load_yaml_config('mappings.yaml'))
+    GROUP_MAPPING.clear()
+    GROUP_MAPPING.update(MAPPINGS.get('GROUP_MAPPING', {}))
+    KNOWN_TAXONOMIC_STATUSES[:] = MAPPINGS.get('KNOWN_TAXONOMIC_STATUSES', [])
+    FIELDS_TO_DELETE.clear()
+    FIELDS_TO_DELETE.update(MAPPINGS.get('FIELDS_TO_DELETE', {}))
+
 # --- CORE FILE SYSTEM PATHS ---
 PROJECT_ROOT = CONFIG_DIR.parent
 SPECIES_DIR = PROJECT_ROOT.parent / "moths-of-borneo/src/content/species/"
@@ -27,6 +42,34 @@ CONTENT_DIR = PROJECT_ROOT.parent / "moths-of-borneo/src/content/"
 PHP_ROOT_DIR = PROJECT_ROOT.parent / "MoB-PHP/"
 REPORT_DIR = PROJECT_ROOT / "html/"
 TEMPLATE_DIR = REPORT_DIR / "src"
+CACHE_DIR = PROJECT_ROOT / ".cache/"
+
+# --- CACHES ---
+PHP_MANIFEST_FILENAME = "php_manifest.json"
+CORPUS_ARCHIVE_FILENAME = "corpus.sqlite"
+REFERENCE_CACHE_FILENAME = "references_cache.json"
+CITATION_CACHE_FILENAME = "citation_audit_cache.sqlite"
+SHARD_DIR_NAME = "shards"
+CHECKPOINT_DIR_NAME = "checkpoints"
+
+# Items processed between checkpoint saves in long scrape and cleanup runs.
+CHECKPOINT_INTERVAL = 50
+
+# --- SCRAPE PIPELINE ---
+# Default workers per stage of the live scrape; override with --stage-workers.
+# Parsing runs in worker processes when given more than one worker.
+SCRAPE_STAGE_WORKERS = {'read': 4, 'parse': 1, 'format': 1, 'validate': 1}
+PIPELINE_QUEUE_SIZE = 64
+
+# --- INTERACTIVE SELECTOR FINDER ---
+# Pages of the same book that selector suggestions are scored against.
+SELECTOR_SAMPLE_SIZE = 100
+# Parsed pages kept by the background prefetcher of interactive sessions:
+# enough for the current and the next book's sample pages.
+PREFETCH_CACHE_SIZE = 256
+PREFETCH_WORKERS = 2
+# Books `scrape --interactive` never samples for rule verification.
+BOOKS_TO_SKIP_INTERACTIVE = []
 
 # --- REPORTING ---
 AUDIT_REPORT_FILENAME = "audit_report.html"
@@ -0,0 +1,100 @@
+# core/checkpoint.py
+
+import collections
+import hashlib
+import json
+import os
+import time
+
+import config
+
+# Bump this when the checkpoint layout changes, so old checkpoints are ignored.
+CHECKPOINT_VERSION = 1
+
+# Outcomes that are not final: a resumed run processes these items again.
+RETRIED_OUTCOMES = frozenset({'error'})
+
+def config_fingerprint(**options) -> str:
+    """
+    Hashes the loaded scraping rules and mappings together with a run's options,
+    so a checkpoint is only resumed by a run that would produce the same outcomes.
+    """
+    payload = json.dumps(
+        [CHECKPOINT_VERSION, config.SCRAPING_RULES, config.MAPPINGS, options],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class RunCheckpoint:
+    """
+    Records the outcome of every processed item of a long run (a file path or
+    legacy URL -> a short outcome such as 'updated'), saved every few items.
+    A run started with resume=True skips the items a matching checkpoint holds.
+    """
+    def __init__(self, name: str, fingerprint: str, resume=False, interval=None, shard=None):
+        if shard:
+            name = f"{name}-shard-{shard.index}-of-{shard.count}"
+        self.path = config.CACHE_DIR / config.CHECKPOINT_DIR_NAME / f"{name}.json"
+        self.fingerprint = fingerprint
+        self.interval = interval or config.CHECKPOINT_INTERVAL
+        self.outcomes = {}
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+        if resume:
+            self._load()
+        self.resumed_count = sum(1 for key in self.outcomes if self.is_done(key))
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print("  -> No checkpoint found. Starting from the beginning.")
+            return
+        except (OSError, ValueError) as e:
+            print(f"  -> WARNING: Could not read checkpoint, starting from the beginning: {e}")
+            return
+
+        if data.get('fingerprint') != self.fingerprint:
+            print("  -> Config or options changed since the checkpoint. Starting from the beginning.")
+            return
+        self.outcomes = data.get('outcomes', {})
+        retried = sum(1 for outcome in self.outcomes.values() if outcome in RETRIED_OUTCOMES)
+        print(f"  -> Resuming: {len(self.outcomes) - retried} item(s) already processed"
+              + (f", {retried} failed item(s) will be retried." if retried else "."))
+
+    def is_done(self, key: str) -> bool:
+        """True if the item finished in an earlier run. Items that failed are retried."""
+        outcome = self.outcomes.get(key)
+        return outcome is not None and outcome not in RETRIED_OUTCOMES
+
+    def record(self, key: str, outcome: str):
+        self.outcomes[key] = outcome
+        self._unsaved += 1
+        if self._unsaved >= self.interval or time.monotonic() - self._last_save > 30:
+            self.save()
+
+    def save(self):
+        """Writes the checkpoint atomically, so an interrupted save never corrupts it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'outcomes': self.outcomes}, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def complete(self):
+        """Removes the checkpoint once the whole run has finished."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def counts(self) -> collections.Counter:
+        """Outcome counts over the whole logical run, including resumed items."""
+        return collections.Counter(self.outcomes.values())
+
+    def keys_with_outcome(self, outcome: str) -> list:
+        return [key for key, value in self.outcomes.items() if value == outcome]
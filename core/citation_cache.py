@@ -0,0 +1,71 @@
+# core/citation_cache.py
+
+import hashlib
+import json
+import sqlite3
+
+import config
+
+# Bump this when the citation parser changes, so cached results are discarded.
+CITATION_CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    citations_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    parsed TEXT NOT NULL,
+    invalid TEXT NOT NULL
+)
+"""
+
+def hash_citations(citations, book_name, legacy_url) -> str:
+    """Hashes a file's citations field together with the values the parser depends on."""
+    payload = json.dumps([CITATION_CACHE_VERSION, citations, book_name, legacy_url], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class CitationAuditCache:
+    """
+    A persistent store of per-file citation audit results: the file's status
+    ('formatted', 'unformatted', 'broken' or 'empty') plus its parsed and
+    invalid citations, keyed by a hash of the file's citations field.
+    """
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or (config.CACHE_DIR / config.CITATION_CACHE_FILENAME)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.cache_path)
+        self._db.execute(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, citations_hash: str):
+        """Returns the cached result for a file, or None if it is missing or stale."""
+        row = self._db.execute(
+            "SELECT status, parsed, invalid FROM files WHERE path = ? AND citations_hash = ?",
+            (path, citations_hash)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {'status': row[0], 'parsed': json.loads(row[1]), 'invalid': json.loads(row[2])}
+
+    def put(self, path: str, name: str, citations_hash: str, result: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, name, citations_hash, result['status'], json.dumps(result['parsed']), json.dumps(result['invalid']))
+        )
+
+    def prune(self, seen_paths: set):
+        """Removes cached results for files that no longer exist."""
+        stale = [(path,) for (path,) in self._db.execute("SELECT path FROM files") if path not in seen_paths]
+        self._db.executemany("DELETE FROM files WHERE path = ?", stale)
+
+    def files_with_status(self, status: str) -> list:
+        """Returns the paths (relative to SPECIES_DIR) of all files with the given status."""
+        return [path for (path,) in self._db.execute("SELECT path FROM files WHERE status = ? ORDER BY path", (status,))]
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
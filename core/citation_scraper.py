@@ -1,7 +1,7 @@
 # core/citation_scraper.py
 
 from bs4 import BeautifulSoup
-from markdownify import markdownify
+from .html_to_markdown import html_to_markdown
 from .citation_parser import parse_citation, format_citation
 
 def scrape_and_format_citation(soup: BeautifulSoup, rule: dict):
@@ -22,15 +22,13 @@ def scrape_and_format_citation(soup: BeautifulSoup, rule: dict):
 
     if not container_tag:
         return None
-    container = BeautifulSoup(str(container_tag), 'html.parser')
 
-    first_b = container.find('b')
-    if first_b:
-        first_b.decompose()
+    # The leading bold name is skipped during conversion rather than
+    # decomposed from a re-parsed copy of the container.
+    first_b = container_tag.find('b')
+    md_text = html_to_markdown(container_tag, strip=['a', 'p'], skip=[first_b] if first_b else [])
+    clean_text = " ".join(md_text.split())
 
-    md_text = markdownify(str(container), strip=['a', 'p'])
-    clean_text = " ".join(md_text.strip().split())
-    
     # Use the new, centralized parser to format the text
     # We pass placeholder values as book_name/legacy_url are not critical here
     parsed_list = parse_citation(clean_text, "Unknown", "N/A")
@@ -30,6 +30,11 @@ class ConfigManager:
         self._initialized = True
         print("ConfigManager initialized.")
 
+    def reload(self):
+        """Re-reads both YAML files, e.g. after they were edited by hand."""
+        self._scraping_rules = self._load_yaml(SCRAPING_RULES_PATH)
+        self._mappings = self._load_yaml(MAPPINGS_PATH)
+
     def _load_yaml(self, filepath):
         """Loads a single YAML file."""
         with open(filepath, 'r') as f:
@@ -62,4 +67,20 @@ class ConfigManager:
             print(f"❌ Failed to save config file: {e}")
 
 # Create a single, shared instance that the whole application can import and use
-config_manager = ConfigManager()
\ No newline at end of file
+config_manager = ConfigManager()
+
+def get_config_mtimes() -> tuple:
+    """Returns the modification times of the YAML config files, to detect edits."""
+    return tuple(path.stat().st_mtime_ns if path.exists() else None for path in (SCRAPING_RULES_PATH, MAPPINGS_PATH))
+
+def reload_all_config():
+    """
+    Re-reads the YAML configs everywhere they are held in memory: the constants
+    in config, the shared ConfigManager and the taxonomic status matcher.
+    """
+    import config
+    from .taxonomy import status_matcher
+    config.reload_config()
+    config_manager.reload()
+    # Rebuild the shared matcher in place, since modules import it by name.
+    status_matcher.reload(config.KNOWN_TAXONOMIC_STATUSES)
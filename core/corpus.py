@@ -0,0 +1,220 @@
+# core/corpus.py
+
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+import config
+from .file_system import refresh_php_manifest
+from .html_preprocessor import remove_font_tags
+
+# A single SQLite archive holding a pre-decoded, font-stripped and compressed
+# copy of every page in MoB-PHP, keyed by its lowercase legacy URL.
+# Build or refresh it with `python main.py prepare-corpus`.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    relative_path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    html BLOB NOT NULL
+)
+"""
+
+_connection = None
+_connection_pid = None
+_connection_lock = threading.Lock()
+
+def get_archive_path() -> Path:
+    return config.CACHE_DIR / config.CORPUS_ARCHIVE_FILENAME
+
+def url_for_relative_path(relative_path: str) -> str:
+    """Builds the normalized (lowercase) legacy URL used as the archive key."""
+    return f"{config.LEGACY_URL_BASE}{relative_path}".lower()
+
+def _get_connection():
+    """Helper function to open the archive once and cache the connection."""
+    global _connection, _connection_pid
+    # A connection must not be shared with forked worker processes.
+    if _connection is None or _connection_pid != os.getpid():
+        archive_path = get_archive_path()
+        if not archive_path.is_file():
+            return None
+        _connection = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True, check_same_thread=False)
+        _connection_pid = os.getpid()
+    return _connection
+
+def close_archive():
+    """Closes the cached archive connection, e.g. before the archive is rebuilt."""
+    global _connection
+    if _connection is not None and _connection_pid == os.getpid():
+        _connection.close()
+    _connection = None
+
+def _read_source_file(php_path: Path) -> str:
+    """Reads and normalizes a single legacy PHP file from disk."""
+    with open(php_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return remove_font_tags(f.read())
+
+def _source_signature(php_path: Path):
+    """The (mtime_ns, size) of a PHP file, or None if it does not exist."""
+    try:
+        stat = os.stat(php_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _archived_or_source_html(relative_path: str, mtime_ns: int, size: int, html: bytes):
+    """
+    The archived HTML of a page if its PHP file is unchanged since the archive
+    was built, the file re-read from disk if it changed, or None if it is gone.
+    """
+    php_path = config.PHP_ROOT_DIR / relative_path
+    signature = _source_signature(php_path)
+    if signature is None:
+        return None
+    if signature == (mtime_ns, size):
+        return zlib.decompress(html).decode('utf-8')
+    return _read_source_file(php_path)
+
+def read_legacy_html(legacy_url: str):
+    """
+    Returns the pre-normalized HTML (decoded, <font> tags removed) for a legacy URL.
+    Reads from the corpus archive when it holds an up-to-date copy of the page
+    and falls back to the PHP file on disk otherwise (e.g. after the file was
+    edited). Returns None if the page does not exist.
+    """
+    if not legacy_url:
+        return None
+
+    connection = _get_connection()
+    if connection is not None:
+        with _connection_lock:
+            row = connection.execute(
+                "SELECT relative_path, mtime_ns, size, html FROM pages WHERE url = ?", (legacy_url.lower(),)
+            ).fetchone()
+        if row:
+            return _archived_or_source_html(*row)
+
+    relative_path = legacy_url.replace(config.LEGACY_URL_BASE, "")
+    php_path = config.PHP_ROOT_DIR / relative_path
+    if not php_path.is_file():
+        return None
+    return _read_source_file(php_path)
+
+def _reference_page_candidates(archived_paths) -> list:
+    """
+    The relative paths a references.php page may be at: those in the archive,
+    plus one in every directory of the PHP manifest and its (unmanifested)
+    images folder, so new pages are found without walking the whole tree.
+    """
+    candidates = set(archived_paths)
+    for relative_dir in refresh_php_manifest():
+        prefix = f"{relative_dir}/" if relative_dir else ""
+        candidates.add(f"{prefix}references.php")
+        candidates.add(f"{prefix}images/references.php")
+    return sorted(candidates)
+
+def iter_reference_pages():
+    """
+    Yields (legacy_url, html) for every references.php page on disk, from the
+    archive when it holds an up-to-date copy, otherwise from the PHP file.
+    """
+    archived = {}
+    connection = _get_connection()
+    if connection is not None:
+        with _connection_lock:
+            rows = connection.execute(
+                "SELECT url, relative_path, mtime_ns, size FROM pages WHERE url LIKE '%/references.php'"
+            ).fetchall()
+        archived = {relative_path: (url, mtime_ns, size) for url, relative_path, mtime_ns, size in rows}
+
+    pages = {}
+    for relative_path in _reference_page_candidates(archived):
+        ref_path = config.PHP_ROOT_DIR / relative_path
+        signature = _source_signature(ref_path)
+        if signature is not None:
+            pages.setdefault(url_for_relative_path(relative_path), (ref_path, signature, archived.get(relative_path)))
+
+    for url in sorted(pages):
+        ref_path, signature, archived_entry = pages[url]
+        try:
+            if archived_entry and signature == archived_entry[1:]:
+                with _connection_lock:
+                    row = connection.execute("SELECT html FROM pages WHERE url = ?", (archived_entry[0],)).fetchone()
+                html = zlib.decompress(row[0]).decode('utf-8')
+            else:
+                html = _read_source_file(ref_path)
+        except OSError as e:
+            print(f"  [ERROR] Could not read {ref_path}: {e}")
+            continue
+        yield url, html
+
+def _iter_source_files():
+    """Walks MoB-PHP for all .php files, pruning image directories."""
+    root = str(config.PHP_ROOT_DIR)
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(d for d in dir_names if d.lower() != 'images')
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith('.php'):
+                full_path = os.path.join(dir_path, file_name)
+                yield full_path, os.path.relpath(full_path, root).replace(os.sep, '/')
+
+def build_corpus_archive(rebuild=False) -> dict:
+    """
+    Builds or incrementally refreshes the corpus archive. Files whose size and
+    mtime match the archived copy are skipped; pages whose file is gone are removed.
+    Returns counts of added, updated, unchanged and removed pages.
+    """
+    close_archive()
+    archive_path = get_archive_path()
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    if rebuild and archive_path.exists():
+        archive_path.unlink()
+
+    counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+    connection = sqlite3.connect(archive_path)
+    try:
+        connection.execute(_SCHEMA)
+        existing = {
+            url: (mtime_ns, size)
+            for url, mtime_ns, size in connection.execute("SELECT url, mtime_ns, size FROM pages")
+        }
+
+        seen_urls = set()
+        batch = []
+        for full_path, relative_path in _iter_source_files():
+            url = url_for_relative_path(relative_path)
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            try:
+                stat = os.stat(full_path)
+                if existing.get(url) == (stat.st_mtime_ns, stat.st_size):
+                    counts['unchanged'] += 1
+                    continue
+                html = _read_source_file(Path(full_path))
+            except OSError as e:
+                print(f"  [ERROR] Could not read {relative_path}: {e}")
+                continue
+
+            counts['updated' if url in existing else 'added'] += 1
+            batch.append((url, relative_path, stat.st_mtime_ns, stat.st_size, zlib.compress(html.encode('utf-8'))))
+            if len(batch) >= 500:
+                connection.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+
+        if batch:
+            connection.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", batch)
+
+        removed_urls = [(url,) for url in existing if url not in seen_urls]
+        connection.executemany("DELETE FROM pages WHERE url = ?", removed_urls)
+        counts['removed'] = len(removed_urls)
+        connection.commit()
+    finally:
+        connection.close()
+
+    return counts
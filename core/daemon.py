@@ -0,0 +1,127 @@
+# core/daemon.py
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+from pathlib import Path
+
+# The client half of this module is imported by main.py before anything else,
+# so it must stay cheap: no config, no third-party imports.
+
+SOCKET_PATH = Path(__file__).resolve().parent.parent / ".cache" / "daemon.sock"
+NO_DAEMON_ENV = "MOB_SCRAPER_NO_DAEMON"
+
+# Long-running commands would block the daemon, so they always run locally.
+LOCAL_ONLY_COMMANDS = {'serve', 'watch'}
+
+def _should_forward(argv) -> bool:
+    """Commands that need a terminal (or run indefinitely) always run locally."""
+    if os.environ.get(NO_DAEMON_ENV):
+        return False
+    if not argv or argv[0] in LOCAL_ONLY_COMMANDS or '--interactive' in argv:
+        return False
+    return '-h' not in argv and '--help' not in argv
+
+def forward_to_daemon(argv):
+    """
+    Runs a command in the `serve` daemon if one is listening and returns its
+    exit code. Returns None if the command should run locally instead.
+    """
+    if not _should_forward(argv) or not SOCKET_PATH.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(SOCKET_PATH))
+    except OSError:
+        sock.close()
+        return None
+
+    exit_code = 1
+    with sock, sock.makefile('rb') as responses:
+        sock.sendall((json.dumps({'argv': list(argv), 'cwd': os.getcwd()}) + "\n").encode('utf-8'))
+        for line in responses:
+            message = json.loads(line)
+            if 'exit' in message:
+                exit_code = message['exit']
+                break
+            stream = sys.stderr if message.get('stream') == 'stderr' else sys.stdout
+            stream.write(message['data'])
+            stream.flush()
+    return exit_code
+
+class _SocketStream(io.TextIOBase):
+    """A text stream that forwards everything written to it to the client."""
+    def __init__(self, connection, name):
+        self._connection = connection
+        self._name = name
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            message = json.dumps({'stream': self._name, 'data': text}) + "\n"
+            try:
+                self._connection.sendall(message.encode('utf-8'))
+            except OSError:
+                pass
+        return len(text)
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return
+
+        stdout, stderr = sys.stdout, sys.stderr
+        cwd = os.getcwd()
+        sys.stdout = _SocketStream(self.connection, 'stdout')
+        sys.stderr = _SocketStream(self.connection, 'stderr')
+        try:
+            os.chdir(request.get('cwd') or cwd)
+            exit_code = self.server.run_request(request.get('argv', []))
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            os.chdir(cwd)
+
+        try:
+            self.wfile.write((json.dumps({'exit': exit_code}) + "\n").encode('utf-8'))
+        except OSError:
+            pass
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Serves CLI commands over a Unix socket, one at a time, inside the daemon
+    process. `command_runner(argv) -> int` runs a single command.
+    """
+    def __init__(self, command_runner, socket_path=SOCKET_PATH):
+        self.command_runner = command_runner
+        self.socket_path = Path(socket_path)
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        super().__init__(str(self.socket_path), _CommandHandler)
+
+    def run_request(self, argv) -> int:
+        try:
+            return self.command_runner(argv) or 0
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            print(f"  [ERROR] Command failed in daemon: {e}")
+            return 1
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
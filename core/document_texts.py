@@ -0,0 +1,99 @@
+# core/document_texts.py
+
+from bs4 import CData, NavigableString, Tag
+from soupsieve.util import SelectorSyntaxError
+
+# The string types get_text() returns for ordinary tags (no comments, scripts, etc.).
+_CONTENT_STRING_TYPES = frozenset({NavigableString, CData})
+
+class DocumentTexts:
+    """
+    A per-page cache of the elements each selector matches and of each
+    element's text. The first text lookup indexes the page's strings in one
+    pass; an element's text is then a slice of that index, so nested elements
+    (tables, paragraphs inside cells) no longer walk the same subtree again
+    and again. Texts match what get_text() returns for the element.
+    """
+    def __init__(self, soup):
+        self.soup = soup
+        self._elements = {}
+        self._texts = {}
+        self._strings = None
+        self._ranges = None
+
+    def select(self, selector: str) -> list:
+        """soup.select(selector), or an empty list for an invalid selector."""
+        elements = self._elements.get(selector)
+        if elements is None:
+            try:
+                elements = self.soup.select(selector)
+            except SelectorSyntaxError:
+                elements = []
+            self._elements[selector] = elements
+        return elements
+
+    def _index(self):
+        """Lists the page's text strings in document order and each tag's slice of them."""
+        strings, ranges = [], {}
+        stack = [(self.soup, iter(self.soup.contents), 0)]
+        while stack:
+            tag, children, start = stack[-1]
+            for child in children:
+                if isinstance(child, Tag):
+                    stack.append((child, iter(child.contents), len(strings)))
+                    break
+                if type(child) in _CONTENT_STRING_TYPES:
+                    strings.append(str(child))
+            else:
+                stack.pop()
+                ranges[id(tag)] = (start, len(strings))
+        self._strings, self._ranges = strings, ranges
+
+    def _element_strings(self, element):
+        """The element's text strings, or None if get_text() must be asked directly."""
+        if element.interesting_string_types != Tag.MAIN_CONTENT_STRING_TYPES:
+            return None
+        if self._ranges is None:
+            self._index()
+        span = self._ranges.get(id(element))
+        if span is None:
+            return None
+        return self._strings[span[0]:span[1]]
+
+    def raw_text(self, element) -> str:
+        """The element's text exactly as element.get_text() returns it."""
+        key = (id(element), None)
+        text = self._texts.get(key)
+        if text is None:
+            strings = self._element_strings(element)
+            text = "".join(strings) if strings is not None else element.get_text()
+            self._texts[key] = text
+        return text
+
+    def text(self, element, separator='', strip=False) -> str:
+        """The element's get_text(separator, strip), with whitespace collapsed to single spaces."""
+        key = (id(element), separator, strip)
+        text = self._texts.get(key)
+        if text is not None:
+            return text
+
+        strings = self._element_strings(element) if separator in ('', ' ') else None
+        if strings is None:
+            text = " ".join(element.get_text(separator, strip).split())
+        elif separator == ' ':
+            # Stripping makes no difference once each string is split into words.
+            text = " ".join(word for string in strings for word in string.split())
+        elif strip:
+            text = " ".join("".join(string.strip() for string in strings).split())
+        else:
+            text = " ".join(self.raw_text(element).split())
+        self._texts[key] = text
+        return text
+
+    def rule_text(self, rule: dict):
+        """The text a (selector, index) rule extracts, as the parser reads it, or None."""
+        elements = self.select(rule['selector'])
+        index = rule['index']
+        if not elements or abs(index) >= len(elements):
+            return None
+        return self.text(elements[index])
@@ -1,4 +1,7 @@
+import fnmatch
 import frontmatter
+import json
+import os
 import re
 import yaml
 from pathlib import Path
@@ -9,46 +12,187 @@ from config import (
 )
 import config
 
-def get_master_php_urls():
+PHP_MANIFEST_VERSION = 1
+SPECIES_FILENAME_PATTERN = re.compile(r'([a-zA-Z0-9_-]+)_(\d+)_(\d+)\.php$')
+
+def _load_php_manifest(manifest_path: Path) -> dict:
+    """Loads the cached PHP manifest, returning an empty one if it is missing or stale."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == PHP_MANIFEST_VERSION and manifest.get('root') == str(PHP_ROOT_DIR):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': PHP_MANIFEST_VERSION, 'root': str(PHP_ROOT_DIR), 'dirs': {}}
+
+def _scan_php_directory(dir_path: str, relative_dir: str, old_dirs: dict, new_dirs: dict, top_level=False):
     """
-    Crawls the MoB-PHP directory to build a master list of all valid species URLs.
+    Records the species files and subdirectories of one directory, then recurses.
+    A directory whose mtime is unchanged reuses its cached listing, so an
+    unchanged corpus costs a single stat per directory.
+    """
+    try:
+        mtime = os.stat(dir_path).st_mtime_ns
+    except OSError:
+        return
+    entry = old_dirs.get(relative_dir)
+    if not entry or entry.get('mtime') != mtime:
+        files, subdirs = [], []
+        with os.scandir(dir_path) as it:
+            for dir_entry in it:
+                if dir_entry.is_dir():
+                    # Prune image directories instead of walking into them
+                    if dir_entry.name.lower() == 'images':
+                        continue
+                    if top_level and not fnmatch.fnmatchcase(dir_entry.name, 'part-*'):
+                        continue
+                    subdirs.append(dir_entry.name)
+                elif not top_level and dir_entry.is_file() and SPECIES_FILENAME_PATTERN.match(dir_entry.name):
+                    files.append(dir_entry.name)
+        entry = {'mtime': mtime, 'files': sorted(files), 'subdirs': sorted(subdirs)}
+    new_dirs[relative_dir] = entry
+
+    for subdir in entry['subdirs']:
+        sub_relative = f"{relative_dir}/{subdir}" if relative_dir else subdir
+        _scan_php_directory(os.path.join(dir_path, subdir), sub_relative, old_dirs, new_dirs)
+
+# An in-memory copy of the manifest, so long-running processes skip re-reading it.
+_php_manifest_dirs = None
+
+def refresh_php_manifest(refresh=False) -> dict:
+    """
+    Revalidates the cached PHP manifest against the directory mtimes and
+    returns its directory listings. Use refresh=True to rebuild it from scratch.
+    """
+    global _php_manifest_dirs
+    manifest_path = config.CACHE_DIR / config.PHP_MANIFEST_FILENAME
+    if refresh:
+        old_dirs = {}
+    elif _php_manifest_dirs is not None:
+        old_dirs = _php_manifest_dirs
+    else:
+        old_dirs = _load_php_manifest(manifest_path).get('dirs', {})
+
+    new_dirs = {}
+    if PHP_ROOT_DIR.is_dir():
+        _scan_php_directory(str(PHP_ROOT_DIR), "", old_dirs, new_dirs, top_level=True)
+
+    if new_dirs != old_dirs:
+        try:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': PHP_MANIFEST_VERSION, 'root': str(PHP_ROOT_DIR), 'dirs': new_dirs}, f)
+        except OSError as e:
+            print(f"  -> WARNING: Could not save PHP manifest: {e}")
+    _php_manifest_dirs = new_dirs
+    return new_dirs
+
+def get_master_php_urls(refresh=False):
+    """
+    Returns the master list of all valid species URLs in the MoB-PHP directory.
+    The listing is cached in a manifest and revalidated with directory mtimes,
+    so an unchanged corpus is not crawled again. Use refresh=True to rebuild it.
     """
-    master_urls = set()
-    url_pattern = re.compile(r'([a-zA-Z0-9_-]+)_(\d+)_(\d+)\.php$')
-    
     print(f"Scanning for PHP files in '{PHP_ROOT_DIR}'...")
-    for php_path in PHP_ROOT_DIR.glob('part-*/**/*.php'):
-        if 'images' in [part.lower() for part in php_path.parts]:
-            continue
-        if not url_pattern.match(php_path.name):
-            continue
-            
-        relative_path = php_path.relative_to(PHP_ROOT_DIR)
-        # --- FIX: Normalize URL to lowercase ---
-        url = f"{LEGACY_URL_BASE}{relative_path.as_posix()}".lower()
-        master_urls.add(url)
-        
+    dirs = refresh_php_manifest(refresh=refresh)
+
+    master_urls = set()
+    for relative_dir, entry in dirs.items():
+        for filename in entry['files']:
+            # --- FIX: Normalize URL to lowercase ---
+            master_urls.add(f"{LEGACY_URL_BASE}{relative_dir}/{filename}".lower())
+
     print(f"Found {len(master_urls)} potential species pages in source files.")
     return master_urls
 
+class FrontmatterIndex:
+    """
+    Keeps the frontmatter of every markdown file in a directory in memory.
+    Each refresh only stats the files and re-reads the ones whose mtime or
+    size changed, so repeated scans of an unchanged directory are cheap.
+    """
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.entries = {}
+
+    def _iter_markdown_files(self, dir_path: str):
+        # Mirrors Path.glob('**/*.md*'), hidden files and directories included.
+        try:
+            with os.scandir(dir_path) as it:
+                dir_entries = list(it)
+        except OSError:
+            return
+        subdirs = []
+        for dir_entry in dir_entries:
+            if dir_entry.is_dir():
+                subdirs.append(dir_entry.path)
+            elif fnmatch.fnmatch(dir_entry.name, '*.md*') and dir_entry.is_file():
+                yield dir_entry
+        for subdir in subdirs:
+            yield from self._iter_markdown_files(subdir)
+
+    def refresh(self) -> bool:
+        """Brings the index up to date and returns True if anything changed."""
+        changed = False
+        seen = set()
+        for dir_entry in self._iter_markdown_files(str(self.directory)):
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            seen.add(dir_entry.path)
+            cached = self.entries.get(dir_entry.path)
+            if cached and cached[0] == signature:
+                continue
+            try:
+                with open(dir_entry.path, 'r', encoding='utf-8-sig') as f:
+                    metadata = frontmatter.load(f).metadata
+            except Exception:
+                metadata = None
+            self.entries[dir_entry.path] = (signature, metadata)
+            changed = True
+
+        for path in [path for path in self.entries if path not in seen]:
+            del self.entries[path]
+            changed = True
+        return changed
+
+    def items(self):
+        """
+        Yields (path, metadata) for every file whose frontmatter could be read.
+        The metadata is a shallow copy, so a caller changing its fields (e.g. a
+        neighbor's data passed on as scraping context) cannot alter the index
+        kept for later commands.
+        """
+        for path, (_, metadata) in self.entries.items():
+            if metadata is not None:
+                yield Path(path), dict(metadata)
+
+_frontmatter_indexes = {}
+
+def get_frontmatter_index(directory: Path, refresh=True) -> FrontmatterIndex:
+    """Returns the shared, up-to-date frontmatter index for a directory."""
+    key = str(Path(directory).resolve())
+    index = _frontmatter_indexes.get(key)
+    if index is None:
+        index = _frontmatter_indexes[key] = FrontmatterIndex(Path(directory))
+    if refresh:
+        index.refresh()
+    return index
+
 def index_entries_by_url(directory: Path):
     """
     Scans a markdown directory and returns a map of legacy_url to its frontmatter data.
     """
     print(f"Building legacy_url index for '{directory.name}'...")
     url_map = {}
-    for md_path in directory.glob('**/*.md*'):
-        if not md_path.is_file():
-            continue
-        try:
-            with open(md_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            legacy_url = post.metadata.get('legacy_url')
-            if legacy_url:
-                # --- FIX: Normalize URL to lowercase ---
-                url_map[legacy_url.lower()] = post.metadata
-        except Exception:
-            continue
+    for md_path, metadata in get_frontmatter_index(directory).items():
+        legacy_url = metadata.get('legacy_url')
+        if isinstance(legacy_url, str) and legacy_url:
+            # --- FIX: Normalize URL to lowercase ---
+            url_map[legacy_url.lower()] = metadata
     print(f"Indexed {len(url_map)} entries by legacy_url.")
     return url_map
 
@@ -58,18 +202,24 @@ def index_entries_by_slug(directory: Path):
     """
     print(f"Building slug index for '{directory.name}'...")
     slug_map = {}
-    for md_path in directory.glob('**/*.md*'):
-        if not md_path.is_file():
-            continue
-        try:
-            with open(md_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            slug_map[md_path.stem] = post.metadata
-        except Exception:
-            continue
+    for md_path, metadata in get_frontmatter_index(directory).items():
+        slug_map[md_path.stem] = metadata
     print(f"Indexed {len(slug_map)} entries by slug.")
     return slug_map
 
+def index_slugs_to_urls(directory: Path) -> dict:
+    """
+    Maps the slug of every markdown file directly in a directory to its
+    legacy_url (None if it has none), for existence checks without a stat per file.
+    """
+    slug_map = {}
+    for path, (_, metadata) in get_frontmatter_index(directory).entries.items():
+        path = Path(path)
+        if path.suffix == '.md' and path.parent == Path(directory):
+            legacy_url = metadata.get('legacy_url') if metadata else None
+            slug_map[path.stem] = legacy_url if isinstance(legacy_url, str) and legacy_url else None
+    return slug_map
+
 def update_config_file(book_name, confirmed_rules):
     """
     Safely reads, updates, and writes back the scraping_rules.yaml file.
@@ -89,17 +239,21 @@ def update_config_file(book_name, confirmed_rules):
     except Exception as e:
         print(f"❌ Failed to update config file: {e}")
 
-def save_markdown_file(post: frontmatter.Post, filepath: Path):
+def save_markdown_file(post: frontmatter.Post, filepath: Path, exclusive=False):
     """
-    Safely saves a frontmatter.Post object to a file.
+    Safely saves a frontmatter.Post object to a file. With exclusive=True the
+    file is only created if it does not exist yet; FileExistsError is raised
+    if it does, so an existing file is never overwritten.
     """
     try:
         new_file_content = frontmatter.dumps(post)
         filepath.parent.mkdir(parents=True, exist_ok=True) # Ensure directory exists
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'x' if exclusive else 'w', encoding='utf-8') as f:
             f.write(new_file_content)
         print(f"  -> ✅ Saved: {filepath.name}")
         return True
+    except FileExistsError:
+        raise
     except Exception as e:
         print(f"  -> ❌ ERROR: Could not save file {filepath.name}: {e}")
         return False
@@ -118,23 +272,13 @@ def build_legacy_to_new_url_map():
         print(f"  -> WARNING: Content directory not found at '{content_dir}'.")
         return {}
 
-    all_files = list(content_dir.glob('**/*.md*'))
-    
-    for md_path in all_files:
-        if not md_path.is_file():
-            continue
-        try:
-            with open(md_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            
-            legacy_url = post.metadata.get('legacy_url')
-            if legacy_url:
-                source_path = urlparse(legacy_url.lower()).path
-                subfolder = md_path.parent.name
-                destination_path = f"/{subfolder}/{md_path.stem}"
-                url_map[source_path] = destination_path
-        except Exception:
-            continue
+    for md_path, metadata in get_frontmatter_index(content_dir).items():
+        legacy_url = metadata.get('legacy_url')
+        if isinstance(legacy_url, str) and legacy_url:
+            source_path = urlparse(legacy_url.lower()).path
+            subfolder = md_path.parent.name
+            destination_path = f"/{subfolder}/{md_path.stem}"
+            url_map[source_path] = destination_path
             
     print(f"  -> Successfully mapped {len(url_map)} URLs.")
     return url_map
@@ -145,16 +289,9 @@ def get_all_referenced_genera():
     """
     print("Finding all referenced genera from species files...")
     referenced_genera = set()
-    for md_path in SPECIES_DIR.glob('**/*.md*'):
-        if not md_path.is_file():
-            continue
-        try:
-            with open(md_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            genus = post.metadata.get('genus')
-            if genus:
-                referenced_genera.add(genus)
-        except Exception:
-            continue
+    for md_path, metadata in get_frontmatter_index(SPECIES_DIR).items():
+        genus = metadata.get('genus')
+        if genus:
+            referenced_genera.add(genus)
     print(f"Found {len(referenced_genera)} unique referenced genera.")
     return referenced_genera
\ No newline at end of file
@@ -0,0 +1,249 @@
+# core/html_to_markdown.py
+
+import re
+
+from bs4 import Comment, Doctype, NavigableString
+from markdownify import markdownify
+
+# A converter for the small set of tags legacy MoB pages actually use. It walks
+# the parsed tree directly (no str()/re-parse round trip) and produces the same
+# markdown markdownify does with its default options. Any other tag makes it
+# fall back to markdownify, so the output never changes.
+# Check parity and speed on the corpus with `python main.py markdown-check`.
+
+_NEWLINE_WHITESPACE = re.compile(r'[\t \r\n]*[\r\n][\t \r\n]*')
+_WHITESPACE = re.compile(r'[\t ]+')
+_EXTRACT_NEWLINES = re.compile(r'^(\n*)((?:.*[^\n])?)(\n*)$', flags=re.DOTALL)
+_HEADING = re.compile(r'h(\d+)')
+
+# Tags whose surrounding/inner whitespace markdownify drops (see should_remove_whitespace_inside).
+_BLOCK_TAGS = frozenset({
+    'p', 'blockquote', 'article', 'div', 'section', 'ol', 'ul', 'li', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th',
+})
+# Tags markdownify has no conversion for: only their content is kept.
+_PASSTHROUGH_TAGS = frozenset({
+    '[document]', 'span', 'font', 'u', 'small', 'big', 'center', 'o:p', 'html', 'body',
+    'thead', 'tbody', 'tfoot',
+})
+_EMPHASIS = {'b': '**', 'strong': '**', 'i': '*', 'em': '*', 'sup': '', 'sub': ''}
+SUPPORTED_TAGS = _PASSTHROUGH_TAGS | set(_EMPHASIS) | {'p', 'div', 'a', 'br', 'table', 'tr', 'td', 'th'}
+
+class UnsupportedTag(Exception):
+    """Raised when the tree holds a tag the fast converter does not cover."""
+
+def _is_block(el) -> bool:
+    name = getattr(el, 'name', None)
+    return name is not None and (name in _BLOCK_TAGS or name == 'pre' or _HEADING.match(name) is not None)
+
+def _chomp(text):
+    prefix = ' ' if text and text[0] == ' ' else ''
+    suffix = ' ' if text and text[-1] == ' ' else ''
+    return prefix, suffix, text.strip()
+
+def _colspan(cell) -> int:
+    colspan = cell.attrs.get('colspan', '')
+    return max(1, min(1000, int(colspan))) if colspan.isdigit() else 1
+
+class FastMarkdownConverter:
+    """
+    Converts a parsed bs4 node (or a list of sibling nodes) to markdown.
+    `strip` lists tags to unwrap instead of convert, as in markdownify, and
+    `skip` lists nodes to leave out, as if they had been removed from the tree.
+    """
+    def __init__(self, strip=(), skip=()):
+        self.strip = frozenset(strip)
+        self.skip = {id(node) for node in skip}
+
+    def convert(self, nodes) -> str:
+        """Raises UnsupportedTag if a node holds a tag outside SUPPORTED_TAGS."""
+        if not isinstance(nodes, (list, tuple)):
+            nodes = [nodes]
+        strings = [
+            self._process(node, False) for node in nodes
+            if not isinstance(node, (Comment, Doctype)) and id(node) not in self.skip
+        ]
+        return self._join(strings).strip('\n')
+
+    def _join(self, strings) -> str:
+        """Joins child strings, collapsing newlines at their boundaries to at most two."""
+        parts = ['']
+        for string in strings:
+            if not string:
+                continue
+            leading, content, trailing = _EXTRACT_NEWLINES.match(string).groups()
+            if parts[-1] and leading:
+                leading = '\n' * min(2, max(len(parts.pop()), len(leading)))
+            parts.extend((leading, content, trailing))
+        return ''.join(parts)
+
+    def _children(self, node):
+        """
+        Yields (child, text, previous, following) for the node's children, with
+        text set for text nodes. Adjacent text nodes (e.g. around a skipped node)
+        are merged, as they would be once the HTML was serialized and re-parsed.
+        """
+        pending = None
+        for child in node.children:
+            if self.skip and id(child) in self.skip:
+                continue
+            if isinstance(child, NavigableString) and not isinstance(child, (Comment, Doctype)):
+                if pending and type(child) is NavigableString and type(pending[0]) is NavigableString:
+                    pending[1] += str(child)
+                    pending[3] = child.next_sibling
+                    continue
+                if pending:
+                    yield tuple(pending)
+                pending = [child, str(child), child.previous_sibling, child.next_sibling]
+                continue
+            if pending:
+                yield tuple(pending)
+                pending = None
+            yield child, None, None, None
+        if pending:
+            yield tuple(pending)
+
+    def _skipped(self, sibling, attribute):
+        while sibling is not None and id(sibling) in self.skip:
+            sibling = getattr(sibling, attribute)
+        return sibling
+
+    def _is_skipped(self, node, root) -> bool:
+        """True if the node or one of its ancestors below root is skipped."""
+        while node is not None and node is not root:
+            if id(node) in self.skip:
+                return True
+            node = node.parent
+        return False
+
+    def _process(self, node, inline) -> str:
+        if isinstance(node, NavigableString):
+            return self._process_text(str(node), node.previous_sibling, node.next_sibling, False)
+
+        name = node.name
+        if name not in SUPPORTED_TAGS:
+            raise UnsupportedTag(name)
+
+        remove_inside = name in _BLOCK_TAGS
+        child_inline = inline or name in ('td', 'th')
+        strings = []
+        for child, text, previous, following in self._children(node):
+            if text is None:
+                if not isinstance(child, (Comment, Doctype)):
+                    strings.append(self._process(child, child_inline))
+                continue
+            if self.skip:
+                previous = self._skipped(previous, 'previous_sibling')
+                following = self._skipped(following, 'next_sibling')
+            if not text.strip():
+                if remove_inside and (not previous or not following):
+                    continue
+                if _is_block(previous) or _is_block(following):
+                    continue
+            strings.append(self._process_text(text, previous, following, remove_inside))
+        text = self._join(strings)
+
+        if name in self.strip:
+            return text
+        if name in _EMPHASIS:
+            prefix, suffix, text = _chomp(text)
+            if not text:
+                return ''
+            markup = _EMPHASIS[name]
+            return f"{prefix}{markup}{text}{markup}{suffix}"
+        if name == 'p':
+            if inline:
+                return ' ' + text.strip(' \t\r\n') + ' '
+            text = text.strip(' \t\r\n')
+            return f"\n\n{text}\n\n" if text else ''
+        if name == 'br':
+            if inline:
+                return text + ' ' if text else ' '
+            return '  \n' + text
+        if name == 'a':
+            return self._convert_a(node, text)
+        if name in ('td', 'th'):
+            return ' ' + text.strip().replace("\n", " ") + ' |' * _colspan(node)
+        if name == 'tr':
+            return self._convert_tr(node, text)
+        if name == 'table':
+            return '\n\n' + text.strip() + '\n\n'
+        if name == 'div':
+            if inline:
+                return ' ' + text.strip() + ' '
+            text = text.strip()
+            return f"\n\n{text}\n\n" if text else ''
+        return text
+
+    def _process_text(self, text, previous, following, parent_is_block) -> str:
+        text = _NEWLINE_WHITESPACE.sub('\n', text)
+        text = _WHITESPACE.sub(' ', text)
+        text = text.replace('*', r'\*').replace('_', r'\_')
+
+        if _is_block(previous) or (parent_is_block and not previous):
+            text = text.lstrip(' \t\r\n')
+        if _is_block(following) or (parent_is_block and not following):
+            text = text.rstrip()
+        return text
+
+    def _convert_a(self, el, text) -> str:
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ''
+        href = el.get('href')
+        title = el.get('title')
+        if text.replace(r'\_', '_') == href and not title:
+            return f"<{href}>"
+        title_part = ' "%s"' % title.replace('"', r'\"') if title else ''
+        return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+
+    def _convert_tr(self, el, text) -> str:
+        # Mirrors markdownify's convert_tr (with table_infer_header off).
+        cells = el.find_all(['td', 'th'])
+        if self.skip:
+            cells = [cell for cell in cells if not self._is_skipped(cell, el)]
+        parent = el.parent
+        is_first_row = el.find_previous_sibling() is None
+        is_headrow = (
+            all(cell.name == 'th' for cell in cells)
+            or (parent.name == 'thead' and len(parent.find_all('tr')) == 1)
+        )
+        is_head_row_missing = (
+            (is_first_row and not parent.name == 'tbody')
+            or (is_first_row and parent.name == 'tbody' and len(parent.parent.find_all(['thead'])) < 1)
+        )
+        full_colspan = sum(_colspan(cell) for cell in cells)
+        overline = underline = ''
+        if is_headrow and is_first_row:
+            underline = '| ' + ' | '.join(['---'] * full_colspan) + ' |\n'
+        elif is_head_row_missing or (is_first_row and (
+                parent.name == 'table' or (parent.name == 'tbody' and not parent.find_previous_sibling()))):
+            overline = '| ' + ' | '.join([''] * full_colspan) + ' |\n'
+            overline += '| ' + ' | '.join(['---'] * full_colspan) + ' |\n'
+        return overline + '|' + text + '\n' + underline
+
+def _markdownify_nodes(nodes, strip, skip) -> str:
+    """Converts nodes with markdownify, with the skipped nodes briefly taken out of the tree."""
+    removed = []
+    for node in skip:
+        if node.parent is not None:
+            removed.append((node.parent, node.parent.index(node), node))
+    for parent, index, node in removed:
+        node.extract()
+    try:
+        html = "".join(str(node) for node in nodes) if isinstance(nodes, (list, tuple)) else str(nodes)
+        return markdownify(html, strip=list(strip)) if strip else markdownify(html)
+    finally:
+        for parent, index, node in sorted(removed, key=lambda item: item[1]):
+            parent.insert(index, node)
+
+def html_to_markdown(nodes, strip=(), skip=()) -> str:
+    """
+    Converts parsed nodes to markdown, identically to markdownify(str(nodes))
+    with the `skip` nodes removed. The tree itself is never copied or changed
+    for the MoB subset; pages with other tags are handed to markdownify.
+    """
+    try:
+        return FastMarkdownConverter(strip, skip).convert(nodes)
+    except UnsupportedTag:
+        return _markdownify_nodes(nodes, strip, skip)
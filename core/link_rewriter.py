@@ -1,8 +1,44 @@
+import bisect
+import posixpath
 import re
 from urllib.parse import urlparse
-from .file_system import build_legacy_to_new_url_map
+
+import config
+from .file_system import build_legacy_to_new_url_map, get_frontmatter_index
+
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+# The same pattern for searching memory-mapped files.
+LINK_BYTES_PATTERN = re.compile(LINK_PATTERN.pattern.encode('ascii'))
 
 _url_map = None
+_link_index = None
+_site_paths = None
+
+class LegacyLinkIndex:
+    """
+    Resolves a link target to its new path: the first legacy path in the URL
+    map that ends with the target, which is how links have always been
+    matched. The legacy paths are kept reversed and sorted, so the paths
+    ending with a target form one contiguous run found by bisection, instead
+    of every legacy path being compared with every link.
+    """
+    def __init__(self, url_map: dict):
+        entries = sorted((legacy_path[::-1], order) for order, legacy_path in enumerate(url_map))
+        self._keys = [key for key, _ in entries]
+        self._orders = [order for _, order in entries]
+        self._new_paths = list(url_map.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, url: str):
+        """The new path for a link target, or None if it is not a legacy link."""
+        key = url[::-1]
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + '\U0010ffff', start)
+        if start == end:
+            return None
+        return self._new_paths[min(self._orders[start:end])]
 
 def get_url_map():
     """Helper function to build the map once and cache it."""
@@ -11,28 +47,70 @@ def get_url_map():
         _url_map = build_legacy_to_new_url_map()
     return _url_map
 
-def rewrite_legacy_links(markdown_text: str):
+def get_link_index() -> LegacyLinkIndex:
+    """The LegacyLinkIndex of the cached URL map."""
+    global _link_index
+    if _link_index is None:
+        _link_index = LegacyLinkIndex(get_url_map())
+    return _link_index
+
+def get_site_paths() -> set:
+    """The site path (e.g. /genera/slug) of every content page, cached like the URL map."""
+    global _site_paths
+    if _site_paths is None:
+        _site_paths = {
+            f"{site_dir_for(md_path)}/{md_path.stem}"
+            for md_path, _ in get_frontmatter_index(config.CONTENT_DIR).items()
+        }
+    return _site_paths
+
+def reset_url_map():
+    """Discards the cached map, so it is rebuilt on next use."""
+    global _url_map, _link_index, _site_paths
+    _url_map = None
+    _link_index = None
+    _site_paths = None
+
+def site_dir_for(md_path) -> str:
+    """The site directory a content file is served from, e.g. /genera for genera/foo.md."""
+    return f"/{md_path.parent.name}"
+
+def relative_site_path(new_path: str, site_dir='/species') -> str:
     """
-    Finds all markdown links in a block of text and replaces any legacy URLs
-    with their new, correct paths using the generated URL map.
+    Makes a new site path relative to the directory of the page linking to it,
+    as it is written into links: ./slug from the same directory, else ../genera/slug.
     """
-    url_map = get_url_map()
-    if not url_map: return markdown_text
+    relative = posixpath.relpath(new_path, site_dir)
+    return relative if relative.startswith('../') else f"./{relative}"
 
-    link_pattern = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+def resolve_site_link(url: str, site_dir: str):
+    """The site path a relative page link resolves to, or None if it is not one."""
+    path = url.split('#')[0].split('?')[0]
+    if not path.startswith(('./', '../')) or posixpath.splitext(path)[1]:
+        return None
+    return posixpath.normpath(posixpath.join(site_dir, path))
+
+def rewrite_legacy_links(markdown_text: str, verbose=True, site_dir='/species'):
+    """
+    Finds all markdown links in a block of text and replaces any legacy URLs
+    with their new, correct paths using the generated URL map. The new paths
+    are relative to site_dir, the directory of the page the text belongs to.
+    """
+    link_index = get_link_index()
+    if not link_index: return markdown_text
 
     def replacer(match):
         link_text, url = match.groups()
-        
+
         # --- FIX: Handle relative links by checking if the URL is at the end of a legacy path ---
-        for legacy_path, new_path in url_map.items():
-            if legacy_path.endswith(url):
-                # Make the new path relative, e.g., ./slug
-                relative_new_path = f".{new_path.replace('/species', '')}"
+        new_path = link_index.lookup(url)
+        if new_path is not None:
+            relative_new_path = relative_site_path(new_path, site_dir)
+            if verbose:
                 print(f"  -> Rewriting link: {url} -> {relative_new_path}")
-                return f'[{link_text}]({relative_new_path})'
-        
+            return f'[{link_text}]({relative_new_path})'
+
         # If no match was found, return the original link
         return match.group(0)
 
-    return link_pattern.sub(replacer, markdown_text)
\ No newline at end of file
+    return LINK_PATTERN.sub(replacer, markdown_text)
@@ -0,0 +1,173 @@
+# core/mapped_markdown.py
+
+import mmap
+import re
+
+import frontmatter
+from frontmatter.default_handlers import YAMLHandler
+
+# The YAML frontmatter delimiter as python-frontmatter matches it, on bytes.
+# Lines that would only be delimiters if a non-ASCII character were Unicode
+# whitespace match too (ending before that byte), so they can be handed back
+# to python-frontmatter. The opening delimiter is matched at the start of the
+# stripped text, where `^` would only match after a newline.
+_FM_BOUNDARY = re.compile(rb'^-{3,}[\s\x1c-\x1f]*(?:$|(?=[\x80-\xff]))', re.MULTILINE)
+_FM_OPENING = re.compile(rb'-{3,}[\s\x1c-\x1f]*(?:$|(?=[\x80-\xff]))', re.MULTILINE)
+# The ASCII characters str.strip() treats as whitespace.
+_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f')
+_LONE_CR = re.compile(rb'\r(?!\n)')
+_BOM = b'\xef\xbb\xbf'
+_YAML = YAMLHandler()
+
+class MappedMarkdown:
+    """
+    A markdown file with frontmatter, memory-mapped instead of read into a
+    string. The header and body are located once as byte ranges of the
+    mapping; checks on the body (searching, emptiness, the last character)
+    run on the mapped bytes, and the body is only decoded when asked for.
+    Metadata and body match what frontmatter.load() returns for the file.
+    Use it as a context manager, so the mapping is closed after the checks.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                self._data = b''
+        self._metadata = None
+        self._post = None
+        self._locate()
+
+    def _strip(self, start: int, end: int):
+        """Narrows [start, end) past ASCII whitespace; None if a non-ASCII byte is reached first."""
+        data = self._data
+        while start < end and data[start] in _WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in _WHITESPACE:
+            end -= 1
+        if start < end and (data[start] >= 0x80 or data[end - 1] >= 0x80):
+            # Possibly Unicode whitespace, which only str.strip() knows about.
+            return None
+        return start, end
+
+    def _locate(self):
+        start = len(_BOM) if self._data[:len(_BOM)] == _BOM else 0
+        text_span = self._strip(start, len(self._data))
+        self._header = None
+        self._body = text_span
+        if text_span is None or text_span[0] == text_span[1]:
+            return
+        if self._data[text_span[0]] in b'{}' or _LONE_CR.search(self._data):
+            # A JSON header, or old Mac line endings; leave these to python-frontmatter.
+            self._body = None
+            return
+        opening = _FM_OPENING.match(self._data, text_span[0], text_span[1])
+        if opening is None:
+            return
+        closing = _FM_BOUNDARY.search(self._data, opening.end(), text_span[1])
+        if closing is None:
+            return
+        if self._followed_by_non_ascii(opening, text_span[1]) or self._followed_by_non_ascii(closing, text_span[1]):
+            # The delimiter may run on into Unicode whitespace.
+            self._body = None
+            return
+        self._header = (opening.end(), closing.start())
+        self._body = self._strip(closing.end(), text_span[1])
+
+    def _followed_by_non_ascii(self, match, end: int) -> bool:
+        position = match.end()
+        while position < end and self._data[position] in _WHITESPACE:
+            position += 1
+        return position < end and self._data[position] >= 0x80
+
+    def _full_post(self) -> frontmatter.Post:
+        """The file parsed the ordinary way, for the rare layouts the byte ranges do not cover."""
+        if self._post is None:
+            text = bytes(self._data).decode('utf-8-sig')
+            # Universal newlines, as reading the file in text mode gives.
+            self._post = frontmatter.loads(text.replace('\r\n', '\n').replace('\r', '\n'))
+        return self._post
+
+    def _body_bytes(self) -> bytes:
+        if self._body is None:
+            return self._full_post().content.encode('utf-8')
+        return self._data[self._body[0]:self._body[1]]
+
+    @property
+    def header(self) -> memoryview:
+        """
+        The raw frontmatter bytes (empty if the file has none), as a view of the
+        mapping. Release views before the file is closed.
+        """
+        if self._header is None:
+            return memoryview(b'')
+        return memoryview(self._data)[self._header[0]:self._header[1]]
+
+    @property
+    def body(self) -> memoryview:
+        """The stripped body, as a view of the mapping. Release views before the file is closed."""
+        if self._body is None:
+            return memoryview(self._body_bytes())
+        return memoryview(self._data)[self._body[0]:self._body[1]]
+
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            if self._body is None:
+                self._metadata = self._full_post().metadata
+            elif self._header is None:
+                self._metadata = {}
+            else:
+                header = self._data[self._header[0]:self._header[1]].decode('utf-8')
+                loaded = _YAML.load(header.replace('\r\n', '\n'))
+                self._metadata = loaded if isinstance(loaded, dict) else {}
+        return self._metadata
+
+    def validate_header(self):
+        """Parses the header, raising on malformed YAML as frontmatter.load() does."""
+        self.metadata
+
+    @property
+    def content(self) -> str:
+        """The body decoded to a string, as frontmatter's post.content."""
+        return self._body_bytes().decode('utf-8').replace('\r\n', '\n')
+
+    def body_is_empty(self) -> bool:
+        if self._body is None:
+            return not self._full_post().content
+        return self._body[0] == self._body[1]
+
+    def body_endswith(self, suffix: bytes) -> bool:
+        if self._body is None:
+            return self._body_bytes().endswith(suffix)
+        start, end = self._body
+        return end - start >= len(suffix) and self._data[end - len(suffix):end] == suffix
+
+    def body_contains(self, needle: bytes) -> bool:
+        if self._body is None:
+            return needle in self._body_bytes()
+        return self._data.find(needle, self._body[0], self._body[1]) != -1
+
+    def body_search(self, pattern: re.Pattern):
+        """pattern (compiled from a bytes regex) searched over the body, without copying it."""
+        if self._body is None:
+            return pattern.search(self._body_bytes())
+        return pattern.search(self._data, self._body[0], self._body[1])
+
+    def body_finditer(self, pattern: re.Pattern):
+        """Every match of pattern (compiled from a bytes regex) in the body, without copying it."""
+        if self._body is None:
+            return pattern.finditer(self._body_bytes())
+        return pattern.finditer(self._data, self._body[0], self._body[1])
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
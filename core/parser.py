@@ -1,33 +1,21 @@
 # core/parser.py
 
-import re
 import string
 from bs4 import BeautifulSoup
-from markdownify import markdownify
 from soupsieve.util import SelectorSyntaxError
+from .document_texts import DocumentTexts
+from .html_to_markdown import html_to_markdown
 from .processing import format_body_content, replace_ocr_symbols
-from config import KNOWN_TAXONOMIC_STATUSES
+from .taxonomy import status_matcher
 from .citation_scraper import scrape_and_format_citation
 
 # --- PRIVATE HELPER FUNCTIONS ---
 
-def _get_text_from_rule(soup: BeautifulSoup, rule: dict) -> str:
+def _get_text_from_rule(texts: DocumentTexts, rule: dict) -> str:
     """Helper to safely get text using a rule (selector + index)."""
-    selector = rule.get('selector')
-    index = rule.get('index', 0)
-    
-    if not selector: 
-        return ""
-    
-    try:
-        elements = soup.select(selector)
-        if not elements or abs(index) >= len(elements):
-            return ""
-        element = elements[index]
-        raw_text = element.text
-        return " ".join(raw_text.split())
-    except (SelectorSyntaxError, IndexError):
+    if not rule.get('selector'):
         return ""
+    return texts.rule_text({'selector': rule['selector'], 'index': rule.get('index', 0)}) or ""
 
 def _apply_method(text: str, method: str) -> str:
     """Applies a specific post-processing method to the extracted text."""
@@ -46,34 +34,26 @@ def _apply_method(text: str, method: str) -> str:
         return tokens[0]
     elif method == 'last_word':
         for token in reversed(tokens):
-            clean_token = token.strip(string.punctuation).lower()
-            if clean_token not in KNOWN_TAXONOMIC_STATUSES:
+            if not status_matcher.is_status_token(token):
                 return token.strip(string.punctuation)
         return ""
     return text
 
 def _find_taxonomic_statuses(full_name_text: str, full_genus_text: str) -> list:
     """Finds all known taxonomic statuses in the provided text blocks."""
-    statuses = []
-    combined_text = (full_name_text + " " + full_genus_text).lower()
-    for status in KNOWN_TAXONOMIC_STATUSES:
-        if status in combined_text:
-            statuses.append(status)
-    return statuses
+    return status_matcher.find(full_name_text + " " + full_genus_text)
 
 def _split_complex_name_string(text: str, existing_statuses: list) -> dict:
     """
     Intelligently splits a single string that may contain a genus, name,
     author, and taxonomic statuses.
     """
-    result = {'name': '', 'author': '', 'scraped_genus': '', 'taxonomic_status': existing_statuses}
-    
     # Remove any known statuses from the text to simplify parsing
-    for status in KNOWN_TAXONOMIC_STATUSES:
-        if status in text.lower():
-            if status not in result['taxonomic_status']:
-                result['taxonomic_status'].append(status)
-            text = re.sub(re.escape(status), '', text, flags=re.IGNORECASE)
+    found_statuses, text = status_matcher.extract(text)
+    result = {
+        'name': '', 'author': '', 'scraped_genus': '',
+        'taxonomic_status': status_matcher.merge(existing_statuses, found_statuses)
+    }
 
     tokens = text.strip().split()
     if not tokens:
@@ -119,10 +99,7 @@ def _determine_author(author: str, name: str, taxonomic_statuses: list) -> str:
     
     # Clean any statuses that were part of the author string
     if final_author:
-        for status in KNOWN_TAXONOMIC_STATUSES:
-            if status in final_author.lower():
-                final_author = re.sub(re.escape(status), '', final_author, flags=re.IGNORECASE)
-        final_author = final_author.strip()
+        final_author = status_matcher.strip(final_author).strip()
 
     # If no author was found, apply overrides
     if not final_author:
@@ -135,32 +112,32 @@ def _determine_author(author: str, name: str, taxonomic_statuses: list) -> str:
             
     return final_author
 
-def _parse_content(soup: BeautifulSoup, rules: dict) -> str:
-    """Extracts and formats the main body content from the page."""
+def select_content_nodes(soup: BeautifulSoup, rules: dict) -> list:
+    """Returns the element(s) holding the page's body content, or an empty list."""
     content_rule = rules.get('content_selector', {})
     if not content_rule or not content_rule.get('selector'):
-        return ""
-        
+        return []
+
     try:
         elements = soup.select(content_rule['selector'])
         if not elements:
-            return ""
-        
-        book_name = rules.get('book_name')
-        if book_name == 'thirteen':
-            html_content = "".join(str(p) for p in elements)
-            body_content = format_body_content(markdownify(html_content))
-        else:
-            index = content_rule.get('index', 0)
-            container = elements[index]
-            body_content = format_body_content(markdownify(str(container)))
-        
-        return replace_ocr_symbols(body_content) if book_name == 'thirteen' else body_content
-
+            return []
+        if rules.get('book_name') == 'thirteen':
+            return elements
+        return [elements[content_rule.get('index', 0)]]
     except (SelectorSyntaxError, IndexError):
+        return []
+
+def _parse_content(soup: BeautifulSoup, rules: dict) -> str:
+    """Extracts and formats the main body content from the page."""
+    nodes = select_content_nodes(soup, rules)
+    if not nodes:
         return ""
 
-def _parse_citations(soup: BeautifulSoup, rules: dict) -> list:
+    body_content = format_body_content(html_to_markdown(nodes))
+    return replace_ocr_symbols(body_content) if rules.get('book_name') == 'thirteen' else body_content
+
+def _parse_citations(soup: BeautifulSoup, rules: dict, texts: DocumentTexts) -> list:
     """Extracts citation strings from the page."""
     citation_rule = rules.get('citation_selector', {})
     if not citation_rule:
@@ -170,26 +147,28 @@ def _parse_citations(soup: BeautifulSoup, rules: dict) -> list:
     if method == 'build_citation_string':
         citation_text = scrape_and_format_citation(soup, citation_rule)
     else:
-        citation_text = _get_text_from_rule(soup, citation_rule)
+        citation_text = _get_text_from_rule(texts, citation_rule)
 
     return [citation_text] if citation_text else []
 
 
 # --- MAIN ORCHESTRATOR FUNCTION ---
 
-def parse_html_with_rules(soup: BeautifulSoup, rules: dict, genus_fallback: str) -> dict:
+def parse_html_with_rules(soup: BeautifulSoup, rules: dict, genus_fallback: str, texts: DocumentTexts = None) -> dict:
     """
     Orchestrates the parsing of a species page by applying text-based scraping rules
     and calling specialized helper functions.
     """
+    texts = texts or DocumentTexts(soup)
+
     # 1. Get raw text from rules
     name_rule = rules.get('name_selector', {})
     genus_rule = rules.get('genus_selector', {})
     author_rule = rules.get('author_selector', {})
 
-    full_name_text = _get_text_from_rule(soup, name_rule)
-    full_genus_text = _get_text_from_rule(soup, genus_rule) if genus_rule else ""
-    full_author_text = _get_text_from_rule(soup, author_rule)
+    full_name_text = _get_text_from_rule(texts, name_rule)
+    full_genus_text = _get_text_from_rule(texts, genus_rule) if genus_rule else ""
+    full_author_text = _get_text_from_rule(texts, author_rule)
     
     # 2. Initial data extraction
     taxonomic_status = _find_taxonomic_statuses(full_name_text, full_genus_text)
@@ -211,7 +190,7 @@ def parse_html_with_rules(soup: BeautifulSoup, rules: dict, genus_fallback: str)
 
     # 5. Parse content and citations using dedicated helpers
     body_content = _parse_content(soup, rules)
-    citations = _parse_citations(soup, rules)
+    citations = _parse_citations(soup, rules, texts)
     
     # 6. Final cleaning and assembly
     if name and name.strip().lower() == 'sp':
@@ -220,7 +199,7 @@ def parse_html_with_rules(soup: BeautifulSoup, rules: dict, genus_fallback: str)
     return {
         "name": name.replace('\ufffd', '').strip('\'" ') if name else "Unknown",
         "author": final_author.replace('\ufffd', '').strip('\'" ., ') if final_author else None,
-        "taxonomic_status": list(set(taxonomic_status)),
+        "taxonomic_status": status_matcher.merge(taxonomic_status),
         "genus": final_genus.replace('\ufffd', '').strip('\'" ') if final_genus else "Unknown",
         "scraped_genus_raw": scraped_genus,
         "body_content": body_content,
@@ -0,0 +1,149 @@
+# core/pipeline.py
+
+import argparse
+import concurrent.futures
+import queue
+import threading
+import time
+
+_STOP = object()
+
+class Stage:
+    """
+    One step of a Pipeline. `func(job)` takes the job dict from the previous
+    stage and returns it for the next one; setting job['outcome'] finishes the
+    job early. With processes=True, func runs in a process pool (for CPU-bound
+    work) and must be a picklable, module-level function.
+    """
+    def __init__(self, name: str, func, workers=1, processes=False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.count = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._running = 0
+
+class Pipeline:
+    """
+    Streams jobs from a source through a series of stages, each with its own
+    workers, connected by bounded queues. Reads, parsing and writes overlap,
+    and no more than `queue_size` jobs wait between any two stages, however
+    long the source is. Finished jobs are yielded by run() as they complete.
+    """
+    def __init__(self, source, stages, queue_size=64):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self._cancelled = threading.Event()
+
+    def _put(self, q, item):
+        while not self._cancelled.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while not self._cancelled.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _feed(self, first_queue):
+        try:
+            for job in self.source:
+                if self._cancelled.is_set():
+                    return
+                self._put(first_queue, job)
+        finally:
+            self._put(first_queue, _STOP)
+
+    def _work(self, stage, in_queue, out_queue, done_queue, executor):
+        while True:
+            job = self._get(in_queue)
+            if job is not _STOP and job.get('outcome'):
+                self._put(done_queue, job)
+                continue
+            if job is _STOP:
+                # Let the stage's other workers see the stop too; the last one forwards it.
+                self._put(in_queue, _STOP)
+                with stage._lock:
+                    stage._running -= 1
+                    last = stage._running == 0
+                if last:
+                    self._put(out_queue, _STOP)
+                return
+
+            started = time.perf_counter()
+            try:
+                if executor is not None:
+                    job = executor.submit(stage.func, job).result()
+                else:
+                    job = stage.func(job)
+            except Exception as e:
+                job['outcome'] = 'error'
+                job['error'] = f"{stage.name}: {e}"
+            with stage._lock:
+                stage.count += 1
+                stage.busy_seconds += time.perf_counter() - started
+
+            self._put(done_queue if job.get('outcome') else out_queue, job)
+
+    def run(self):
+        """Runs the pipeline and yields every job once it has an outcome."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        done_queue = queues[-1]
+        executors = []
+        threads = [threading.Thread(target=self._feed, args=(queues[0],), daemon=True)]
+
+        for i, stage in enumerate(self.stages):
+            executor = None
+            if stage.processes:
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=stage.workers)
+                executors.append(executor)
+            stage._running = stage.workers
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[i], queues[i + 1], done_queue, executor), daemon=True
+                ))
+
+        self._started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                job = self._get(done_queue)
+                if job is _STOP:
+                    break
+                yield job
+        finally:
+            self._cancelled.set()
+            for thread in threads:
+                thread.join()
+            for executor in executors:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._elapsed = time.perf_counter() - self._started
+
+    def print_stats(self):
+        """Prints how many jobs each stage handled and how fast."""
+        print(f"\nPipeline throughput ({self._elapsed:.2f}s total):")
+        for stage in self.stages:
+            rate = stage.count / stage.busy_seconds * stage.workers if stage.busy_seconds else 0.0
+            print(f"  - {stage.name:<9} {stage.count:>6} job(s), {stage.workers} worker(s), "
+                  f"{stage.busy_seconds:.2f}s busy, {rate:.1f} jobs/s")
+
+def parse_stage_workers(value: str) -> dict:
+    """Parses a `stage=N,stage=N` option, e.g. 'read=4,parse=2'."""
+    workers = {}
+    for part in value.split(','):
+        name, _, count = part.partition('=')
+        if not name.strip() or not count.strip().isdigit() or int(count) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid stage workers '{part}'. Use the form stage=N, e.g. read=4.")
+        workers[name.strip()] = int(count)
+    return workers
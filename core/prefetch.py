@@ -0,0 +1,78 @@
+# core/prefetch.py
+
+import collections
+import concurrent.futures
+import threading
+
+from bs4 import BeautifulSoup
+
+import config
+from .corpus import read_legacy_html
+from .document_texts import DocumentTexts
+
+def _load_document(url: str):
+    html = read_legacy_html(url)
+    if html is None:
+        return None
+    return DocumentTexts(BeautifulSoup(html, 'html.parser'))
+
+class PagePrefetcher:
+    """
+    Reads and parses legacy pages on background threads while the user is
+    answering prompts, keeping the `capacity` most recently used parsed pages.
+    Speculative work on those pages (e.g. scraping with the current rules)
+    runs on a separate thread, so it can wait for page loads without ever
+    blocking them.
+    """
+    def __init__(self, capacity=None, workers=None):
+        self.capacity = capacity or config.PREFETCH_CACHE_SIZE
+        self._loader = concurrent.futures.ThreadPoolExecutor(max_workers=workers or config.PREFETCH_WORKERS)
+        self._speculator = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._documents = collections.OrderedDict()
+        self._speculations = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, url: str):
+        """Starts loading a page in the background, unless it is already cached or loading."""
+        with self._lock:
+            if url in self._documents:
+                self._documents.move_to_end(url)
+                return
+            self._documents[url] = self._loader.submit(_load_document, url)
+            self._evict()
+
+    def _evict(self):
+        # Only finished pages are dropped; pages still loading are about to be used.
+        for url in list(self._documents):
+            if len(self._documents) <= self.capacity:
+                break
+            if self._documents[url].done():
+                del self._documents[url]
+
+    def document(self, url: str):
+        """Returns the parsed page (a DocumentTexts), waiting for or doing the load if needed."""
+        self.prefetch(url)
+        with self._lock:
+            future = self._documents[url]
+        return future.result()
+
+    def speculate(self, key, func, *args):
+        """Runs func(*args) in the background; its result is picked up later with speculation(key)."""
+        with self._lock:
+            if key not in self._speculations:
+                self._speculations[key] = self._speculator.submit(func, *args)
+
+    def speculation(self, key):
+        """Returns (and forgets) the Future of a speculative task, or None if none was started."""
+        with self._lock:
+            return self._speculations.pop(key, None)
+
+    def close(self):
+        self._speculator.shutdown(wait=False, cancel_futures=True)
+        self._loader.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,94 @@
+# core/reference_index.py
+
+import collections
+import math
+import re
+
+from .references import load_reference_pages
+
+class TrigramIndex:
+    """
+    An inverted index of character trigrams for approximate string matching.
+    A query only scores the strings that share one of its rarest trigrams
+    (prefix filtering), so lookups never compare against every entry.
+    """
+    def __init__(self):
+        self.documents = []
+        self._trigram_sets = []
+        self._postings = collections.defaultdict(list)
+        self._positions = {}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercases and reduces the text to alphanumeric words."""
+        return " ".join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+    @classmethod
+    def trigrams(cls, text: str) -> frozenset:
+        padded = f" {cls.normalize(text)} "
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    def add(self, text: str):
+        """Adds a string to the index, ignoring duplicates after normalization."""
+        key = self.normalize(text)
+        if not key or key in self._positions:
+            return
+        doc_id = len(self.documents)
+        self._positions[key] = doc_id
+        self.documents.append(text)
+        grams = self.trigrams(text)
+        self._trigram_sets.append(grams)
+        for gram in grams:
+            self._postings[gram].append(doc_id)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query: str, min_score: float = 0.5, limit: int = 1) -> list:
+        """
+        Returns up to `limit` (text, score) pairs, best first. The score is the
+        share of the query's trigrams found in the indexed string (0 to 1);
+        ties go to the string closest in length to the query.
+        """
+        query_grams = self.trigrams(query)
+        known_grams = [gram for gram in query_grams if gram in self._postings]
+        if not query_grams or not known_grams:
+            return []
+
+        # Any string scoring >= min_score shares at least one of these trigrams.
+        required = math.ceil(min_score * len(query_grams))
+        prefix_size = len(query_grams) - required + 1
+        known_grams.sort(key=lambda gram: len(self._postings[gram]))
+
+        candidates = set()
+        for gram in known_grams[:max(prefix_size, 1)]:
+            candidates.update(self._postings[gram])
+
+        results = []
+        for doc_id in candidates:
+            doc_grams = self._trigram_sets[doc_id]
+            shared = len(query_grams & doc_grams)
+            score = shared / len(query_grams)
+            if score >= min_score:
+                jaccard = shared / len(query_grams | doc_grams)
+                results.append((score, jaccard, doc_id))
+
+        results.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        return [(self.documents[doc_id], round(score, 3)) for score, _, doc_id in results[:limit]]
+
+def build_reference_index(pages=None) -> TrigramIndex:
+    """
+    Indexes every reference and publication string from the references.php
+    pages. "Ibid." entries are left out, as they resolve to the previous publication.
+    """
+    pages = load_reference_pages() if pages is None else pages
+    index = TrigramIndex()
+    for page in pages.values():
+        for text in page['entries'] or []:
+            if 'ibid.' not in text.lower():
+                index.add(text)
+        for publication in page['publications']:
+            if publication:
+                index.add(publication)
+    print(f"Reference index built with {len(index)} entries.")
+    return index
@@ -0,0 +1,146 @@
+# core/references.py
+
+import collections
+import hashlib
+import json
+import re
+from html.parser import HTMLParser
+
+import config
+from .corpus import iter_reference_pages
+
+# Bump this when the extraction logic changes, so cached entries are discarded.
+REFERENCE_CACHE_VERSION = 1
+YEAR_IN_PARENS = re.compile(r'\(\d{4}\)')
+
+class _ReferenceTokenizer(HTMLParser):
+    """
+    A single-pass tokenizer that collects the text of every <p> tag, split
+    into segments at each <br>. Each segment's text matches what
+    BeautifulSoup's get_text(strip=True) returns for that snippet.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._open = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'p':
+            paragraph = {'raw': [], 'segments': [[]]}
+            self.paragraphs.append(paragraph)
+            self._open.append(paragraph)
+        elif tag == 'br':
+            for paragraph in self._open:
+                paragraph['segments'].append([])
+
+    def handle_endtag(self, tag):
+        if tag == 'p' and self._open:
+            self._open.pop()
+
+    def handle_data(self, data):
+        if not self._open:
+            return
+        stripped = data.strip()
+        for paragraph in self._open:
+            paragraph['raw'].append(data)
+            if stripped:
+                paragraph['segments'][-1].append(stripped)
+
+def extract_reference_entries(html_content: str):
+    """
+    Finds the reference list (the first <p> containing a year in parentheses)
+    and returns the text of each <br>-separated entry. Returns None if the
+    page has no reference container.
+    """
+    tokenizer = _ReferenceTokenizer()
+    tokenizer.feed(html_content)
+    tokenizer.close()
+
+    for paragraph in tokenizer.paragraphs:
+        if YEAR_IN_PARENS.search(''.join(paragraph['raw'])):
+            texts = (''.join(segment) for segment in paragraph['segments'])
+            return [text for text in texts if text]
+    return None
+
+def resolve_publications(entries: list) -> list:
+    """
+    Maps each reference entry to the publication it counts towards, reusing
+    the last valid publication for "Ibid." entries. Entries that are not
+    publications map to None.
+    """
+    resolved = []
+    last_publication = None
+    for text in entries:
+        if 'ibid.' in text.lower():
+            resolved.append(last_publication)
+            continue
+        if YEAR_IN_PARENS.search(text) and len(text) > 20:
+            last_publication = " ".join(text.split())
+            resolved.append(last_publication)
+        else:
+            resolved.append(None)
+    return resolved
+
+def _load_cache(cache_path) -> dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == REFERENCE_CACHE_VERSION:
+            return cache.get('pages', {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+def load_reference_pages() -> dict:
+    """
+    Parses every references.php page once and returns a map of legacy URL to
+    {'entries': [...], 'publications': [...]}, where 'entries' is None when no
+    reference container was found. Results are cached by a hash of the page.
+    """
+    cache_path = config.CACHE_DIR / config.REFERENCE_CACHE_FILENAME
+    cached_pages = _load_cache(cache_path)
+    pages = {}
+    parsed_count = 0
+
+    for ref_url, html_content in iter_reference_pages():
+        content_hash = hashlib.sha1(html_content.encode('utf-8')).hexdigest()
+        cached = cached_pages.get(ref_url)
+        if cached and cached.get('hash') == content_hash:
+            pages[ref_url] = cached
+            continue
+
+        try:
+            entries = extract_reference_entries(html_content)
+        except Exception as e:
+            print(f"  [ERROR] Could not process {ref_url}: {e}")
+            continue
+        parsed_count += 1
+        pages[ref_url] = {
+            'hash': content_hash,
+            'entries': entries,
+            'publications': resolve_publications(entries) if entries else []
+        }
+
+    if pages != cached_pages:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': REFERENCE_CACHE_VERSION, 'pages': pages}, f)
+        except OSError as e:
+            print(f"  -> WARNING: Could not save reference cache: {e}")
+
+    print(f"Loaded {len(pages)} references.php page(s) ({parsed_count} parsed, {len(pages) - parsed_count} from cache).")
+    return pages
+
+def get_reference_strings(pages=None) -> set:
+    """Returns the set of all reference entry strings."""
+    pages = load_reference_pages() if pages is None else pages
+    return {text for page in pages.values() for text in (page['entries'] or [])}
+
+def get_publication_counts(pages=None) -> collections.Counter:
+    """Counts how often each publication is referenced, with Ibid. resolved."""
+    pages = load_reference_pages() if pages is None else pages
+    counts = collections.Counter()
+    for page in pages.values():
+        counts.update(pub for pub in page['publications'] if pub)
+    return counts
@@ -2,10 +2,13 @@ from bs4 import BeautifulSoup
 import re
 from pathlib import Path
 from config import BOOK_NUMBER_MAP, SCRAPING_RULES, CDN_BASE_URL, DEFAULT_PLATE
+from .document_texts import DocumentTexts
 from .parser import parse_html_with_rules
 from .html_preprocessor import remove_font_tags
+from .config_manager import config_manager
+from .corpus import read_legacy_html
 
-def scrape_images_and_labels(soup: BeautifulSoup, book_name: str, book_number: str) -> tuple:
+def scrape_images_and_labels(soup: BeautifulSoup, book_name: str, book_number: str, texts: DocumentTexts = None) -> tuple:
     """
     Scrapes all images and categorizes them, mapping labels to plates.
     """
@@ -38,9 +41,10 @@ def scrape_images_and_labels(soup: BeautifulSoup, book_name: str, book_number: s
     if not plate_tags:
         return [DEFAULT_PLATE[0]], genitalia, misc_images
     
+    texts = texts or DocumentTexts(soup)
     label_strings = []
     for element in soup.find_all(['td', 'p']):
-        text = element.get_text()
+        text = texts.raw_text(element)
         if re.search(r'(♂|♀|\(holotype\)|\(paratype\))', text, re.IGNORECASE):
             label_parts = []
             symbols = re.findall(r'(♂|♀)', text)
@@ -70,19 +74,34 @@ class SpeciesScraper:
     """
     Orchestrates the scraping of a species page by calling specialized modules.
     """
-    def __init__(self, html_content: str, book_name: str, genus_name: str):
-        cleaned_html = remove_font_tags(html_content)
-        self.soup = BeautifulSoup(cleaned_html, 'html.parser')
+    def __init__(self, html_content: str, book_name: str, genus_name: str, preprocessed: bool = False,
+                 rules: dict = None, soup: BeautifulSoup = None):
+        if soup is None:
+            cleaned_html = html_content if preprocessed else remove_font_tags(html_content)
+            soup = BeautifulSoup(cleaned_html, 'html.parser')
+        self.soup = soup
+        self.texts = DocumentTexts(soup)
         
         self.book_name = book_name
         self.book_number = BOOK_NUMBER_MAP.get(book_name)
         self.genus_fallback = genus_name
         
-        # Get rules from the new manager
-        self.rules = config_manager.get_rules_for_book(book_name)
+        # Get rules from the new manager, unless candidate rules are being tested.
+        self.rules = rules if rules is not None else config_manager.get_rules_for_book(book_name)
         
         # Add the book's name to the rules dictionary so the parser can identify it.
         self.rules['book_name'] = book_name
+
+    @classmethod
+    def from_legacy_url(cls, legacy_url: str, book_name: str, genus_name: str):
+        """
+        Creates a scraper for a legacy page, reading its pre-normalized HTML
+        from the corpus archive. Returns None if the page does not exist.
+        """
+        html_content = read_legacy_html(legacy_url)
+        if html_content is None:
+            return None
+        return cls(html_content, book_name, genus_name, preprocessed=True)
     
     def scrape_all(self):
         """
@@ -90,11 +109,11 @@ class SpeciesScraper:
         This is the single source of truth for scraping.
         """
         # 1. Get all text data using the unified, rule-based parser
-        text_data = parse_html_with_rules(self.soup, self.rules, self.genus_fallback)
+        text_data = parse_html_with_rules(self.soup, self.rules, self.genus_fallback, self.texts)
         
         # 2. Get all image data
         plates, genitalia, misc_images = scrape_images_and_labels(
-            self.soup, self.book_name, self.book_number
+            self.soup, self.book_name, self.book_number, self.texts
         )
         
         # 3. Combine and return the final dictionary
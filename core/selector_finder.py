@@ -1,21 +1,24 @@
 # selector_finder.py
 
 import re
+from .taxonomy import status_matcher
+from .document_texts import DocumentTexts
 from .processing import correct_text_spacing
-from tasks.utils import get_book_from_url
 
-def suggest_selectors(soup):
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
+def suggest_selectors(soup, texts: DocumentTexts = None):
     """
     Analyzes the HTML and suggests potential rules (selector + index) for different data types.
     This function contains no user interaction logic.
     """
+    texts = texts or DocumentTexts(soup)
     suggestions = {'name': [], 'genus': [], 'author': [], 'citation': [], 'content': []}
-    
+
     # Heuristic 1: Bold tags for name and genus
-    b_tags = soup.select('b')
+    b_tags = texts.select('b')
     for i, tag in enumerate(b_tags):
-        text = " ".join(tag.get_text(strip=True, separator=' ').split())
-        text = correct_text_spacing(text)
+        text = correct_text_spacing(texts.text(tag, ' ', strip=True))
         rule = {'selector': 'b', 'index': i}
         if len(text) >= 2 and len(text) < 100:
             suggestions['name'].append((rule, text))
@@ -24,10 +27,10 @@ def suggest_selectors(soup):
                 suggestions['author'].append((rule, text))
 
     # Heuristic 2: span tags
-    span_tags = soup.select('span')
+    span_tags = texts.select('span')
     for i, tag in enumerate(span_tags):
         # To avoid noise, only consider spans that contain a <b> tag or have short text
-        text = " ".join(tag.get_text(strip=True, separator=' ').split())
+        text = texts.text(tag, ' ', strip=True)
         if (tag.find('b') or len(text) < 30) and (len(text) >= 2 and len(text) < 100):
             rule = {'selector': 'span', 'index': i}
             suggestions['name'].append((rule, text))
@@ -44,19 +47,54 @@ def suggest_selectors(soup):
     ]
 
     for selector in candidate_selectors:
-        matched_tags = soup.select(selector)
+        matched_tags = texts.select(selector)
         for i, tag in enumerate(matched_tags):
             if id(tag) in processed_tags:
                 continue
-            
+
             processed_tags.add(id(tag))
-            
-            text = " ".join(tag.get_text(strip=True).split())
+
+            text = texts.text(tag, strip=True)
             rule = {'selector': selector, 'index': i}
 
             if len(text) > 150:
                 suggestions['content'].append((rule, text[:150] + "..."))
-            if re.search(r'\\b(19|20)\\d{2}\\b', text) and len(text) < 200:
+            if YEAR_PATTERN.search(text) and len(text) < 200:
                 suggestions['citation'].append((rule, text))
-            
-    return suggestions
\ No newline at end of file
+
+    return suggestions
+
+def _is_name_like(text: str) -> bool:
+    return 2 <= len(text) < 100 and text != "Unknown" and text not in status_matcher.known_statuses
+
+# Field -> whether the text a rule extracts is a plausible value for it.
+FIELD_CHECKS = {
+    'name': _is_name_like,
+    'genus': lambda text: _is_name_like(text) and text[0].isupper(),
+    'author': lambda text: 2 <= len(text) < 100 and text.strip('., ').lower() != 'spp' and (
+        text.istitle() or (text.startswith('(') and text.endswith(')'))
+    ),
+    'citation': lambda text: len(text) < 300 and YEAR_PATTERN.search(text) is not None,
+    'content': lambda text: len(text) > 150 and '<' not in text and '>' not in text,
+}
+
+def rank_suggestions(suggestions: dict, documents: list) -> dict:
+    """
+    Scores every suggested rule against a sample of pages from the same book
+    (a list of DocumentTexts) and returns, per field, (rule, text, score)
+    tuples ordered best first. The score is the share of pages on which the
+    rule extracts a plausible value for the field.
+    """
+    ranked = {}
+    for field, candidates in suggestions.items():
+        check = FIELD_CHECKS[field]
+        scored = []
+        for rule, text in candidates:
+            hits = 0
+            for document in documents:
+                value = document.rule_text(rule)
+                if value and check(value):
+                    hits += 1
+            scored.append((rule, text, hits / len(documents) if documents else 0.0))
+        ranked[field] = sorted(scored, key=lambda candidate: -candidate[2])
+    return ranked
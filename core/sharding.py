@@ -0,0 +1,147 @@
+# core/sharding.py
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+import config
+
+# Bump this when the layout of shard result files changes.
+SHARD_FORMAT_VERSION = 1
+SHARD_FILE_PATTERN = re.compile(r'^shard-(\d+)-of-(\d+)\.jsonl$')
+
+class Shard(NamedTuple):
+    """One slice of the corpus, e.g. Shard(2, 4) for `--shard 2/4`."""
+    index: int
+    count: int
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+def parse_shard(value: str) -> Shard:
+    """Parses an `i/N` shard argument, with 1 <= i <= N."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}'. Use the form i/N, e.g. 1/4.")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}'. The index must be between 1 and N.")
+    return Shard(index, count)
+
+def shard_for_key(key: str, count: int) -> int:
+    """Returns the (1-based) shard a key belongs to. Stable across machines and runs."""
+    digest = hashlib.md5(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+def in_shard(key: str, shard) -> bool:
+    return shard is None or shard_for_key(key, shard.count) == shard.index
+
+def filter_shard(items, shard, key=str) -> list:
+    """Keeps only the items whose key falls in the given shard (all of them if shard is None)."""
+    if shard is None:
+        return list(items)
+    return [item for item in items if in_shard(key(item), shard)]
+
+def relative_key(root: Path):
+    """Returns a key function that shards files by their path relative to root."""
+    return lambda path: Path(path).relative_to(root).as_posix()
+
+def get_shard_dir(command: str, shard_dir=None) -> Path:
+    return Path(shard_dir or config.CACHE_DIR / config.SHARD_DIR_NAME) / command
+
+class ShardWriter:
+    """
+    Writes a shard's partial results as JSON lines: a header holding the
+    summary, followed by one line per record. Records are streamed to a
+    temporary file and the result only appears once the shard is complete.
+    """
+    def __init__(self, command: str, shard: Shard, shard_dir=None):
+        self.command = command
+        self.shard = shard
+        self.summary = {}
+        directory = get_shard_dir(command, shard_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"shard-{shard.index}-of-{shard.count}.jsonl"
+        self._records = tempfile.TemporaryFile('w+', encoding='utf-8', dir=directory)
+
+    def add(self, record: dict):
+        self._records.write(json.dumps(record) + "\n")
+
+    def close(self):
+        header = {
+            'version': SHARD_FORMAT_VERSION,
+            'command': self.command,
+            'shard': [self.shard.index, self.shard.count],
+            'summary': self.summary,
+        }
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + "\n")
+            self._records.seek(0)
+            for line in self._records:
+                f.write(line)
+        self._records.close()
+        os.replace(tmp_path, self.path)
+        print(f"  -> Wrote partial results for shard {self.shard}: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._records.close()
+
+def write_shard_results(command: str, shard: Shard, summary: dict, records=(), shard_dir=None):
+    """Writes a shard's summary and (optional) records in one go."""
+    with ShardWriter(command, shard, shard_dir) as writer:
+        writer.summary = summary
+        for record in records:
+            writer.add(record)
+
+class ShardResult(NamedTuple):
+    path: Path
+    shard: Shard
+    summary: dict
+
+    def records(self):
+        """Yields the shard's records, one at a time."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            next(f, None)
+            for line in f:
+                yield json.loads(line)
+
+def load_shard_results(command: str, shard_dir=None) -> list:
+    """
+    Returns the results of every shard of a command, in shard order. Raises
+    ValueError if shards of different sizes are mixed or any shard is missing.
+    """
+    directory = get_shard_dir(command, shard_dir)
+    results = {}
+    counts = set()
+    for path in sorted(directory.glob('shard-*-of-*.jsonl')) if directory.is_dir() else []:
+        if not SHARD_FILE_PATTERN.match(path.name):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+        if header.get('version') != SHARD_FORMAT_VERSION or header.get('command') != command:
+            raise ValueError(f"{path.name} is not a compatible '{command}' shard result.")
+        shard = Shard(*header['shard'])
+        counts.add(shard.count)
+        results[shard.index] = ShardResult(path, shard, header['summary'])
+
+    if not results:
+        return []
+    if len(counts) > 1:
+        raise ValueError(f"Found results from different shard counts: {sorted(counts)}.")
+    count = counts.pop()
+    missing = [str(i) for i in range(1, count + 1) if i not in results]
+    if missing:
+        raise ValueError(f"Missing results for shard(s) {', '.join(missing)} of {count}.")
+    return [results[i] for i in range(1, count + 1)]
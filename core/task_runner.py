@@ -0,0 +1,129 @@
+# core/task_runner.py
+
+import collections
+import concurrent.futures
+import contextlib
+import io
+import sys
+import threading
+from typing import Any, NamedTuple
+
+class TaskResult(NamedTuple):
+    """The outcome of running a worker on a single item."""
+    item: Any
+    value: Any = None
+    output: str = ""
+    error: str = None
+
+class _ThreadLocalStdout:
+    """
+    A stdout proxy that sends each worker thread's output to its own buffer,
+    so that output can be printed in order once the item is done.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        buffer = getattr(self._local, 'buffer', None)
+        (buffer if buffer is not None else self._stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    @contextlib.contextmanager
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+def _describe(item) -> str:
+    return getattr(item, 'name', str(item))
+
+def _run_captured(worker, item) -> TaskResult:
+    """Runs worker(item) with its output captured and any error isolated to this item."""
+    if isinstance(sys.stdout, _ThreadLocalStdout):
+        capture = sys.stdout.capture()
+    else:
+        capture = contextlib.redirect_stdout(io.StringIO())
+    with capture as buffer:
+        try:
+            value = worker(item)
+            error = None
+        except Exception as e:
+            value, error = None, str(e)
+        output = buffer.getvalue()
+    return TaskResult(item, value, output, error)
+
+def run_file_tasks(worker, items, jobs=1, mode='thread', label=None):
+    """
+    Runs worker(item) for every item and yields a TaskResult per item, in the
+    original order. With jobs > 1 the items are spread over a pool of threads
+    (mode='thread', for I/O-bound work) or processes (mode='process', for
+    CPU-bound parsing; the worker must then be a picklable, module-level
+    function). Each item's output is printed in order after an optional
+    "[i/total] <label>: <name>" progress line, and an exception in one item
+    is reported without stopping the others.
+    """
+    items = list(items)
+    total = len(items)
+
+    def report(i, result):
+        if label:
+            print(f"[{i+1}/{total}] {label}: {_describe(result.item)}")
+        if result.output:
+            sys.stdout.write(result.output)
+        if result.error:
+            print(f"  [ERROR] Could not process {_describe(result.item)}: {result.error}")
+
+    if jobs <= 1 or total <= 1:
+        for i, item in enumerate(items):
+            if label:
+                print(f"[{i+1}/{total}] {label}: {_describe(item)}")
+            try:
+                result = TaskResult(item, worker(item))
+            except Exception as e:
+                result = TaskResult(item, error=str(e))
+                print(f"  [ERROR] Could not process {_describe(item)}: {result.error}")
+            yield result
+        return
+
+    original_stdout = sys.stdout
+    if mode == 'process':
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        sys.stdout = _ThreadLocalStdout(original_stdout)
+
+    try:
+        # Keep a bounded window of submitted items, so results are reported in
+        # order without queueing the whole corpus at once.
+        pending = collections.deque()
+        remaining = iter(enumerate(items))
+
+        def submit_next():
+            for i, item in remaining:
+                pending.append((i, executor.submit(_run_captured, worker, item)))
+                return
+
+        for _ in range(jobs * 4):
+            submit_next()
+
+        while pending:
+            i, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                result = TaskResult(items[i], error=str(e))
+            submit_next()
+            report(i, result)
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        sys.stdout = original_stdout
@@ -0,0 +1,84 @@
+# core/taxonomy.py
+
+import re
+import string
+from config import KNOWN_TAXONOMIC_STATUSES
+
+class TaxonomicStatusMatcher:
+    """
+    A precompiled matcher for the taxonomic statuses listed in mappings.yaml.
+    It is built once and shared, so name parsing never has to loop over the
+    status list or recompile a pattern per status.
+    """
+    def __init__(self, statuses):
+        self.reload(statuses)
+
+    def reload(self, statuses):
+        """Rebuilds the matcher for a new status list, e.g. after mappings.yaml is edited."""
+        self.statuses = list(dict.fromkeys(statuses))
+        # Replaced, never mutated, so a caller holding the old set keeps a consistent snapshot.
+        self.known_statuses = frozenset(self.statuses)
+        self._canonical = {status.lower(): status for status in self.statuses}
+        self._order = {status: i for i, status in enumerate(self.statuses)}
+
+        # Longest first, so that e.g. 'syns. n.' wins over 'syn. n.' in the alternation.
+        alternatives = sorted(self.statuses, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(s) for s in alternatives), re.IGNORECASE) if alternatives else None
+
+        # A status found in the text also implies any shorter status it contains.
+        self._implied = {
+            status: [other for other in self.statuses if other != status and other.lower() in status.lower()]
+            for status in self.statuses
+        }
+
+        # Individual words of every status, punctuation stripped, for token checks.
+        self.tokens = frozenset(
+            word.strip(string.punctuation).lower()
+            for status in self.statuses for word in status.split()
+            if word.strip(string.punctuation)
+        )
+
+    def _ordered(self, found) -> list:
+        """Returns the given statuses without duplicates, in canonical order."""
+        return sorted(set(found), key=self._order.__getitem__)
+
+    def _collect(self, match, found: list):
+        status = self._canonical[match.group(0).lower()]
+        found.append(status)
+        found.extend(self._implied[status])
+
+    def extract(self, text: str) -> tuple:
+        """
+        Finds and removes every known status in a single pass over the text.
+        Returns (statuses in canonical order, text with the statuses removed).
+        """
+        if not text or self.pattern is None:
+            return [], text or ""
+        found = []
+        def replacer(match):
+            self._collect(match, found)
+            return ''
+        stripped = self.pattern.sub(replacer, text)
+        return self._ordered(found), stripped
+
+    def find(self, text: str) -> list:
+        """Returns all known statuses present in the text, in canonical order."""
+        return self.extract(text)[0]
+
+    def strip(self, text: str) -> str:
+        """Removes all known statuses from the text."""
+        return self.extract(text)[1]
+
+    def merge(self, *status_lists) -> list:
+        """Combines several status lists into one, in canonical order."""
+        merged = [status for statuses in status_lists for status in statuses]
+        known = [s for s in merged if s in self._order]
+        unknown = [s for s in dict.fromkeys(merged) if s not in self._order]
+        return self._ordered(known) + unknown
+
+    def is_status_token(self, token: str) -> bool:
+        """Checks whether a single word is part of a known status (e.g. 'sp.' or 'n.')."""
+        return token.strip(string.punctuation).lower() in self.tokens
+
+# Create a single, shared instance built from mappings.yaml
+status_matcher = TaxonomicStatusMatcher(KNOWN_TAXONOMIC_STATUSES)
@@ -3,19 +3,60 @@
 import argparse
 import sys
 
-from tasks.scrape_new import run_scrape_new
-from tasks.cleanup import run_cleanup
-from tasks.audit import run_audit
-from tasks.generate_redirects import run_generate_redirects
-from tasks.citation_audit import run_citation_audit
-from tasks.build_publication_index import run_build_publication_index
-from tasks.format_citations import run_format_citations
-from tasks.scrape_genera import run_scrape_genera
+from core.daemon import forward_to_daemon
 
-def main():
+def add_jobs_argument(subparser):
+    """Adds the shared --jobs option to a corpus-wide command."""
+    subparser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help="Number of parallel workers to process files with (default: 1)."
+    )
+
+def add_shard_argument(subparser):
+    """Adds the shared --shard option to a corpus-wide command."""
+    from core.sharding import parse_shard
+    subparser.add_argument(
+        '--shard',
+        type=parse_shard,
+        default=None,
+        metavar='i/N',
+        help="Only process shard i of N and write partial results for the `merge` command."
+    )
+
+def add_resume_argument(subparser):
+    """Adds the shared --resume option to a checkpointed command."""
+    subparser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Continue an interrupted run from its checkpoint, skipping completed work."
+    )
+
+def build_parser():
     """
-    The main entry point for the command-line interface.
+    Builds the argument parser. The task modules are imported here rather than
+    at the top of the file, so commands forwarded to a running `serve` daemon
+    never pay for loading them.
     """
+    from core.pipeline import parse_stage_workers
+    from tasks.scrape_new import run_scrape_new
+    from tasks.cleanup import run_cleanup
+    from tasks.audit import run_audit
+    from tasks.generate_redirects import run_generate_redirects
+    from tasks.citation_audit import run_citation_audit
+    from tasks.build_publication_index import run_build_publication_index
+    from tasks.format_citations import run_format_citations
+    from tasks.scrape_genera import run_scrape_genera
+    from tasks.prepare_corpus import run_prepare_corpus
+    from tasks.build_citations import run_build_citations
+    from tasks.serve import run_serve
+    from tasks.watch import run_watch
+    from tasks.merge import run_merge
+    from tasks.markdown_check import run_markdown_check
+    from tasks.rules_test import run_rules_test
+    from tasks.rewrite_links import run_rewrite_links
+
     parser = argparse.ArgumentParser(
         description="A multi-purpose scraper and content management tool for the Moths of Borneo website."
     )
@@ -40,30 +81,65 @@ def main():
         action='store_true',
         help="Launch the interactive selector finder for books with missing or failing rules."
     )
+    add_shard_argument(scrape_parser)
+    add_resume_argument(scrape_parser)
+    scrape_parser.add_argument(
+        '--stage-workers',
+        type=parse_stage_workers,
+        default=None,
+        metavar='STAGE=N,...',
+        help="Workers per live-run pipeline stage (read, parse, format, validate), e.g. read=8,parse=4."
+    )
     scrape_parser.set_defaults(handler=run_scrape_new)
     
     scrape_genera_parser = subparsers.add_parser(
         "scrape-genera",
         help="Scrape body content for existing genera files."
     )
+    add_jobs_argument(scrape_genera_parser)
+    add_shard_argument(scrape_genera_parser)
     scrape_genera_parser.set_defaults(handler=run_scrape_genera)
 
+    cleanup_parser = subparsers.add_parser(
+        "cleanup",
+        help="Run cleanup tasks on existing species files."
+    )
+    cleanup_parser.add_argument('--images', action='store_true', help="Re-scrape and label plate, genitalia and misc images.")
+    cleanup_parser.add_argument('--groups', action='store_true', help="Assign groups based on the legacy URL.")
+    cleanup_parser.add_argument('--fields', action='store_true', help="Remove redundant and null frontmatter fields.")
+    cleanup_parser.add_argument('--citations', action='store_true', help="Repair malformed citation blocks.")
+    add_jobs_argument(cleanup_parser)
+    add_shard_argument(cleanup_parser)
+    add_resume_argument(cleanup_parser)
+    cleanup_parser.set_defaults(handler=run_cleanup)
+
+    build_citations_parser = subparsers.add_parser(
+        "build-citations",
+        help="Scrape citations for species files that have none."
+    )
+    add_jobs_argument(build_citations_parser)
+    add_shard_argument(build_citations_parser)
+    build_citations_parser.set_defaults(handler=run_build_citations)
+
     audit_parser = subparsers.add_parser(
         "audit",
         help="Run a comprehensive audit on content files and generate a report."
     )
+    add_shard_argument(audit_parser)
     audit_parser.set_defaults(handler=run_audit)
 
     citation_audit_parser = subparsers.add_parser(
         "citation-audit",
         help="Generate a report on the health of citations in all species files."
     )
+    add_shard_argument(citation_audit_parser)
     citation_audit_parser.set_defaults(handler=run_citation_audit)
     
     build_publication_index_parser = subparsers.add_parser(
         "build-publication-index",
         help="Build a publication index from all references.php files."
     )
+    add_shard_argument(build_publication_index_parser)
     build_publication_index_parser.set_defaults(handler=run_build_publication_index)
 
     format_citations_parser = subparsers.add_parser(
@@ -73,6 +149,7 @@ def main():
     format_citations_parser.add_argument(
         "publication",
         type=str,
+        nargs='?',
         help="The title of the publication to find."
     )
     format_citations_parser.add_argument(
@@ -81,30 +158,221 @@ def main():
         dest="canonical_name",
         help="The new, canonical name to apply to the publication."
     )
+    format_citations_parser.add_argument(
+        "--mapping",
+        type=str,
+        dest="mapping_file",
+        help="A JSON file mapping publications to canonical names (or a list of publications) to format in one pass."
+    )
+    format_citations_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Show the changes that would be made without saving any files."
+    )
+    add_jobs_argument(format_citations_parser)
+    add_shard_argument(format_citations_parser)
     format_citations_parser.set_defaults(handler=run_format_citations)
 
-    args = parser.parse_args()
+    prepare_corpus_parser = subparsers.add_parser(
+        "prepare-corpus",
+        help="Build a pre-normalized, compressed archive of the legacy PHP corpus."
+    )
+    prepare_corpus_parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help="Discard the existing archive and rebuild it from scratch."
+    )
+    prepare_corpus_parser.set_defaults(handler=run_prepare_corpus)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run a background daemon that keeps indexes warm and runs forwarded commands."
+    )
+    serve_parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=2.0,
+        help="Seconds between checks for changed content, PHP and config files (default: 2)."
+    )
+    serve_parser.set_defaults(handler=run_serve)
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Keep the dry-run scrape results and audit reports up to date as files change."
+    )
+    watch_parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=2.0,
+        help="Seconds between checks for changed content, PHP and config files (default: 2)."
+    )
+    watch_parser.set_defaults(handler=run_watch)
+
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Combine the partial results of sharded runs into the usual reports and summaries."
+    )
+    merge_parser.add_argument(
+        "commands",
+        nargs='*',
+        help="The sharded commands to merge (default: every command with shard results)."
+    )
+    merge_parser.add_argument(
+        '--shard-dir',
+        type=str,
+        default=None,
+        help="Directory holding the collected shard results (default: .cache/shards)."
+    )
+    merge_parser.set_defaults(handler=run_merge)
+
+    markdown_check_parser = subparsers.add_parser(
+        "markdown-check",
+        help="Compare the fast HTML-to-markdown converter with markdownify on the corpus and time both."
+    )
+    markdown_check_parser.add_argument(
+        '--limit',
+        type=int,
+        default=None,
+        help="Only check the first N species pages."
+    )
+    markdown_check_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help="Times to convert every fragment for the benchmark (default: 3)."
+    )
+    markdown_check_parser.set_defaults(handler=run_markdown_check)
+
+    rules_test_parser = subparsers.add_parser(
+        "rules-test",
+        help="Score a book's scraping rules against every page of the book."
+    )
+    rules_test_parser.add_argument("book", help="The book to test, e.g. 'seven'.")
+    rules_test_parser.add_argument(
+        '--sample',
+        type=int,
+        default=None,
+        help="Only test N pages, spread evenly across the book's genera."
+    )
+    rules_test_parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help="Random seed for --sample, to test changed rules on the same pages."
+    )
+    rules_test_parser.add_argument(
+        '--rules',
+        dest='rules_file',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help="Test the rules in this YAML file instead of the saved ones."
+    )
+    rules_test_parser.add_argument(
+        '--examples',
+        type=int,
+        default=3,
+        help="Example failures to show per field (default: 3)."
+    )
+    add_jobs_argument(rules_test_parser)
+    rules_test_parser.set_defaults(handler=run_rules_test)
+
+    rewrite_links_parser = subparsers.add_parser(
+        "rewrite-links",
+        help="Rewrite legacy .php links in existing species and genera files to their new site paths."
+    )
+    rewrite_links_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Show a diff of the links that would be rewritten without saving any files."
+    )
+    add_jobs_argument(rewrite_links_parser)
+    rewrite_links_parser.set_defaults(handler=run_rewrite_links)
+
+    return parser
+
+def run_command(argv):
+    """
+    Parses and runs a single command. Used both for local runs and by the
+    `serve` daemon for forwarded commands. Returns the exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
     
     if hasattr(args, 'force') and args.force:
         args.generate_files = True
 
     if hasattr(args, 'handler'):
         if args.command == 'scrape':
-            args.handler(generate_files=args.generate_files, interactive=args.interactive, force=args.force)
+            args.handler(
+                generate_files=args.generate_files,
+                interactive=args.interactive,
+                force=args.force,
+                shard=args.shard,
+                resume=args.resume,
+                stage_workers=args.stage_workers
+            )
         elif args.command == 'cleanup':
             args.handler(
                 images=args.images,
                 groups=args.groups,
                 fields=args.fields,
-                citations=args.citations
+                citations=args.citations,
+                jobs=args.jobs,
+                shard=args.shard,
+                resume=args.resume
             )
         elif args.command == 'format-citation':
-            args.handler(publication_title=args.publication, canonical_name=args.canonical_name)
-        elif args.command in ['audit', 'redirects', 'citation-audit', 'build-publication-index', 'scrape-genera']:
+            if not args.publication and not args.mapping_file:
+                parser.error("format-citation requires a publication or --mapping FILE.")
+            args.handler(
+                publication_title=args.publication,
+                canonical_name=args.canonical_name,
+                mapping_file=args.mapping_file,
+                dry_run=args.dry_run,
+                jobs=args.jobs,
+                shard=args.shard
+            )
+        elif args.command == 'prepare-corpus':
+            args.handler(rebuild=args.rebuild)
+        elif args.command in ['scrape-genera', 'build-citations']:
+            args.handler(jobs=args.jobs, shard=args.shard)
+        elif args.command in ['serve', 'watch']:
+            args.handler(poll_interval=args.poll_interval)
+        elif args.command == 'merge':
+            args.handler(commands=args.commands, shard_dir=args.shard_dir)
+        elif args.command in ['audit', 'citation-audit', 'build-publication-index']:
+            args.handler(shard=args.shard)
+        elif args.command == 'markdown-check':
+            args.handler(limit=args.limit, repeat=args.repeat)
+        elif args.command == 'rules-test':
+            args.handler(
+                book_name=args.book,
+                sample=args.sample,
+                seed=args.seed,
+                rules_file=args.rules_file,
+                jobs=args.jobs,
+                examples=args.examples
+            )
+        elif args.command == 'rewrite-links':
+            args.handler(dry_run=args.dry_run, jobs=args.jobs)
+        elif args.command == 'redirects':
             args.handler()
     else:
         parser.print_help()
-        sys.exit(1)
+        return 1
+    return 0
+
+def main():
+    """
+    The main entry point for the command-line interface. Commands run in the
+    `serve` daemon when one is running, and locally otherwise.
+    """
+    argv = sys.argv[1:]
+    exit_code = forward_to_daemon(argv)
+    if exit_code is None:
+        exit_code = run_command(argv)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
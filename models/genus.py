@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class Genus:
     """
     A data model representing a single genus, mirroring the AstroJS content schema.
@@ -22,13 +22,26 @@ class Genus:
     legacy: Optional[bool] = None
     body_content: str = ""
 
+    # Derived-field cache, recomputed whenever the name changes.
+    _derived_key: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _slug: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _filepath: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
+
+    def _refresh_derived(self):
+        if self.name != self._derived_key:
+            from config import GENERA_DIR
+            self._slug = self.name.lower().replace(' ', '-')
+            self._filepath = GENERA_DIR / f"{self._slug}.md"
+            self._derived_key = self.name
+
     @property
     def slug(self) -> str:
         """Generates the file slug from the genus name."""
-        return self.name.lower().replace(' ', '-')
+        self._refresh_derived()
+        return self._slug
 
     @property
     def filepath(self) -> Path:
         """Constructs the full path to the markdown file."""
-        from config import GENERA_DIR
-        return GENERA_DIR / f"{self.slug}.md"
\ No newline at end of file
+        self._refresh_derived()
+        return self._filepath
\ No newline at end of file
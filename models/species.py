@@ -4,22 +4,34 @@ import re
 import frontmatter
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 from core.file_system import save_markdown_file
-from config import SPECIES_DIR, KNOWN_TAXONOMIC_STATUSES
+from core.taxonomy import status_matcher
+from config import SPECIES_DIR
 
-@dataclass
+_NON_LETTERS = re.compile(r'[^a-z]')
+# The per-character part of the slug clean-up, done in one pass.
+_SLUG_CHARACTERS = str.maketrans({' ': '-', '?': None, '.': None})
+
+def make_species_slug(genus: str, name: str) -> str:
+    """The file slug for a species, e.g. 'arctia-sp-1'."""
+    name_for_slug = name.lower().replace('sp. ', 'sp-').translate(_SLUG_CHARACTERS)
+    clean_genus = _NON_LETTERS.sub('', genus.strip().lower())
+    return f"{clean_genus}-{name_for_slug}"
+
+@dataclass(slots=True)
 class Plate:
     """Represents a single plate image with its URL and label."""
     url: str
     label: Optional[str] = ""
 
-@dataclass
+@dataclass(slots=True)
 class Species:
     """
     A data model representing a single species, mirroring the AstroJS content schema.
     This class centralizes data handling, validation, and file operations.
+    Instances are slotted, so a whole corpus of them can be held in memory cheaply.
     """
     # Core Identity
     name: str
@@ -44,19 +56,31 @@ class Species:
     citations: List[str] = field(default_factory=list)
     body_content: str = ""
 
+    # Derived-field cache, recomputed whenever the genus or name changes.
+    _derived_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _slug: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _filepath: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
+
     # --- Instance Methods ---
 
+    def _refresh_derived(self):
+        key = (self.genus, self.name)
+        if key != self._derived_key:
+            self._slug = make_species_slug(self.genus, self.name)
+            self._filepath = SPECIES_DIR / f"{self._slug}.md"
+            self._derived_key = key
+
     @property
     def slug(self) -> str:
         """Generates the file slug from the genus and species name."""
-        name_for_slug = self.name.lower().replace('sp. ', 'sp-').replace(' ', '-').replace('?', '').replace('.', '')
-        clean_genus = re.sub(r'[^a-z]', '', self.genus.strip().lower())
-        return f"{clean_genus}-{name_for_slug}"
+        self._refresh_derived()
+        return self._slug
 
     @property
     def filepath(self) -> Path:
         """Constructs the full path to the markdown file."""
-        return SPECIES_DIR / f"{self.slug}.md"
+        self._refresh_derived()
+        return self._filepath
 
     def to_frontmatter(self) -> dict:
         """Converts the dataclass instance to a dictionary for frontmatter serialization."""
@@ -78,21 +102,43 @@ class Species:
         }
         return {k: v for k, v in output.items() if v is not None and v != []}
 
-    def save(self) -> bool:
-        """Saves the species data as a markdown file with YAML frontmatter."""
-        if self.filepath.exists():
-            print(f"  -> ℹ️ SKIPPING: File already exists at {self.filepath.name}")
-            return False
+    def to_post(self) -> frontmatter.Post:
+        """The species as a frontmatter.Post, ready to be written out."""
         post = frontmatter.Post(content=self.body_content)
         post.metadata = self.to_frontmatter()
-        return save_markdown_file(post, self.filepath)
+        return post
 
-    def validate(self) -> List[str]:
+    def save(self, claimed_slugs: Optional[dict] = None) -> bool:
+        """
+        Saves the species data as a markdown file with YAML frontmatter,
+        never overwriting an existing file. claimed_slugs maps the slugs
+        already taken (on disk or earlier in the run) to their legacy URLs;
+        the slug is checked against it first and added to it once saved, or
+        (with no URL) if the file turns out to exist already.
+        """
+        filepath = self.filepath
+        if claimed_slugs is not None and self.slug in claimed_slugs:
+            print(f"  -> ℹ️ SKIPPING: File already exists at {filepath.name}")
+            return False
+        try:
+            saved = save_markdown_file(self.to_post(), filepath, exclusive=True)
+        except FileExistsError:
+            # Created since claimed_slugs was built, e.g. by another shard.
+            print(f"  -> ℹ️ SKIPPING: File already exists at {filepath.name}")
+            if claimed_slugs is not None:
+                claimed_slugs[self.slug] = None
+            return False
+        if saved and claimed_slugs is not None:
+            claimed_slugs[self.slug] = self.legacy_url
+        return saved
+
+    def validate(self, known_statuses=None) -> List[str]:
         """Performs a quality check and returns a list of failing fields."""
+        known_statuses = status_matcher.known_statuses if known_statuses is None else known_statuses
         failures = []
-        if not self.name or self.name == "Unknown" or self.name in KNOWN_TAXONOMIC_STATUSES:
+        if not self.name or self.name == "Unknown" or self.name in known_statuses:
             failures.append('name')
-        if not self.genus or self.genus == "Unknown" or self.genus in KNOWN_TAXONOMIC_STATUSES:
+        if not self.genus or self.genus == "Unknown" or self.genus in known_statuses:
             failures.append('genus')
         if self.author is not None and self.author.strip('., ').lower() == 'spp':
             failures.append('author')
@@ -100,6 +146,30 @@ class Species:
             failures.append('content')
         return failures
 
+    # --- Batch Methods ---
+
+    @staticmethod
+    def validate_many(records: Iterable["Species"]) -> list:
+        """
+        Validates many species against one snapshot of the known statuses.
+        Returns (species, failing fields) for the invalid ones, in input order.
+        """
+        known_statuses = status_matcher.known_statuses
+        invalid = []
+        for species in records:
+            failures = species.validate(known_statuses)
+            if failures:
+                invalid.append((species, failures))
+        return invalid
+
+    @staticmethod
+    def serialize_many(records: Iterable["Species"]) -> list:
+        """
+        Renders many species to markdown at once. Returns (species, file content)
+        pairs in input order; species sharing a slug each keep their own entry.
+        """
+        return [(species, frontmatter.dumps(species.to_post())) for species in records]
+
     @classmethod
     def from_scraped_data(cls, entry_data: dict, scraped_data: dict, book_name: str) -> "Species":
         """Factory method to create a Species instance from scraper output."""
@@ -1,27 +1,29 @@
 # mob-scraper/tasks/audit.py
 
 import collections
-import frontmatter
 import re
 
 from config import (
     SPECIES_DIR, GENERA_DIR, CONTENT_QUALITY_REPORT_FILENAME
 )
+from core.link_rewriter import LINK_BYTES_PATTERN, get_site_paths, resolve_site_link, site_dir_for
+from core.mapped_markdown import MappedMarkdown
 from core.file_system import get_master_php_urls, index_entries_by_url, index_entries_by_slug, get_all_referenced_genera
 from .reporting import generate_html_report, update_index_page
-from tasks.utils import get_contextual_data
+from tasks.utils import ContextResolver
 from reclassification_manager import load_reclassified_urls
+from core.sharding import filter_shard, relative_key, write_shard_results
 from .citation_audit import run_citation_audit
 
-def run_audit():
+LEGACY_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+\.php)\)')
+# The same pattern for searching memory-mapped files.
+LEGACY_LINK_BYTES_PATTERN = re.compile(LEGACY_LINK_PATTERN.pattern.encode('ascii'))
+
+def reconcile_files() -> dict:
     """
-    Runs a comprehensive audit on the content, checking for missing files,
-    quality issues, and legacy links, then generates a single HTML report.
-    Also triggers the citation audit.
+    Compares the PHP source pages with the species files and returns the
+    missing URLs, split into creatable and uncreatable, plus missing genera.
     """
-    print("🚀 Starting comprehensive content audit...")
-
-    # --- Part 1: File Reconciliation ---
     print("🔎 Reconciling PHP source files with Markdown content...")
     all_php_urls = get_master_php_urls()
     reclassified_urls = load_reclassified_urls()
@@ -37,79 +39,107 @@ def run_audit():
     
     creatable_species_files = []
     uncreatable_files = []
+    resolver = ContextResolver(existing_species_by_url, existing_genera_by_url, existing_genera_by_slug)
+    contexts = resolver.resolve_all(missing_urls)
     for url in missing_urls:
-        context, context_type = get_contextual_data(url, existing_species_by_url, existing_genera_by_url, existing_genera_by_slug)
+        context, context_type = contexts[url]
         if context:
             creatable_species_files.append(url)
         else:
             uncreatable_files.append(url)
             
-    # --- Part 1a: Check for missing genera ---
+    # --- Check for missing genera ---
     referenced_genera = get_all_referenced_genera()
     existing_genera_slugs = set(existing_genera_by_slug.keys())
     missing_genera = sorted(list(referenced_genera - existing_genera_slugs))
 
+    return {
+        'missing_urls': missing_urls,
+        'contexts': contexts,
+        'creatable_species_files': creatable_species_files,
+        'uncreatable_files': uncreatable_files,
+        'missing_genera': missing_genera,
+    }
 
-    # --- Part 2: Audit Existing File Quality ---
-    print("🔎 Auditing quality of existing content...")
-    empty_species_files = []
-    unfinished_species_files = []
-    legacy_links_found = []
-    book_data = collections.defaultdict(lambda: collections.defaultdict(int))
-    
-    empty_genera_files = []
-    unfinished_genera_files = []
-    bad_format_genera_files = []
-    
-    legacy_link_pattern = re.compile(r'\[([^\]]+)\]\(([^)]+\.php)\)')
+def _site_links(page, file_path) -> list:
+    """The site paths of the relative page links in a body, e.g. those rewrite-links writes."""
+    site_dir = site_dir_for(file_path)
+    links = set()
+    for match in page.body_finditer(LINK_BYTES_PATTERN):
+        site_path = resolve_site_link(match.group(2).decode('utf-8', 'replace'), site_dir)
+        if site_path:
+            links.add(site_path)
+    return sorted(links)
+
+def audit_species_file(file_path) -> dict:
+    """Checks a single species file for legacy links and empty or unfinished content."""
+    with MappedMarkdown(file_path) as page:
+        empty = page.body_is_empty()
+        return {
+            'name': file_path.name,
+            'book': page.metadata.get('book', 'Unknown Book'),
+            'legacy_links': page.body_search(LEGACY_LINK_BYTES_PATTERN) is not None,
+            'site_links': _site_links(page, file_path),
+            'empty': empty,
+            'unfinished': not empty and not page.body_endswith(b'.'),
+        }
+
+def audit_genus_file(file_path) -> dict:
+    """Checks a single genus file for empty, unfinished or badly formatted content."""
+    with MappedMarkdown(file_path) as page:
+        # No metadata is reported, but a file with a broken header is still an error.
+        page.validate_header()
+        empty = page.body_is_empty()
+        return {
+            'name': file_path.name,
+            'empty': empty,
+            'unfinished': not empty and not page.body_endswith(b'.'),
+            'bad_format': page.body_contains(b'<') or page.body_contains(b'>'),
+            'site_links': _site_links(page, file_path),
+        }
 
-    # Audit Species Files
-    for file_path in SPECIES_DIR.glob('**/*.md*'):
+def audit_directory(directory, audit_file, shard=None) -> list:
+    """Runs a per-file audit over every markdown file in a directory (or one shard of them)."""
+    results = []
+    for file_path in filter_shard(directory.glob('**/*.md*'), shard, key=relative_key(directory)):
         if not file_path.is_file(): continue
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            
-            if legacy_link_pattern.search(post.content):
-                legacy_links_found.append(file_path.name)
-
-            clean_content = post.content.strip()
-            book = post.metadata.get('book', 'Unknown Book')
-            book_data[book]['total'] += 1
-
-            if not clean_content:
-                empty_species_files.append(file_path.name)
-                book_data[book]['empty'] += 1
-            elif not clean_content.endswith('.'):
-                unfinished_species_files.append(file_path.name)
-                book_data[book]['unfinished'] += 1
-                
+            results.append(audit_file(file_path))
         except Exception as e:
             print(f"  [ERROR] Could not process {file_path.name}: {e}")
+    return results
 
-    # Audit Genera Files
-    for file_path in GENERA_DIR.glob('**/*.md*'):
-        if not file_path.is_file(): continue
-        try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-            
-            clean_content = post.content.strip()
-            
-            if not clean_content:
-                empty_genera_files.append(file_path.name)
-            elif not clean_content.endswith('.'):
-                unfinished_genera_files.append(file_path.name)
-            
-            if '<' in post.content or '>' in post.content:
-                bad_format_genera_files.append(file_path.name)
+def write_audit_report(reconciliation: dict, species_results: list, genera_results: list, genera_total=None):
+    """Builds the content quality report from the reconciliation and per-file results."""
+    creatable_species_files = reconciliation['creatable_species_files']
+    uncreatable_files = reconciliation['uncreatable_files']
+    missing_urls = reconciliation['missing_urls']
+    missing_genera = reconciliation['missing_genera']
 
-        except Exception as e:
-            print(f"  [ERROR] Could not process {file_path.name}: {e}")
+    legacy_links_found = [r['name'] for r in species_results if r['legacy_links']]
+    # Checked here rather than per file, so a cached result notices a deleted target.
+    site_paths = get_site_paths()
+    broken_links_found = [
+        r['name'] for r in species_results + genera_results
+        if any(link not in site_paths for link in r.get('site_links', []))
+    ]
+    empty_species_files = [r['name'] for r in species_results if r['empty']]
+    unfinished_species_files = [r['name'] for r in species_results if r['unfinished']]
+    book_data = collections.defaultdict(lambda: collections.defaultdict(int))
+    for r in species_results:
+        book_data[r['book']]['total'] += 1
+        if r['empty']:
+            book_data[r['book']]['empty'] += 1
+        elif r['unfinished']:
+            book_data[r['book']]['unfinished'] += 1
+
+    empty_genera_files = [r['name'] for r in genera_results if r['empty']]
+    unfinished_genera_files = [r['name'] for r in genera_results if r['unfinished']]
+    bad_format_genera_files = [r['name'] for r in genera_results if r['bad_format']]
 
-    # --- Part 3: Prepare and Generate Report ---
     summary = {
         "Action Required: Files with Legacy `.php` Links": len(legacy_links_found),
+        "Action Required: Files with Broken Page Links": len(broken_links_found),
         "Action Required: Files Missing Context": len(uncreatable_files),
         "Action Required: Missing Genera Files": len(missing_genera),
         "Files Ready to Scrape (Species)": len(creatable_species_files),
@@ -142,7 +172,7 @@ def run_audit():
         "Empty": len(empty_genera_files),
         "Unfinished": len(unfinished_genera_files),
         "Badly Formatted": len(bad_format_genera_files),
-        "Total": len(list(GENERA_DIR.glob('**/*.md*')))
+        "Total": genera_total if genera_total is not None else len(list(GENERA_DIR.glob('**/*.md*')))
     }
     genera_table_html = f"""
         <h4>Genera Content Quality</h4>
@@ -177,6 +207,7 @@ def run_audit():
     # --- Section 3: Collapsible Sections (Conditional) ---
     conditional_sections = [
         (f"Action Required: Files with Legacy `.php` Links", legacy_links_found, "The following files contain markdown links to `.php` files."),
+        (f"Action Required: Files with Broken Page Links", broken_links_found, "These files link to site pages (e.g. ./slug or ../genera/slug) that no content file provides."),
         (f"Action Required: Files Missing Context", uncreatable_files, "These files could not find a parent genus or neighbor and need manual investigation."),
         (f"Action Required: Missing Genera Files", missing_genera, "These genera are referenced by species but do not have a corresponding file."),
         (f"Genera Files with NO Content", empty_genera_files, ""),
@@ -208,5 +239,62 @@ def run_audit():
     }
     update_index_page(audit_results=audit_results_for_index)
 
+def _write_audit_shard(shard, reconciliation, species_results, genera_results):
+    """Writes this shard's share of the missing URLs and per-file results."""
+    summary = {
+        key: filter_shard(reconciliation[key], shard)
+        for key in ['missing_urls', 'creatable_species_files', 'uncreatable_files']
+    }
+    # Missing genera come from the full indexes, so every shard reports the same list.
+    summary['missing_genera'] = reconciliation['missing_genera']
+    summary['genera_total'] = len(list(GENERA_DIR.glob('**/*.md*')))
+    records = [dict(result, kind='species') for result in species_results]
+    records += [dict(result, kind='genus') for result in genera_results]
+    write_shard_results('audit', shard, summary, records)
+
+def merge_audit_shards(shard_results):
+    """Combines the partial results of every audit shard into the content quality report."""
+    reconciliation = {'missing_urls': [], 'creatable_species_files': [], 'uncreatable_files': []}
+    missing_genera = set()
+    genera_total = 0
+    species_results, genera_results = [], []
+    for result in shard_results:
+        for key in reconciliation:
+            reconciliation[key].extend(result.summary[key])
+        missing_genera.update(result.summary['missing_genera'])
+        genera_total = result.summary['genera_total']
+        for record in result.records():
+            kind = record.pop('kind')
+            (species_results if kind == 'species' else genera_results).append(record)
+
+    reconciliation = {key: sorted(urls) for key, urls in reconciliation.items()}
+    reconciliation['missing_genera'] = sorted(missing_genera)
+    write_audit_report(reconciliation, species_results, genera_results, genera_total=genera_total)
+
+def run_audit(shard=None):
+    """
+    Runs a comprehensive audit on the content, checking for missing files,
+    quality issues, and legacy links, then generates a single HTML report.
+    Also triggers the citation audit. With a shard, only that slice of the
+    content is audited and partial results are written for `merge`.
+    """
+    print("🚀 Starting comprehensive content audit...")
+    if shard:
+        print(f"   -> Running shard {shard}.")
+
+    # --- Part 1: File Reconciliation ---
+    reconciliation = reconcile_files()
+
+    # --- Part 2: Audit Existing File Quality ---
+    print("🔎 Auditing quality of existing content...")
+    species_results = audit_directory(SPECIES_DIR, audit_species_file, shard)
+    genera_results = audit_directory(GENERA_DIR, audit_genus_file, shard)
+
+    # --- Part 3: Prepare and Generate Report ---
+    if shard:
+        _write_audit_shard(shard, reconciliation, species_results, genera_results)
+    else:
+        write_audit_report(reconciliation, species_results, genera_results)
+
     print("\n" + "="*50)
-    run_citation_audit()
\ No newline at end of file
+    run_citation_audit(shard=shard)
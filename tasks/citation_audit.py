@@ -4,29 +4,150 @@ import collections
 import frontmatter
 import re
 import json
+import sqlite3
+import tempfile
+from pathlib import Path
 from config import SPECIES_DIR, CITATION_HEALTH_REPORT_FILENAME
 from .reporting import generate_html_report, update_index_page
-from .utils import load_reference_lookup
+from core.reference_index import build_reference_index
+from core.citation_cache import CitationAuditCache, hash_citations
+from core.sharding import ShardWriter, filter_shard, relative_key
 # Import the shared functions from our new single source of truth
 from .format_citations import parse_citation, format_citation, _normalize_publication_for_matching
 
-def run_citation_audit(generate_report=True):
-    print("🚀 Starting citation health audit...")
-    
-    # For Summary Metrics
-    files_with_formatted = set()
-    files_with_unformatted = set()
-    files_with_no_citations = set()
-    files_with_broken_citations = set()
-
-    # For Detailed Report
-    parsed_citations, invalid_citations = [], []
-    
-    total_files = 0
-    for file_path in SPECIES_DIR.glob('**/*.md*'):
+# Rows kept in memory per publication before they are spilled to disk.
+SAMPLE_ROWS_PER_PUBLICATION = 50
+
+def _reference_query(parsed):
+    """Builds the text used to look up a parsed citation in the reference index."""
+    if parsed.get('publication', 'N/A') == 'N/A':
+        return ""
+    year = parsed.get('year', 'N/A')
+    return f"{parsed['publication']} {year}" if year != 'N/A' else parsed['publication']
+
+class _ReferenceMatcher:
+    """Finds the best matching reference for a parsed citation, memoized per query."""
+    def __init__(self, reference_index):
+        self.reference_index = reference_index
+        self._matches = {}
+
+    def match(self, parsed):
+        query = _reference_query(parsed)
+        if query not in self._matches:
+            results = self.reference_index.search(query) if query else []
+            self._matches[query] = results[0] if results else (None, 0.0)
+        return self._matches[query]
+
+class _CitationAggregator:
+    """
+    Aggregates citation report rows as they stream in. Only counters and the
+    first rows of each publication stay in memory; once a publication has more
+    rows than that, all of its rows go to a temporary on-disk store.
+    """
+    def __init__(self, sample_size=SAMPLE_ROWS_PER_PUBLICATION):
+        self.sample_size = sample_size
+        self.counts = collections.Counter()
+        self.display_names = {}
+        self.samples = collections.defaultdict(list)
+        self.spilled = set()
+        self.invalid_count = 0
+        self._seq = 0
+        self._tempdir = tempfile.TemporaryDirectory(prefix="citation_audit_")
+        self._db = sqlite3.connect(Path(self._tempdir.name) / "rows.sqlite")
+        self._db.execute("CREATE TABLE rows (pub_key TEXT, seq INTEGER, html TEXT)")
+        self._db.execute("CREATE TABLE invalid (seq INTEGER, html TEXT)")
+
+    def add_row(self, publication: str, row_html: str):
+        key = _normalize_publication_for_matching(publication)
+        if key not in self.display_names:
+            # Use the first-seen capitalization for display
+            self.display_names[key] = publication if key != "uncategorized" else "Uncategorized"
+        self.counts[key] += 1
+        self._seq += 1
+
+        if key in self.spilled:
+            self._db.execute("INSERT INTO rows VALUES (?, ?, ?)", (key, self._seq, row_html))
+            return
+        self.samples[key].append((self._seq, row_html))
+        if len(self.samples[key]) > self.sample_size:
+            self._db.executemany("INSERT INTO rows VALUES (?, ?, ?)", [(key, seq, html) for seq, html in self.samples.pop(key)])
+            self.spilled.add(key)
+
+    def add_invalid(self, row_html: str):
+        self.invalid_count += 1
+        self._seq += 1
+        self._db.execute("INSERT INTO invalid VALUES (?, ?)", (self._seq, row_html))
+
+    def publications(self):
+        """Returns (key, display name, count) for every publication, most cited first."""
+        return [(key, self.display_names[key], count) for key, count in
+                sorted(self.counts.items(), key=lambda item: item[1], reverse=True)]
+
+    def iter_rows(self, key):
+        """Yields the row HTML for a publication in the order the rows were added."""
+        if key not in self.spilled:
+            for _, row_html in self.samples.get(key, []):
+                yield row_html
+            return
+        self._db.execute("CREATE INDEX IF NOT EXISTS rows_by_pub ON rows (pub_key, seq)")
+        for (row_html,) in self._db.execute("SELECT html FROM rows WHERE pub_key = ? ORDER BY seq", (key,)):
+            yield row_html
+
+    def iter_invalid(self):
+        for (row_html,) in self._db.execute("SELECT html FROM invalid ORDER BY seq"):
+            yield row_html
+
+    def close(self):
+        self._db.close()
+        self._tempdir.cleanup()
+
+def _audit_citations(citations, book_name, legacy_url) -> dict:
+    """
+    Classifies a file's citations as 'formatted', 'unformatted', 'broken' or
+    'empty', and returns its parsed (unformatted) and invalid citations.
+    """
+    result = {'status': 'empty', 'parsed': [], 'invalid': []}
+    if not citations:
+        return result
+
+    has_broken = False
+    is_fully_formatted = True
+
+    for citation in citations:
+        if '*' not in citation:
+            is_fully_formatted = False
+            parsed_list = parse_citation(citation, book_name, legacy_url)
+            if parsed_list:
+                for parsed in parsed_list:
+                    if parsed["pattern"] == "[INVALID CITATION]":
+                        result['invalid'].append(parsed)
+                        has_broken = True
+                    else:
+                        result['parsed'].append(parsed)
+        else:
+            parsed_list = parse_citation(citation, book_name, legacy_url)
+            if parsed_list and parsed_list[0]["pattern"] == "[INVALID CITATION]":
+                result['invalid'].append(parsed_list[0])
+                has_broken = True
+
+    if has_broken:
+        result['status'] = 'broken'
+    elif is_fully_formatted:
+        result['status'] = 'formatted'
+    else:
+        result['status'] = 'unformatted'
+    return result
+
+def _scan_species_citations(cache: CitationAuditCache, shard=None):
+    """
+    Yields (file_path, result) for every species file (or every file in a shard).
+    Only the frontmatter is read for files whose citations are unchanged; their
+    results come from the cache.
+    """
+    seen_paths = set()
+    for file_path in filter_shard(SPECIES_DIR.glob('**/*.md*'), shard, key=relative_key(SPECIES_DIR)):
         if not file_path.is_file():
             continue
-        total_files += 1
         try:
             with open(file_path, 'r', encoding='utf-8-sig') as f:
                 post = frontmatter.load(f)
@@ -35,87 +156,72 @@ def run_citation_audit(generate_report=True):
             legacy_url = post.metadata.get('legacy_url', '')
             citations = post.metadata.get('citations', [])
 
-            if not citations:
-                files_with_no_citations.add(file_path.name)
-                continue
-
-            has_broken = False
-            is_fully_formatted = True
-            
-            for citation in citations:
-                if '*' not in citation:
-                    is_fully_formatted = False
-                    parsed_list = parse_citation(citation, book_name, legacy_url)
-                    if parsed_list:
-                        for parsed in parsed_list:
-                            if parsed["pattern"] == "[INVALID CITATION]":
-                                invalid_citations.append(parsed)
-                                has_broken = True
-                            else:
-                                parsed["formatted_output"] = format_citation(parsed)
-                                parsed_citations.append(parsed)
-                else:
-                    parsed_list = parse_citation(citation, book_name, legacy_url)
-                    if parsed_list and parsed_list[0]["pattern"] == "[INVALID CITATION]":
-                        invalid_citations.append(parsed_list[0])
-                        has_broken = True
-
-            if has_broken:
-                files_with_broken_citations.add(file_path.name)
-            elif is_fully_formatted:
-                files_with_formatted.add(file_path.name)
-            else:
-                files_with_unformatted.add(file_path.name)
-
+            relative_path = file_path.relative_to(SPECIES_DIR).as_posix()
+            seen_paths.add(relative_path)
+            citations_hash = hash_citations(citations, book_name, legacy_url)
+            result = cache.get(relative_path, citations_hash)
+            if result is None:
+                result = _audit_citations(citations, book_name, legacy_url)
+                cache.put(relative_path, file_path.name, citations_hash, result)
         except Exception as e:
             print(f"  [ERROR] Could not process {file_path.name}: {e}")
+            result = None
+        yield file_path, result
+    # A shard only sees part of the files, so it must not prune the others.
+    if shard is None:
+        cache.prune(seen_paths)
+    print(f"Citation cache: {cache.hits} file(s) unchanged, {cache.misses} re-parsed.")
 
-    # --- Group valid citations by publication (case-insensitively and punctuation-insensitively) ---
-    citations_by_publication_normalized = collections.defaultdict(list)
-    for citation in parsed_citations:
-        publication_key = _normalize_publication_for_matching(citation['publication'])
-        citations_by_publication_normalized[publication_key].append(citation)
-
-    # Use the first-seen capitalization for display
-    citations_by_publication = {}
-    for norm_pub, citation_list in citations_by_publication_normalized.items():
-        if norm_pub != "uncategorized":
-            display_key = citation_list[0]['publication']
-            citations_by_publication[display_key] = citation_list
-        else:
-            citations_by_publication["Uncategorized"] = citation_list
+def find_files_with_empty_citations() -> list:
+    """
+    Refreshes the citation audit cache and returns the species files (relative
+    to SPECIES_DIR) that have no citations.
+    """
+    cache = CitationAuditCache()
+    try:
+        for _ in _scan_species_citations(cache):
+            pass
+        return cache.files_with_status('empty')
+    finally:
+        cache.close()
+
+def _write_citation_report(aggregator, files_by_status, total_files, parsed_count, matched_count, generate_report=True):
+    """Builds the summary, and the citation health report, from the aggregated rows."""
+    # --- Publications, grouped case- and punctuation-insensitively, most cited first ---
+    sorted_publications = aggregator.publications()
 
-    sorted_publications = sorted(citations_by_publication.items(), key=lambda item: len(item[1]), reverse=True)
-    
-    unique_publication_names = [pub[0] for pub in sorted_publications if pub[0] != "Uncategorized"]
+    unique_publication_names = [name for _, name, _ in sorted_publications if name != "Uncategorized"]
     publications_json = json.dumps(unique_publication_names, indent=2)
 
+    files_with_no_citations = files_by_status['empty']
+    files_with_broken_citations = files_by_status['broken']
+
     summary = {
         "Total Files Scanned": total_files,
-        "Number of Files with Formatted Citations": len(files_with_formatted),
-        "Number of Files with Unformatted Citations": len(files_with_unformatted),
+        "Number of Files with Formatted Citations": len(files_by_status['formatted']),
+        "Number of Files with Unformatted Citations": len(files_by_status['unformatted']),
         "Number of Files with No Citations": len(files_with_no_citations),
         "Number of Files with Broken Citations": len(files_with_broken_citations),
+        "Unformatted Citations Matched to a Reference": f"{matched_count} of {parsed_count}",
     }
-    
-    report_html = ""
-    for publication, citations in sorted_publications:
+
+    if not generate_report:
+        aggregator.close()
+        return {"summary": summary}
+
+    report_parts = []
+    for key, publication, count in sorted_publications:
         table_id = f"table-{re.sub(r'[^a-zA-Z0-9]', '-', publication)}"
-        report_html += f"<details><summary>{publication} ({len(citations)} citations)</summary><div>"
-        report_html += f"<button onclick=\"copyTableToClipboard('{table_id}')\">Copy as Markdown</button>"
-        report_html += f"<table class='sortable' id='{table_id}'><thead><tr><th>Original</th><th>Formatted</th><th>Pattern</th><th>Source</th></tr></thead><tbody>"
-        for item in citations:
-            report_html += (
-                f"<tr><td><code>{item['original']}</code></td><td>{item['formatted_output']}</td>"
-                f"<td><code>{item['pattern']}</code></td><td><a href='{item['canonical_url']}' target='_blank'>Link</a></td></tr>"
-            )
-        report_html += "</tbody></table></div></details>"
-    
-    invalid_html = "<ul>"
-    for c in invalid_citations:
-        invalid_html += f"<li><code>{c['original']}</code> (<a href='{c['canonical_url']}' target='_blank'>Source</a>)</li>"
-    invalid_html += "</ul>"
-    
+        report_parts.append(f"<details><summary>{publication} ({count} citations)</summary><div>")
+        report_parts.append(f"<button onclick=\"copyTableToClipboard('{table_id}')\">Copy as Markdown</button>")
+        report_parts.append(f"<table class='sortable' id='{table_id}'><thead><tr><th>Original</th><th>Formatted</th><th>Pattern</th><th>Matched Reference</th><th>Score</th><th>Source</th></tr></thead><tbody>")
+        report_parts.extend(aggregator.iter_rows(key))
+        report_parts.append("</tbody></table></div></details>")
+    report_html = "".join(report_parts)
+
+    invalid_html = "<ul>" + "".join(aggregator.iter_invalid()) + "</ul>"
+    aggregator.close()
+
     json_export_html = f"""
     <p>Click the button to copy the list of unique publication names as a JSON array.</p>
     <button onclick="copyJsonToClipboard()">Copy JSON</button>
@@ -135,6 +241,88 @@ def run_citation_audit(generate_report=True):
         sections=report_sections,
         output_filename=CITATION_HEALTH_REPORT_FILENAME
     )
-    
+
     update_index_page()
-    return {"summary": summary}
\ No newline at end of file
+    return {"summary": summary}
+
+def merge_citation_audit_shards(shard_results):
+    """Combines the partial results of every citation audit shard into the citation health report."""
+    aggregator = _CitationAggregator()
+    files_by_status = collections.defaultdict(set)
+    total_files, parsed_count, matched_count = 0, 0, 0
+    for result in shard_results:
+        total_files += result.summary['total_files']
+        parsed_count += result.summary['parsed_count']
+        matched_count += result.summary['matched_count']
+        for status, names in result.summary['files'].items():
+            files_by_status[status].update(names)
+        for record in result.records():
+            if record['kind'] == 'row':
+                aggregator.add_row(record['publication'], record['html'])
+            else:
+                aggregator.add_invalid(record['html'])
+    return _write_citation_report(aggregator, files_by_status, total_files, parsed_count, matched_count)
+
+def run_citation_audit(generate_report=True, shard=None):
+    print("🚀 Starting citation health audit...")
+    if shard:
+        print(f"   -> Running shard {shard}.")
+
+    # For Summary Metrics: file names by status ('formatted', 'unformatted', 'empty', 'broken')
+    files_by_status = collections.defaultdict(set)
+
+    # For Detailed Report. A shard streams its rows to its partial results instead.
+    reference_matcher = _ReferenceMatcher(build_reference_index())
+    if shard:
+        shard_writer = ShardWriter('citation-audit', shard)
+        add_row = lambda publication, row_html: shard_writer.add({'kind': 'row', 'publication': publication, 'html': row_html})
+        add_invalid_row = lambda row_html: shard_writer.add({'kind': 'invalid', 'html': row_html})
+    else:
+        aggregator = _CitationAggregator()
+        add_row, add_invalid_row = aggregator.add_row, aggregator.add_invalid
+    parsed_count, matched_count = 0, 0
+
+    def add_parsed(parsed):
+        nonlocal parsed_count, matched_count
+        matched_reference, match_score = reference_matcher.match(parsed)
+        parsed_count += 1
+        if matched_reference:
+            matched_count += 1
+        row_html = (
+            f"<tr><td><code>{parsed['original']}</code></td><td>{format_citation(parsed)}</td>"
+            f"<td><code>{parsed['pattern']}</code></td><td>{matched_reference or '—'}</td><td>{match_score:.2f}</td>"
+            f"<td><a href='{parsed['canonical_url']}' target='_blank'>Link</a></td></tr>"
+        )
+        add_row(parsed['publication'], row_html)
+
+    def add_invalid(parsed):
+        add_invalid_row(f"<li><code>{parsed['original']}</code> (<a href='{parsed['canonical_url']}' target='_blank'>Source</a>)</li>")
+
+    total_files = 0
+    cache = CitationAuditCache()
+    try:
+        for file_path, result in _scan_species_citations(cache, shard):
+            total_files += 1
+            if result is None:
+                continue
+
+            for parsed in result['parsed']:
+                add_parsed(parsed)
+            for parsed in result['invalid']:
+                add_invalid(parsed)
+
+            files_by_status[result['status']].add(file_path.name)
+    finally:
+        cache.close()
+
+    if shard:
+        shard_writer.summary = {
+            'total_files': total_files,
+            'parsed_count': parsed_count,
+            'matched_count': matched_count,
+            'files': {status: sorted(names) for status, names in files_by_status.items()},
+        }
+        shard_writer.close()
+        return {"summary": shard_writer.summary}
+
+    return _write_citation_report(aggregator, files_by_status, total_files, parsed_count, matched_count, generate_report)
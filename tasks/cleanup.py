@@ -2,16 +2,20 @@
 
 import frontmatter
 import re
+from functools import partial
 from pathlib import Path
 from bs4 import BeautifulSoup
 
 from config import (
-    SPECIES_DIR, PHP_ROOT_DIR, LEGACY_URL_BASE, GROUP_MAPPING,
-    FIELDS_TO_DELETE, BOOK_NUMBER_MAP  # <-- Add BOOK_NUMBER_MAP
+    SPECIES_DIR, GROUP_MAPPING, FIELDS_TO_DELETE, BOOK_NUMBER_MAP
 )
+from core.corpus import read_legacy_html
 from core.file_system import save_markdown_file
 from core.scraper import scrape_images_and_labels
 from core.processing import clean_citation_frontmatter
+from core.task_runner import run_file_tasks
+from core.sharding import filter_shard, relative_key, write_shard_results
+from core.checkpoint import RunCheckpoint, config_fingerprint
 
 def _update_image_fields(post, genus_name):
     """
@@ -23,13 +27,11 @@ def _update_image_fields(post, genus_name):
     if not legacy_url or book_name == 'thirteen':
         return post, False
 
-    relative_path = legacy_url.replace(LEGACY_URL_BASE, "")
-    php_path = PHP_ROOT_DIR / relative_path
-    if not php_path.exists():
+    html_content = read_legacy_html(legacy_url)
+    if html_content is None:
         return post, False
 
-    with open(php_path, 'r', encoding='utf-8', errors='ignore') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+    soup = BeautifulSoup(html_content, 'html.parser')
 
     # This is the corrected, direct function call
     book_number = BOOK_NUMBER_MAP.get(book_name)
@@ -116,62 +118,92 @@ def _clean_citations(markdown_path):
             
     return None, False
 
-def run_cleanup(images=False, groups=False, fields=False, citations=False):
+def _cleanup_file(markdown_path, images=False, groups=False, fields=False, citations=False):
     """
-    The main task runner for all cleanup operations.
+    Runs the selected cleanup operations on a single file.
+    Returns 'updated', 'unchanged' or 'error'.
+    """
+    if not markdown_path.is_file():
+        return 'unchanged'
+
+    try:
+        was_modified = False
+
+        # Citation cleaning must run first as it operates on raw text
+        if citations:
+            repaired_post, modified = _clean_citations(markdown_path)
+            if modified:
+                # If citations were fixed, we save immediately and are done with this file
+                return 'updated' if save_markdown_file(repaired_post, markdown_path) else 'error'
+
+        # For all other tasks, we load the file once
+        with open(markdown_path, 'r', encoding='utf-8-sig') as f:
+            post = frontmatter.load(f)
+
+        if images:
+            genus_name = post.metadata.get('genus', 'Unknown')
+            post, modified = _update_image_fields(post, genus_name)
+            if modified: was_modified = True
+
+        if groups:
+            post, modified = _assign_group(post)
+            if modified: was_modified = True
+
+        if fields:
+            post, modified = _remove_fields(post)
+            if modified: was_modified = True
+
+        if was_modified:
+            return 'updated' if save_markdown_file(post, markdown_path) else 'error'
+        print("  - No changes needed.")
+        return 'unchanged'
+
+    except Exception as e:
+        print(f"  [ERROR] Could not process {markdown_path.name}: {e}")
+    return 'error'
+
+def merge_cleanup_shards(shard_results):
+    updated_files = [name for result in shard_results for name in result.summary['updated']]
+    print(f"✨ Cleanup finished across {len(shard_results)} shard(s). Updated {len(updated_files)} file(s).")
+
+def run_cleanup(images=False, groups=False, fields=False, citations=False, jobs=1, shard=None, resume=False):
+    """
+    The main task runner for all cleanup operations. Progress is checkpointed,
+    so an interrupted run can continue where it stopped with resume=True.
     """
     if not any([images, groups, fields, citations]):
         print("No cleanup tasks selected. Use --help to see available tasks.")
         return
 
     print("🚀 Starting cleanup process...")
-    updated_files_count = 0
-    
-    all_files = sorted(list(SPECIES_DIR.glob('**/*.md*')))
-    total_files = len(all_files)
-
-    for i, markdown_path in enumerate(all_files):
-        if not markdown_path.is_file():
-            continue
-
-        print(f"[{i+1}/{total_files}] Processing: {markdown_path.name}")
-        
-        try:
-            was_modified = False
-            
-            # Citation cleaning must run first as it operates on raw text
-            if citations:
-                repaired_post, modified = _clean_citations(markdown_path)
-                if modified:
-                    # If citations were fixed, we save immediately and are done with this file
-                    save_markdown_file(repaired_post, markdown_path)
-                    updated_files_count += 1
-                    continue
-
-            # For all other tasks, we load the file once
-            with open(markdown_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-
-            if images:
-                genus_name = post.metadata.get('genus', 'Unknown')
-                post, modified = _update_image_fields(post, genus_name)
-                if modified: was_modified = True
-
-            if groups:
-                post, modified = _assign_group(post)
-                if modified: was_modified = True
-
-            if fields:
-                post, modified = _remove_fields(post)
-                if modified: was_modified = True
-
-            if was_modified:
-                save_markdown_file(post, markdown_path)
-                updated_files_count += 1
-            else:
-                print("  - No changes needed.")
-
-        except Exception as e:
-            print(f"  [ERROR] Could not process {markdown_path.name}: {e}")
-
-    print(f"\n✨ Cleanup finished. Updated {updated_files_count} file(s).")
\ No newline at end of file
+    all_files = filter_shard(sorted(SPECIES_DIR.glob('**/*.md*')), shard, key=relative_key(SPECIES_DIR))
+    if shard:
+        print(f"   -> Running shard {shard}: {len(all_files)} file(s).")
+
+    fingerprint = config_fingerprint(images=images, groups=groups, fields=fields, citations=citations)
+    checkpoint = RunCheckpoint('cleanup', fingerprint, resume=resume, shard=shard)
+    file_key = relative_key(SPECIES_DIR)
+    files_to_process = [path for path in all_files if not checkpoint.is_done(file_key(path))]
+
+    # Image updates parse HTML and are CPU-bound; the other tasks only touch frontmatter.
+    worker = partial(_cleanup_file, images=images, groups=groups, fields=fields, citations=citations)
+    mode = 'process' if images else 'thread'
+    try:
+        for result in run_file_tasks(worker, files_to_process, jobs=jobs, mode=mode, label="Processing"):
+            outcome = 'error' if result.error else result.value
+            checkpoint.record(file_key(result.item), outcome)
+    except KeyboardInterrupt:
+        checkpoint.save()
+        print(f"\n⏸️ Cleanup interrupted after {len(checkpoint.outcomes)} file(s). Run again with --resume to continue.")
+        return
+    checkpoint.complete()
+
+    updated_files = [Path(key).name for key in checkpoint.keys_with_outcome('updated')]
+    if checkpoint.resumed_count:
+        print(f"\n  -> {checkpoint.resumed_count} file(s) were processed before resuming.")
+    error_count = checkpoint.counts()['error']
+    print(f"\n✨ Cleanup finished. Updated {len(updated_files)} file(s).")
+    if error_count:
+        print(f"  -> {error_count} file(s) could not be processed. Fix them and run again.")
+    if shard:
+        write_shard_results('cleanup', shard, {'updated': updated_files})
@@ -1,78 +1,183 @@
 # tasks/format_citations.py
 
+import collections
 import frontmatter
+import json
+from functools import partial
 from config import SPECIES_DIR
 from core.file_system import save_markdown_file
+from core.task_runner import run_file_tasks
+from core.sharding import filter_shard, relative_key, write_shard_results
 # Import the logic from its new, centralized location
 from core.citation_parser import parse_citation, format_citation, _normalize_publication_for_matching
 
-def run_format_citations(publication_title, canonical_name=None):
+def _load_publication_mapping(mapping_file):
     """
-    Finds and formats all citations for a given publication.
+    Loads a JSON mapping of publication -> canonical name. A plain list of
+    publication names (e.g. the citation health report's JSON export) is also
+    accepted, in which case the names are formatted but kept as they are.
     """
-    target_pub = publication_title
-    new_pub_name = canonical_name if canonical_name else target_pub
-    
-    print(f"🚀 Starting citation formatting for publication: '{target_pub}'")
-    if canonical_name:
-        print(f"   -> Normalizing to: '{new_pub_name}'")
-    
-    updated_files_count = 0
-    
-    all_files = list(SPECIES_DIR.glob('**/*.md*'))
-    total_files = len(all_files)
-
-    for i, file_path in enumerate(all_files):
-        if not file_path.is_file():
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {publication: None for publication in data}
+    if isinstance(data, dict):
+        return data
+    raise ValueError("Mapping file must contain a JSON object or a list of publication names.")
+
+def _build_targets(mapping: dict) -> dict:
+    """Keys the mapping by normalized publication, for a dict lookup per citation."""
+    targets = {}
+    for publication, canonical in mapping.items():
+        key = _normalize_publication_for_matching(publication)
+        if key != "uncategorized":
+            targets[key] = (canonical or publication, bool(canonical))
+    return targets
+
+def _format_citation_list(citations, book_name, legacy_url, targets, publication_counts):
+    """
+    Formats every unformatted citation whose publications are all in `targets`,
+    renaming them to their canonical name. Returns the new list and whether it changed.
+    """
+    new_citations_list = []
+    file_was_modified = False
+    for citation in citations:
+        if '*' in citation:
+            new_citations_list.append(citation)
             continue
-            
-        print(f"[{i+1}/{total_files}] Scanning: {file_path.name}")
-        
+
+        parsed_list = parse_citation(citation, book_name, legacy_url)
+        keys = [_normalize_publication_for_matching(p.get("publication", "N/A")) for p in parsed_list or []]
+        if not parsed_list or not all(key in targets for key in keys):
+            new_citations_list.append(citation)
+            continue
+
+        formatted_parts = []
+        labels = []
+        for parsed, key in zip(parsed_list, keys):
+            label, rename = targets[key]
+            if rename:
+                parsed["publication"] = label
+            formatted_parts.append(format_citation(parsed))
+            labels.append(label)
+        new_citations_list.extend(formatted_parts)
+        if formatted_parts != [citation]:
+            # Only citations that actually change count towards the summary.
+            publication_counts.update(labels)
+            file_was_modified = True
+
+    return new_citations_list, file_was_modified
+
+def _format_file(file_path, targets, dry_run=False):
+    """
+    Formats the matching citations in a single species file.
+    Returns (whether the file was updated, per-publication counts).
+    """
+    publication_counts = collections.Counter()
+    if not file_path.is_file():
+        return False, publication_counts
+
+    try:
+        with open(file_path, 'r', encoding='utf-8-sig') as f:
+            post = frontmatter.load(f)
+
+        book_name = post.metadata.get('book', 'Unknown')
+        legacy_url = post.metadata.get('legacy_url', '')
+        original_citations = post.metadata.get('citations', [])
+
+        if not original_citations:
+            return False, publication_counts
+
+        new_citations_list, file_was_modified = _format_citation_list(
+            original_citations, book_name, legacy_url, targets, publication_counts
+        )
+
+        if file_was_modified:
+            if dry_run:
+                print(f"  -> Found match. Would update file:")
+                for citation in original_citations:
+                    if citation not in new_citations_list:
+                        print(f"     - {citation}")
+                for citation in new_citations_list:
+                    if citation not in original_citations:
+                        print(f"     + {citation}")
+                return True, publication_counts
+
+            print(f"  -> Found match. Updating file.")
+            post.metadata['citations'] = new_citations_list
+            return save_markdown_file(post, file_path), publication_counts
+
+    except Exception as e:
+        print(f"  [ERROR] Could not process {file_path.name}: {e}")
+    return False, publication_counts
+
+def _print_publication_counts(publication_counts):
+    if publication_counts:
+        print("\nCitations formatted per publication:")
+        for label, count in publication_counts.most_common():
+            print(f"  - {label}: {count}")
+
+def merge_format_citations_shards(shard_results):
+    publication_counts = collections.Counter()
+    updated_files = []
+    for result in shard_results:
+        publication_counts.update(result.summary['publication_counts'])
+        updated_files.extend(result.summary['updated'])
+    _print_publication_counts(publication_counts)
+    dry_run = any(result.summary.get('dry_run') for result in shard_results)
+    verb = "would be updated" if dry_run else "updated"
+    print(f"\n✨ Citation formatting finished across {len(shard_results)} shard(s). {len(updated_files)} file(s) {verb}.")
+
+def run_format_citations(publication_title=None, canonical_name=None, mapping_file=None, dry_run=False, jobs=1, shard=None):
+    """
+    Finds and formats all citations for a given publication, or for every
+    publication in a mapping file, in a single pass over the species files.
+    """
+    if mapping_file:
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
-
-            book_name = post.metadata.get('book', 'Unknown')
-            legacy_url = post.metadata.get('legacy_url', '')
-            original_citations = post.metadata.get('citations', [])
-            
-            if not original_citations:
-                continue
-
-            new_citations_list = []
-            file_was_modified = False
-            for citation in original_citations:
-                if '*' in citation:
-                    new_citations_list.append(citation)
-                    continue
-
-                parsed_list = parse_citation(citation, book_name, legacy_url)
-                if parsed_list:
-                    temp_formatted_parts = []
-                    for parsed in parsed_list:
-                        if _normalize_publication_for_matching(parsed["publication"]) == _normalize_publication_for_matching(target_pub):
-                            if canonical_name:
-                                parsed["publication"] = new_pub_name
-                                
-                            formatted = format_citation(parsed)
-                            temp_formatted_parts.append(formatted)
-                            if formatted != citation:
-                                file_was_modified = True
-                        else:
-                            temp_formatted_parts = [citation]
-                            file_was_modified = False
-                            break
-                    new_citations_list.extend(temp_formatted_parts)
-                else:
-                    new_citations_list.append(citation)
-            
-            if file_was_modified:
-                print(f"  -> Found match. Updating file.")
-                post.metadata['citations'] = new_citations
-                if save_markdown_file(post, file_path):
-                    updated_files_count += 1
-                    
-        except Exception as e:
-            print(f"  [ERROR] Could not process {file_path.name}: {e}")
-            
-    print(f"\n✨ Citation formatting finished. Updated {updated_files_count} file(s).")
\ No newline at end of file
+            mapping = _load_publication_mapping(mapping_file)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load mapping file '{mapping_file}': {e}")
+            return
+        print(f"🚀 Starting citation formatting for {len(mapping)} publication(s) from '{mapping_file}'")
+    elif publication_title:
+        mapping = {publication_title: canonical_name}
+        print(f"🚀 Starting citation formatting for publication: '{publication_title}'")
+        if canonical_name:
+            print(f"   -> Normalizing to: '{canonical_name}'")
+    else:
+        print("No publication given. Pass a publication title or --mapping FILE.")
+        return
+
+    if dry_run:
+        print("   -> Dry run: no files will be changed.")
+
+    targets = _build_targets(mapping)
+    publication_counts = collections.Counter()
+    updated_files = []
+
+    all_files = filter_shard(SPECIES_DIR.glob('**/*.md*'), shard, key=relative_key(SPECIES_DIR))
+    if shard:
+        print(f"   -> Running shard {shard}: {len(all_files)} file(s).")
+    worker = partial(_format_file, targets=targets, dry_run=dry_run)
+
+    for result in run_file_tasks(worker, all_files, jobs=jobs, mode='thread', label="Scanning"):
+        if result.value is None:
+            continue
+        was_updated, file_counts = result.value
+        publication_counts.update(file_counts)
+        if was_updated:
+            updated_files.append(result.item.name)
+
+    _print_publication_counts(publication_counts)
+
+    if dry_run:
+        print(f"\n✨ Dry run finished. {len(updated_files)} file(s) would be updated.")
+    else:
+        print(f"\n✨ Citation formatting finished. Updated {len(updated_files)} file(s).")
+    if shard:
+        write_shard_results('format-citation', shard, {
+            'publication_counts': dict(publication_counts),
+            'updated': updated_files,
+            'dry_run': dry_run,
+        })
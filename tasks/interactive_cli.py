@@ -1,12 +1,14 @@
 import argparse
 from urllib.request import urlopen
-from bs4 import BeautifulSoup
 import config
+from core.config_manager import config_manager
 from reclassification_manager import add_reclassified_url
 from core.parser import parse_html_with_rules
 from core.processing import correct_text_spacing
-from core.selector_finder import suggest_selectors
-from tasks.utils import get_book_from_url
+from core.file_system import get_master_php_urls
+from core.prefetch import PagePrefetcher
+from core.selector_finder import rank_suggestions, suggest_selectors
+from tasks.utils import get_book_from_url, stratified_sample
 from models import Species
 from core.scraper import scrape_images_and_labels
 
@@ -15,8 +17,9 @@ def _get_user_choice(data_type, suggestions, soup):
     print(f"\n--- Finding Rule for: {data_type.upper()} ---")
     
     print("Step 1: Choose a selector and index.")
-    for i, (rule, text) in enumerate(suggestions, 1):
-        print(f"[{i}] Selector: '{rule['selector']}' (Match #{rule['index'] + 1}) -> Extracts: \"{text}\"")
+    for i, (rule, text, score) in enumerate(suggestions, 1):
+        print(f"[{i}] Selector: '{rule['selector']}' (Match #{rule['index'] + 1}) -> Extracts: \"{text}\" "
+              f"(valid on {score:.0%} of sampled pages)")
     print("\n[c] Enter a custom selector")
 
     if data_type == 'citation':
@@ -113,23 +116,58 @@ def _get_user_choice(data_type, suggestions, soup):
                 print(f"The word '{target_word}' was not found in the extracted text.")
 
 
-def run_interactive_session(entry_data, existing_rules=None, failed_fields=None):
-    """The main interactive loop for defining and verifying scraper rules."""
+def sample_page_urls(book_name, page_url, all_urls=None) -> list:
+    """A stratified sample of the book's other pages, to score selector suggestions against."""
+    all_urls = all_urls if all_urls is not None else get_master_php_urls()
+    urls = [url for url in all_urls if url != page_url and get_book_from_url(url) == book_name]
+    return stratified_sample(urls, config.SELECTOR_SAMPLE_SIZE, seed=book_name)
+
+def rank_page_suggestions(prefetcher, page_url, sample_urls) -> dict:
+    """Suggests selectors for a page, ranked by how well they work on the sample pages."""
+    page = prefetcher.document(page_url)
+    documents = [page] + [doc for doc in map(prefetcher.document, sample_urls) if doc is not None]
+    return rank_suggestions(suggest_selectors(page.soup, page), documents)
+
+def prefetch_session(prefetcher, entry_data, all_urls=None):
+    """
+    Starts loading a session's page and sample pages, and ranking its selector
+    suggestions, in the background, so the session can start without waiting.
+    """
+    page_url = entry_data['url']
+    sample_urls = sample_page_urls(get_book_from_url(page_url), page_url, all_urls)
+    for url in [page_url] + sample_urls:
+        prefetcher.prefetch(url)
+    prefetcher.speculate(('suggestions', page_url), rank_page_suggestions, prefetcher, page_url, sample_urls)
+
+def run_interactive_session(entry_data, existing_rules=None, failed_fields=None, prefetcher=None):
+    """
+    The main interactive loop for defining and verifying scraper rules. Pass
+    the prefetcher that prefetch_session() was called with to reuse its work.
+    """
+    if prefetcher is None:
+        with PagePrefetcher() as prefetcher:
+            prefetch_session(prefetcher, entry_data)
+            return run_interactive_session(entry_data, existing_rules, failed_fields, prefetcher)
+
     sample_url = entry_data['url']
     book_name = get_book_from_url(sample_url)
     context_genus = entry_data['neighbor_data'].get('genus') if entry_data['context_type'] == 'species' else entry_data['neighbor_data'].get('name')
 
     print(f"\n--- Launching Interactive Session for book: '{book_name}' ---")
-    
+
     try:
-        relative_path = sample_url.replace(config.LEGACY_URL_BASE, "")
-        php_path = config.PHP_ROOT_DIR / relative_path
-        html = php_path.read_text(encoding='utf-8', errors='ignore')
-        soup = BeautifulSoup(html, 'html.parser')
+        page = prefetcher.document(sample_url)
+        if page is None:
+            raise FileNotFoundError(f"No PHP source found for '{sample_url}'")
+        soup = page.soup
     except Exception as e:
         print(f"Error loading source for '{sample_url}': {e}"); return 'error'
 
-    suggestions = suggest_selectors(soup)
+    speculation = prefetcher.speculation(('suggestions', sample_url))
+    if speculation is None:
+        suggestions = rank_page_suggestions(prefetcher, sample_url, sample_page_urls(book_name, sample_url))
+    else:
+        suggestions = speculation.result()
     
     while True:
         current_rules = existing_rules.copy() if existing_rules else {}
@@ -0,0 +1,112 @@
+# tasks/markdown_check.py
+
+import time
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+
+from core.config_manager import config_manager
+from core.corpus import read_legacy_html
+from core.file_system import get_master_php_urls
+from core.html_to_markdown import html_to_markdown
+from core.parser import select_content_nodes
+from tasks.utils import get_book_from_url
+
+MAX_REPORTED_MISMATCHES = 10
+
+def _select_citation_container(soup, rules):
+    rule = rules.get('citation_selector') or {}
+    if rule.get('method') != 'build_citation_string' or not rule.get('selector'):
+        return None
+    try:
+        return soup.select(rule['selector'])[rule.get('index', 0)]
+    except IndexError:
+        return None
+
+def _markdownify_reference(nodes, strip) -> str:
+    """The original conversion: serialize, re-parse (dropping a citation's first <b>), markdownify."""
+    if isinstance(nodes, list):
+        return markdownify("".join(str(node) for node in nodes))
+    container = BeautifulSoup(str(nodes), 'html.parser')
+    first_b = container.find('b')
+    if first_b:
+        first_b.decompose()
+    return markdownify(str(container), strip=list(strip))
+
+def _fast_convert(nodes, strip) -> str:
+    if isinstance(nodes, list):
+        return html_to_markdown(nodes)
+    first_b = nodes.find('b')
+    return html_to_markdown(nodes, strip=strip, skip=[first_b] if first_b else [])
+
+def _first_difference(expected: str, actual: str) -> str:
+    position = next(
+        (i for i, (a, b) in enumerate(zip(expected, actual)) if a != b),
+        min(len(expected), len(actual))
+    )
+    start = max(0, position - 30)
+    return f"markdownify: {expected[start:position + 40]!r}\n       fast: {actual[start:position + 40]!r}"
+
+def run_markdown_check(limit=None, repeat=3):
+    """
+    Converts the body content and citation of every legacy species page with
+    both markdownify and the fast converter, reports any page where their
+    output differs and how long each took.
+    """
+    print("🚀 Checking the fast HTML-to-markdown converter against markdownify...")
+    urls = sorted(get_master_php_urls())
+    if limit:
+        urls = urls[:limit]
+
+    samples = []
+    for url in urls:
+        html = read_legacy_html(url)
+        if html is None:
+            continue
+        book_name = get_book_from_url(url)
+        rules = dict(config_manager.get_rules_for_book(book_name), book_name=book_name)
+        soup = BeautifulSoup(html, 'html.parser')
+
+        content_nodes = select_content_nodes(soup, rules)
+        if content_nodes:
+            samples.append((url, 'content', content_nodes, ()))
+        citation_container = _select_citation_container(soup, rules)
+        if citation_container is not None:
+            samples.append((url, 'citation', citation_container, ('a', 'p')))
+
+    if not samples:
+        print("  -> No page content found to convert.")
+        return
+    print(f"  -> Converting {len(samples)} fragment(s) from {len(urls)} page(s), {repeat} time(s) each.")
+
+    mismatches = []
+    for url, kind, nodes, strip in samples:
+        expected = _markdownify_reference(nodes, strip)
+        actual = _fast_convert(nodes, strip)
+        if expected != actual:
+            mismatches.append((url, kind, expected, actual))
+
+    timings = {}
+    for name, convert in (('markdownify', _markdownify_reference), ('fast', _fast_convert)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for url, kind, nodes, strip in samples:
+                convert(nodes, strip)
+        timings[name] = time.perf_counter() - started
+
+    print("\n--- Parity ---")
+    print(f"  -> {len(samples) - len(mismatches)} of {len(samples)} fragment(s) match markdownify exactly.")
+    for url, kind, expected, actual in mismatches[:MAX_REPORTED_MISMATCHES]:
+        print(f"  [MISMATCH] {kind} of {url}\n       {_first_difference(expected, actual)}")
+    if len(mismatches) > MAX_REPORTED_MISMATCHES:
+        print(f"  ... and {len(mismatches) - MAX_REPORTED_MISMATCHES} more.")
+
+    print("\n--- Benchmark ---")
+    for name, seconds in timings.items():
+        rate = len(samples) * repeat / seconds if seconds else 0.0
+        print(f"  - {name:<11} {seconds:.3f}s ({rate:.0f} fragments/s)")
+    if timings['fast']:
+        print(f"  -> Speedup: {timings['markdownify'] / timings['fast']:.1f}x")
+
+    status = "✨ Parity check passed." if not mismatches else f"❌ Parity check found {len(mismatches)} mismatch(es)."
+    print(f"\n{status}")
@@ -0,0 +1,56 @@
+# tasks/merge.py
+
+from core.sharding import get_shard_dir, load_shard_results
+from tasks.audit import merge_audit_shards
+from tasks.build_citations import merge_build_citations_shards
+from tasks.build_publication_index import merge_publication_index_shards
+from tasks.citation_audit import merge_citation_audit_shards
+from tasks.cleanup import merge_cleanup_shards
+from tasks.format_citations import merge_format_citations_shards
+from tasks.scrape_genera import merge_scrape_genera_shards
+from tasks.scrape_new import merge_scrape_shards
+
+# Command name -> function combining that command's shard results.
+# Audit runs the citation audit too, so it is merged right before it.
+SHARD_MERGERS = {
+    'scrape': merge_scrape_shards,
+    'scrape-genera': merge_scrape_genera_shards,
+    'cleanup': merge_cleanup_shards,
+    'build-citations': merge_build_citations_shards,
+    'format-citation': merge_format_citations_shards,
+    'audit': merge_audit_shards,
+    'citation-audit': merge_citation_audit_shards,
+    'build-publication-index': merge_publication_index_shards,
+}
+
+def run_merge(commands=None, shard_dir=None):
+    """
+    Combines the partial results written by `--shard i/N` runs into the same
+    reports and summaries a single, unsharded run produces. Collect every
+    node's shard files into one directory first (see --shard-dir).
+    """
+    commands = commands or list(SHARD_MERGERS)
+    unknown = [command for command in commands if command not in SHARD_MERGERS]
+    if unknown:
+        print(f"❌ Cannot merge {', '.join(unknown)}. Sharded commands: {', '.join(SHARD_MERGERS)}.")
+        return
+    print(f"🚀 Merging shard results from '{get_shard_dir('', shard_dir)}'...")
+
+    merged_count = 0
+    for command in commands:
+        try:
+            shard_results = load_shard_results(command, shard_dir)
+        except ValueError as e:
+            print(f"  [ERROR] Cannot merge '{command}': {e}")
+            continue
+        if not shard_results:
+            continue
+
+        print(f"\n--- Merging {len(shard_results)} shard(s) of '{command}' ---")
+        SHARD_MERGERS[command](shard_results)
+        merged_count += 1
+
+    if not merged_count:
+        print("No shard results found to merge.")
+        return
+    print(f"\n✨ Merge finished for {merged_count} command(s).")
@@ -0,0 +1,21 @@
+# tasks/prepare_corpus.py
+
+from config import PHP_ROOT_DIR
+from core.corpus import build_corpus_archive, get_archive_path
+
+def run_prepare_corpus(rebuild=False):
+    """
+    Builds a single, indexed archive of the legacy PHP corpus with every page
+    pre-decoded and stripped of <font> tags, so scraping tasks read one file
+    instead of opening tens of thousands of small ones.
+    """
+    print(f"🚀 Preparing corpus archive from '{PHP_ROOT_DIR}'...")
+    if not PHP_ROOT_DIR.is_dir():
+        print(f"  -> ❌ ERROR: PHP source directory not found at '{PHP_ROOT_DIR}'.")
+        return
+
+    counts = build_corpus_archive(rebuild=rebuild)
+
+    print(f"  -> Added: {counts['added']}, Updated: {counts['updated']}, "
+          f"Unchanged: {counts['unchanged']}, Removed: {counts['removed']}")
+    print(f"\n✨ Corpus archive ready: {get_archive_path().resolve()}")
@@ -0,0 +1,86 @@
+# tasks/rewrite_links.py
+
+import difflib
+import frontmatter
+from functools import partial
+
+from config import SPECIES_DIR, GENERA_DIR
+from core.file_system import save_markdown_file
+from core.link_rewriter import LINK_BYTES_PATTERN, get_link_index, reset_url_map, rewrite_legacy_links, site_dir_for
+from core.mapped_markdown import MappedMarkdown
+from core.task_runner import run_file_tasks
+
+def _count_legacy_links(file_path, link_index) -> int:
+    """Counts the body links that point to legacy pages, on the mapped file."""
+    with MappedMarkdown(file_path) as page:
+        return sum(
+            1 for match in page.body_finditer(LINK_BYTES_PATTERN)
+            if link_index.lookup(match.group(2).decode('utf-8', 'replace')) is not None
+        )
+
+def _rewrite_file(file_path, link_index, dry_run=False) -> int:
+    """
+    Rewrites the legacy links in a single content file. Returns the number of
+    links rewritten (or that would be, in a dry run).
+    """
+    link_count = _count_legacy_links(file_path, link_index)
+    if not link_count:
+        return 0
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        post = frontmatter.load(f)
+    # Links are made relative to the file's own directory, e.g. ../species/slug on a genus page.
+    new_content = rewrite_legacy_links(post.content, verbose=False, site_dir=site_dir_for(file_path))
+    if new_content == post.content:
+        return 0
+
+    if dry_run:
+        print(f"  -> {file_path.name}: would rewrite {link_count} link(s).")
+        diff = difflib.unified_diff(
+            post.content.splitlines(), new_content.splitlines(),
+            fromfile=f"a/{file_path.name}", tofile=f"b/{file_path.name}", lineterm='', n=0
+        )
+        for line in diff:
+            print(f"     {line}")
+        return link_count
+
+    print(f"  -> {file_path.name}: rewriting {link_count} link(s).")
+    post.content = new_content
+    return link_count if save_markdown_file(post, file_path) else 0
+
+def run_rewrite_links(dry_run=False, jobs=1):
+    """
+    Rewrites the legacy .php links in every existing species and genus body to
+    their new site paths, as new scrapes do, so they need not be re-scraped.
+    """
+    print("🚀 Starting legacy link rewrite...")
+    if dry_run:
+        print("   -> Dry run: no files will be changed.")
+
+    # Build the map from the content as it is now.
+    reset_url_map()
+    link_index = get_link_index()
+    if not link_index:
+        print("  -> ❌ No legacy URLs found in the content. Nothing to rewrite.")
+        return
+    print(f"  -> Matching links against {len(link_index)} legacy URL(s).")
+
+    files = [
+        file_path
+        for directory in (SPECIES_DIR, GENERA_DIR)
+        for file_path in sorted(directory.glob('**/*.md*'))
+        if file_path.is_file()
+    ]
+    worker = partial(_rewrite_file, link_index=link_index, dry_run=dry_run)
+
+    updated_files = 0
+    rewritten_links = 0
+    for result in run_file_tasks(worker, files, jobs=jobs, mode='thread'):
+        if result.value:
+            updated_files += 1
+            rewritten_links += result.value
+
+    if dry_run:
+        print(f"\n✨ Dry run finished. {rewritten_links} link(s) in {updated_files} of {len(files)} file(s) would be rewritten.")
+    else:
+        print(f"\n✨ Link rewrite finished. Rewrote {rewritten_links} link(s) in {updated_files} of {len(files)} file(s).")
@@ -0,0 +1,99 @@
+# tasks/rules_test.py
+
+import collections
+import time
+
+import yaml
+
+import config
+from core.config_manager import config_manager
+from core.corpus import read_legacy_html
+from core.file_system import get_master_php_urls, index_entries_by_url
+from core.scraper import SpeciesScraper
+from core.task_runner import run_file_tasks
+from models import Species
+from reclassification_manager import load_reclassified_urls
+from tasks.utils import get_book_from_url, stratified_sample
+
+VALIDATED_FIELDS = ('name', 'genus', 'author', 'content')
+
+def _load_candidate_rules(rules_file: str, book_name: str) -> dict:
+    """Reads rules to test from a YAML file holding either one book's rules or a book -> rules mapping."""
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    return data.get(book_name, data)
+
+def _field_value(species: Species, field: str) -> str:
+    value = species.body_content if field == 'content' else getattr(species, field)
+    text = " ".join(str(value or '').split())
+    return text if len(text) <= 60 else text[:57] + "..."
+
+def _score_page(item):
+    """Scrapes one page with the rules under test and returns (failed fields, species) or None."""
+    url, book_name, genus_name, rules = item
+    html_content = read_legacy_html(url)
+    if html_content is None:
+        return None
+    scraper = SpeciesScraper(html_content, book_name, genus_name, preprocessed=True, rules=rules)
+    species = Species.from_scraped_data({'url': url}, scraper.scrape_all(), book_name)
+    return species.validate(), {field: _field_value(species, field) for field in VALIDATED_FIELDS}
+
+def run_rules_test(book_name, sample=None, seed=None, rules_file=None, jobs=1, examples=3):
+    """
+    Runs a book's scraping rules over every page of the book (or a stratified
+    sample of them) and reports how often each field fails Species.validate,
+    with example failures. Use rules_file to test changed rules before saving them.
+    """
+    started = time.perf_counter()
+    if rules_file:
+        rules = _load_candidate_rules(rules_file, book_name)
+        print(f"🚀 Testing rules from '{rules_file}' on book '{book_name}'...")
+    else:
+        rules = config_manager.get_rules_for_book(book_name)
+        print(f"🚀 Testing the saved rules of book '{book_name}'...")
+    rules = dict(rules, book_name=book_name)
+
+    reclassified_urls = load_reclassified_urls()
+    urls = sorted(
+        url for url in get_master_php_urls()
+        if url not in reclassified_urls and get_book_from_url(url) == book_name
+    )
+    if not urls:
+        print(f"  -> ❌ No species pages found for book '{book_name}'.")
+        return
+    if sample and sample < len(urls):
+        urls = stratified_sample(urls, sample, seed)
+        print(f"  -> Sampled {len(urls)} page(s) across the book's genera.")
+
+    # Existing entries give the genus fallback the live scraper would get from its neighbors.
+    existing_species = index_entries_by_url(config.SPECIES_DIR)
+    items = [(url, book_name, existing_species.get(url, {}).get('genus'), rules) for url in urls]
+
+    failures = collections.defaultdict(list)
+    scored = missing = errors = valid = 0
+    for result in run_file_tasks(_score_page, items, jobs=jobs, mode='process'):
+        if result.error:
+            errors += 1
+            continue
+        if result.value is None:
+            missing += 1
+            continue
+        scored += 1
+        failed_fields, values = result.value
+        if not failed_fields:
+            valid += 1
+        for field in failed_fields:
+            failures[field].append((result.item[0], values[field]))
+
+    print(f"\n--- Rules Test: '{book_name}' ---")
+    print(f"Pages scored: {scored}" + (f" ({missing} missing, {errors} failed to scrape)" if missing or errors else ""))
+    if not scored:
+        return
+    print(f"✅ Fully valid: {valid} ({valid / scored:.1%})")
+    for field in VALIDATED_FIELDS:
+        field_failures = failures.get(field, [])
+        print(f"  - {field:<8} {len(field_failures):>5} failure(s) ({len(field_failures) / scored:.1%})")
+        for url, value in field_failures[:examples]:
+            print(f"      {url} -> {value!r}")
+
+    print(f"\n✨ Rules test finished in {time.perf_counter() - started:.1f}s.")
@@ -2,61 +2,71 @@
 
 import frontmatter
 from bs4 import BeautifulSoup
-from config import GENERA_DIR, PHP_ROOT_DIR, LEGACY_URL_BASE
+from config import GENERA_DIR
+from core.corpus import read_legacy_html
 from core.file_system import save_markdown_file
-from markdownify import markdownify
+from core.html_to_markdown import html_to_markdown
+from core.task_runner import run_file_tasks
+from core.sharding import filter_shard, relative_key, write_shard_results
 
-def run_scrape_genera():
+def _scrape_genus_file(file_path):
     """
-    Scans all genera files and scrapes their body content if it's missing.
+    Scrapes the body content for a single genus file if it's missing.
+    Returns True if the file was updated.
     """
-    print("🚀 Starting genera scraping process...")
-    updated_files_count = 0
-
-    for file_path in GENERA_DIR.glob('**/*.md*'):
-        if not file_path.is_file():
-            continue
+    if not file_path.is_file():
+        return False
 
-        try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                post = frontmatter.load(f)
+    try:
+        with open(file_path, 'r', encoding='utf-8-sig') as f:
+            post = frontmatter.load(f)
 
-            if post.content.strip():
-                continue
+        if post.content.strip():
+            return False
 
-            legacy_url = post.metadata.get('legacy_url')
-            if not legacy_url:
-                continue
+        legacy_url = post.metadata.get('legacy_url')
+        if not legacy_url:
+            return False
 
-            relative_path = legacy_url.replace(LEGACY_URL_BASE, "")
-            php_path = PHP_ROOT_DIR / relative_path
+        html_content = read_legacy_html(legacy_url)
+        if html_content is None:
+            return False
 
-            if not php_path.exists():
-                continue
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        type_species_tag = soup.find(string=lambda text: "type species:" in text.lower())
 
-            with open(php_path, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
-
-            soup = BeautifulSoup(html_content, 'html.parser')
+        if type_species_tag:
+            content_start_node = type_species_tag.find_parent('p') or type_species_tag
             
-            type_species_tag = soup.find(string=lambda text: "type species:" in text.lower())
+            body_nodes = content_start_node.find_next_siblings()
+            post.content = html_to_markdown(body_nodes).strip()
+
+            if post.content:
+                save_markdown_file(post, file_path)
+                print(f"  -> Scraped and saved: {file_path.name}")
+                return True
 
-            if type_species_tag:
-                content_start_node = type_species_tag.find_parent('p') or type_species_tag
-                
-                body_html = ""
-                for sibling in content_start_node.find_next_siblings():
-                    body_html += str(sibling)
-                
-                post.content = markdownify(body_html).strip()
+    except Exception as e:
+        print(f"  -> ERROR processing {file_path.name}: {e}")
+    return False
 
-                if post.content:
-                    save_markdown_file(post, file_path)
-                    updated_files_count += 1
-                    print(f"  -> Scraped and saved: {file_path.name}")
+def merge_scrape_genera_shards(shard_results):
+    updated_files = [name for result in shard_results for name in result.summary['updated']]
+    print(f"✨ Genera scraping finished across {len(shard_results)} shard(s). Updated {len(updated_files)} file(s).")
 
+def run_scrape_genera(jobs=1, shard=None):
+    """
+    Scans all genera files and scrapes their body content if it's missing.
+    """
+    print("🚀 Starting genera scraping process...")
 
-        except Exception as e:
-            print(f"  -> ERROR processing {file_path.name}: {e}")
+    all_files = filter_shard(GENERA_DIR.glob('**/*.md*'), shard, key=relative_key(GENERA_DIR))
+    if shard:
+        print(f"   -> Running shard {shard}: {len(all_files)} file(s).")
+    results = run_file_tasks(_scrape_genus_file, all_files, jobs=jobs, mode='process')
+    updated_files = [result.item.name for result in results if result.value]
 
-    print(f"\n✨ Genera scraping finished. Updated {updated_files_count} file(s).")
\ No newline at end of file
+    print(f"\n✨ Genera scraping finished. Updated {len(updated_files)} file(s).")
+    if shard:
+        write_shard_results('scrape-genera', shard, {'updated': updated_files})
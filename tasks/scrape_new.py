@@ -1,3 +1,5 @@
+import collections
+import copy
 import re
 import importlib
 import random
@@ -11,16 +13,163 @@ from models import Species
 import config
 from core.config_manager import config_manager
 from core.file_system import (
-    get_master_php_urls, index_entries_by_url, index_entries_by_slug
+    get_master_php_urls, index_entries_by_url, index_entries_by_slug, index_slugs_to_urls
 )
+from core.corpus import read_legacy_html
+from core.pipeline import Pipeline, Stage
+from core.prefetch import PagePrefetcher
 from core.scraper import SpeciesScraper
-from tasks.utils import get_contextual_data, get_book_from_url
-from tasks.interactive_cli import run_interactive_session
+from tasks.utils import ContextResolver, get_book_from_url
+from tasks.interactive_cli import prefetch_session, run_interactive_session
 from reclassification_manager import load_reclassified_urls
+from core.sharding import filter_shard, write_shard_results
+from core.checkpoint import RunCheckpoint, config_fingerprint
 
-def run_scrape_new(generate_files=False, interactive=False, force=False):
+def has_specific_rules(book_name) -> bool:
+    """Returns True if the book has its own scraping rules rather than the defaults."""
+    rules_for_book = config_manager.get_rules_for_book(book_name)
+    return bool(rules_for_book) and rules_for_book != config_manager.get_rules_for_book('default')
+
+def get_context_genus(entry) -> str:
+    return entry['neighbor_data'].get('genus') if entry['context_type'] == 'species' else entry['neighbor_data'].get('name')
+
+def scrape_entry(entry, book_name):
+    """Scrapes a missing entry into a Species, or returns None if its page is missing."""
+    scraper = SpeciesScraper.from_legacy_url(entry['url'], book_name, get_context_genus(entry))
+    if scraper is None:
+        return None
+    return Species.from_scraped_data(entry, scraper.scrape_all(), book_name)
+
+def _rules_without_book_name(rules) -> dict:
+    return {key: value for key, value in rules.items() if key != 'book_name'}
+
+def _speculative_scrape(prefetcher, entry, book_name):
+    """Scrapes a prefetched page with a snapshot of the book's current rules. Returns (rules, data)."""
+    rules = copy.deepcopy(config_manager.get_rules_for_book(book_name))
+    page = prefetcher.document(entry['url'])
+    if page is None:
+        return rules, None
+    scraper = SpeciesScraper(None, book_name, get_context_genus(entry), rules=rules, soup=page.soup)
+    return rules, scraper.scrape_all()
+
+def _take_speculative_scrape(prefetcher, entry, book_name):
+    """
+    Returns the background scrape of an entry's page, or scrapes the (already
+    parsed) page again if the book's rules have changed since it ran.
+    """
+    speculation = prefetcher.speculation(('scrape', entry['url']))
+    if speculation is not None:
+        rules, scraped_data = speculation.result()
+        current_rules = config_manager.get_rules_for_book(book_name)
+        if _rules_without_book_name(rules) == _rules_without_book_name(current_rules):
+            return scraped_data
+    return _speculative_scrape(prefetcher, entry, book_name)[1]
+
+# --- Live scrape pipeline stages. Each takes and returns a job dict. ---
+
+def _read_stage(job):
+    job['html'] = read_legacy_html(job['entry']['url'])
+    if job['html'] is None:
+        job['outcome'] = 'page missing'
+    return job
+
+def _parse_stage(job):
+    scraper = SpeciesScraper(job.pop('html'), job['book_name'], get_context_genus(job['entry']), preprocessed=True)
+    job['scraped_data'] = scraper.scrape_all()
+    return job
+
+def _format_stage(job):
+    job['species'] = Species.from_scraped_data(job['entry'], job.pop('scraped_data'), job['book_name'])
+    return job
+
+def _validate_stage(job):
+    if not job['force']:
+        job['failed_fields'] = job['species'].validate()
+        if job['failed_fields']:
+            job['outcome'] = 'invalid'
+    return job
+
+def _write_stage(job, claimed_slugs):
+    species = job['species']
+    if species.slug not in claimed_slugs and species.save(claimed_slugs):
+        job['outcome'] = 'created'
+    elif species.slug in claimed_slugs:
+        # Claimed before the run, earlier in it, or created meanwhile on disk.
+        job['outcome'] = 'slug collision'
+        job['collides_with'] = claimed_slugs[species.slug]
+    else:
+        job['outcome'] = 'not saved'
+    return job
+
+def _build_scrape_pipeline(jobs, stage_workers=None) -> Pipeline:
+    """
+    Builds the read -> parse -> format -> validate pipeline. Jobs that come out
+    of it without an outcome hold a valid Species, ready to be written.
+    """
+    workers = dict(config.SCRAPE_STAGE_WORKERS, **(stage_workers or {}))
+    stages = [
+        Stage('read', _read_stage, workers.get('read', 1)),
+        Stage('parse', _parse_stage, workers.get('parse', 1), processes=workers.get('parse', 1) > 1),
+        Stage('format', _format_stage, workers.get('format', 1)),
+        Stage('validate', _validate_stage, workers.get('validate', 1)),
+    ]
+    return Pipeline(jobs, stages, queue_size=config.PIPELINE_QUEUE_SIZE)
+
+def find_slug_collisions(slugs_by_url: dict, existing_slugs: dict) -> list:
+    """
+    (slug, legacy URLs) for every slug that more than one entry, or an entry
+    and an existing file, would be saved under. The existing file comes first.
+    """
+    urls_by_slug = collections.defaultdict(list)
+    for url, slug in sorted(slugs_by_url.items()):
+        if slug:
+            urls_by_slug[slug].append(url)
+    collisions = []
+    for slug, urls in sorted(urls_by_slug.items()):
+        if slug in existing_slugs:
+            urls = [existing_slugs[slug] or "(existing file)"] + urls
+        if len(urls) > 1:
+            collisions.append((slug, urls))
+    return collisions
+
+def _print_slug_collisions(collisions):
+    if collisions:
+        print(f"\n⚠️ {len(collisions)} slug collision(s) among the entries to create:")
+        for slug, urls in collisions:
+            print(f"  - {slug}: {' <-> '.join(urls)}")
+
+def merge_scrape_shards(shard_results):
+    """Combines the created entries and counts of every scrape shard."""
+    totals = collections.Counter()
+    created_files = []
+    planned_slugs = {}
+    existing_slugs = {}
+    for result in shard_results:
+        created_files.extend(result.summary['created'])
+        planned_slugs.update(result.summary.get('planned_slugs', {}))
+        existing_slugs.update(result.summary.get('existing_slugs', {}))
+        totals.update({key: value for key, value in result.summary.items() if isinstance(value, int)})
+
+    print(f"\n--- Scrape Summary ({len(shard_results)} shards) ---")
+    print(f"Missing entries: {totals['missing']}")
+    print(f"✅ Entries that can be generated: {totals['creatable']}")
+    print(f"⚠️ Entries missing context: {totals['uncreatable']}")
+    if created_files:
+        print(f"✨ Generated {len(created_files)} file(s) from:")
+        for url in sorted(created_files):
+            print(f"  - {url}")
+    if totals['skipped']:
+        print(f"Skipped {totals['skipped']} file(s) due to validation errors.")
+    # Shards only see their own entries, so collisions across shards show up here.
+    _print_slug_collisions(find_slug_collisions(planned_slugs, existing_slugs))
+
+def run_scrape_new(generate_files=False, interactive=False, force=False, shard=None, resume=False, stage_workers=None):
     """
     The main function for the 'scrape_new' task, with a more robust interactive workflow.
+    With a shard, only the missing URLs in that shard are handled and partial
+    results are written for `merge`. A live run can be resumed with resume=True.
+    Entries are scraped through a staged pipeline (see stage_workers) and their
+    slugs checked for collisions before a live run writes any file.
     """
     random.seed(time.time())
     all_php_urls = get_master_php_urls()
@@ -33,17 +182,42 @@ def run_scrape_new(generate_files=False, interactive=False, force=False):
     existing_genera_by_slug = index_entries_by_slug(config.GENERA_DIR)
     
     missing_urls = sorted(list(master_urls - set(existing_species.keys())))
+    if shard:
+        missing_urls = filter_shard(missing_urls, shard)
+        print(f"   -> Running shard {shard}.")
+
+    created_files = []
+    skipped_count = 0
+    # URL -> slug of every entry that would be written, and the existing files those slugs clash with.
+    planned_slugs = {}
+    existing_slugs = {}
+
+    def write_shard():
+        write_shard_results('scrape', shard, {
+            'missing': len(missing_urls),
+            'creatable': len(creatable_entries),
+            'uncreatable': len(uncreatable_entries),
+            'created': created_files,
+            'skipped': skipped_count,
+            'planned_slugs': planned_slugs,
+            'existing_slugs': existing_slugs,
+        })
     
     if not missing_urls:
         print("\n🎉 No missing entries found. Everything seems to be in sync!")
+        if shard:
+            creatable_entries, uncreatable_entries = [], []
+            write_shard()
         return
 
     print(f"\nFound {len(missing_urls)} missing entries. Analyzing for context...")
     
     creatable_entries = []
     uncreatable_entries = [] 
+    resolver = ContextResolver(existing_species, existing_genera_by_url, existing_genera_by_slug)
+    contexts = resolver.resolve_all(missing_urls)
     for url in missing_urls:
-        context_data, context_type = get_contextual_data(url, existing_species, existing_genera_by_url, existing_genera_by_slug)
+        context_data, context_type = contexts[url]
         if context_data:
             creatable_entries.append({'url': url, 'neighbor_data': context_data, 'context_type': context_type})
         else:
@@ -68,93 +242,145 @@ def run_scrape_new(generate_files=False, interactive=False, force=False):
             sampled_book_names = []
             print("\nNo books with missing entries to check in interactive mode.")
 
-        for book_name in sampled_book_names:
-            if book_name in books_to_skip:
-                continue
-
-            entry_to_test = random.choice(entries_by_book[book_name])
-            url_to_test = entry_to_test['url']
-            context_genus = entry_to_test['neighbor_data'].get('genus') if entry_to_test['context_type'] == 'species' else entry_to_test['neighbor_data'].get('name')
-
-            rules_for_book = config_manager.get_rules_for_book(book_name)
-            if not rules_for_book or rules_for_book == config_manager.get_rules_for_book('default'):
-                print(f"\n[!] No specific rules found for book: '{book_name}'.")
-                status = run_interactive_session(entry_to_test, existing_rules=None, failed_fields=None)
-                if status == 'skip_book': books_to_skip.add(book_name)
-                elif status in ['reclassified', 'rules_updated', 'rules_updated_and_file_saved']: importlib.reload(config)
-                continue
-
-            print(f"\nVerifying rules for book: '{book_name}'...")
-            relative_path = url_to_test.replace(config.LEGACY_URL_BASE, "")
-            php_path = config.PHP_ROOT_DIR / relative_path
-            with open(php_path, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
-            
-            scraper = SpeciesScraper(html_content, book_name, context_genus)
-            scraped_data = scraper.scrape_all()
-            failed_fields = is_data_valid(scraped_data)
-
-            if failed_fields:
-                print(f"  -> [!] Low confidence for {Path(url_to_test).name}. Failing fields: {failed_fields}")
-                existing_rules = config.SCRAPING_RULES.get(book_name, {})
-                status = run_interactive_session(
-                    entry_to_test, existing_rules=existing_rules, failed_fields=failed_fields
-                )
-                if status == 'skip_book': books_to_skip.add(book_name)
-                elif status in ['reclassified', 'rules_updated', 'rules_updated_and_file_saved']: importlib.reload(config)
-            else:
-                print("  -> ✅ Rules seem to be working correctly.")
+        # The next book's sample page is loaded, scraped and its selector
+        # suggestions ranked in the background while the user works on this one.
+        books_to_test = [(book_name, random.choice(entries_by_book[book_name])) for book_name in sampled_book_names]
+        prefetcher = PagePrefetcher()
+
+        def prepare(i):
+            if i < len(books_to_test):
+                book_name, entry = books_to_test[i]
+                prefetcher.speculate(('scrape', entry['url']), _speculative_scrape, prefetcher, entry, book_name)
+                prefetch_session(prefetcher, entry, all_php_urls)
+
+        prepare(0)
+        try:
+            for i, (book_name, entry_to_test) in enumerate(books_to_test):
+                prepare(i + 1)
+                if book_name in books_to_skip:
+                    continue
+
+                url_to_test = entry_to_test['url']
+
+                if not has_specific_rules(book_name):
+                    print(f"\n[!] No specific rules found for book: '{book_name}'.")
+                    status = run_interactive_session(entry_to_test, existing_rules=None, failed_fields=None, prefetcher=prefetcher)
+                    if status == 'skip_book': books_to_skip.add(book_name)
+                    elif status in ['reclassified', 'rules_updated', 'rules_updated_and_file_saved']: importlib.reload(config)
+                    continue
+
+                print(f"\nVerifying rules for book: '{book_name}'...")
+                scraped_data = _take_speculative_scrape(prefetcher, entry_to_test, book_name)
+                if scraped_data is None: continue
+                failed_fields = Species.from_scraped_data(entry_to_test, scraped_data, book_name).validate()
+
+                if failed_fields:
+                    print(f"  -> [!] Low confidence for {Path(url_to_test).name}. Failing fields: {failed_fields}")
+                    existing_rules = config.SCRAPING_RULES.get(book_name, {})
+                    status = run_interactive_session(
+                        entry_to_test, existing_rules=existing_rules, failed_fields=failed_fields, prefetcher=prefetcher
+                    )
+                    if status == 'skip_book': books_to_skip.add(book_name)
+                    elif status in ['reclassified', 'rules_updated', 'rules_updated_and_file_saved']: importlib.reload(config)
+                else:
+                    print("  -> ✅ Rules seem to be working correctly.")
+        finally:
+            prefetcher.close()
         
         print("\n--- Interactive session complete. ---")
     
+    checkpoint = None
     if generate_files:
         if force:
             print("\n--- Live Run (FORCE MODE): Generating all creatable files, ignoring validation... ---")
         else:
             print(f"\n--- Live Run: Generating files... ---")
-        
-        created_count = 0
-        skipped_count = 0
-        for entry in creatable_entries:
-            url = entry['url']
-            book_name = get_book_from_url(url)
-            if book_name in books_to_skip: continue
-            
-            rules_for_book = config_manager.get_rules_for_book(book_name)
-            if not rules_for_book or rules_for_book == config_manager.get_rules_for_book('default'):
-                print(f"  -> SKIPPING {Path(url).name}: No specific rules defined for book '{book_name}'.")
-                continue
-
-            relative_path = url.replace(config.LEGACY_URL_BASE, "")
-            php_path = config.PHP_ROOT_DIR / relative_path
-            if not php_path.exists(): continue
-
-            with open(php_path, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
-            
-            context_genus = entry['neighbor_data'].get('genus') if entry['context_type'] == 'species' else entry['neighbor_data'].get('name')
-            scraper = SpeciesScraper(html_content, book_name, context_genus)
-            scraped_data = scraper.scrape_all()
-            
-            species = Species.from_scraped_data(entry, scraped_data, book_name)
-            
-            if force:
-                if species.save():
-                    created_count += 1
-            else:
-                failed_fields = species.validate()
-                if not failed_fields:
-                    if species.save():
-                        created_count += 1
-                else:
-                    skipped_count += 1
+        # Every entry's outcome is checkpointed, so an interrupted run can be resumed.
+        checkpoint = RunCheckpoint('scrape', config_fingerprint(force=force), resume=resume, shard=shard)
+    elif not interactive:
+        print("\n--- Dry Run: Scraping the creatable entries to check their slugs... ---")
+
+    if generate_files or not interactive:
+        def discover():
+            for entry in creatable_entries:
+                url = entry['url']
+                if checkpoint and checkpoint.is_done(url): continue
+                book_name = get_book_from_url(url)
+                if book_name in books_to_skip: continue
+                job = {'entry': entry, 'book_name': book_name, 'force': force}
+                if not has_specific_rules(book_name):
+                    if generate_files:
+                        print(f"  -> SKIPPING {Path(url).name}: No specific rules defined for book '{book_name}'.")
+                    job['outcome'] = 'no rules'
+                yield job
+
+        # Every entry is scraped and validated before anything is written, so
+        # the slugs the files would get can be checked against each other.
+        jobs_to_write = []
+        pipeline = _build_scrape_pipeline(discover(), stage_workers)
+        try:
+            for job in pipeline.run():
+                url = job['entry']['url']
+                if not job.get('outcome'):
+                    jobs_to_write.append(job)
+                    continue
+                if not checkpoint:
+                    continue
+                if job['outcome'] == 'invalid':
                     print(f"\n-> [SKIPPED] {Path(url).name}: Scraped data is invalid.")
-                    print(f"   - Failed Fields: {', '.join(failed_fields)}")
+                    print(f"   - Failed Fields: {', '.join(job['failed_fields'])}")
+                elif job['outcome'] == 'error':
+                    print(f"  [ERROR] Could not process {Path(url).name}: {job['error']}")
+                checkpoint.record(url, job['outcome'])
+        except KeyboardInterrupt:
+            if checkpoint:
+                checkpoint.save()
+                print(f"\n⏸️ Live run interrupted after {len(checkpoint.outcomes)} entries. Run again with --resume to continue.")
+            return
+        pipeline.print_stats()
+
+        # Slugs are checked against this map instead of the disk; during the
+        # live run it also records which URL claimed each slug first.
+        claimed_slugs = index_slugs_to_urls(config.SPECIES_DIR)
+        planned_slugs.update({job['entry']['url']: job['species'].slug for job in jobs_to_write})
+        existing_slugs.update({slug: claimed_slugs[slug] for slug in planned_slugs.values() if slug in claimed_slugs})
+        _print_slug_collisions(find_slug_collisions(planned_slugs, existing_slugs))
 
-        remaining_count = len(missing_urls) - created_count
-        final_message = f"\n✨ Live run complete. Generated {created_count} file(s)."
+    if generate_files:
+        # Written one at a time in input order, so the first entry with a slug claims it.
+        jobs_to_write.sort(key=lambda job: job['entry']['url'])
+        try:
+            for job in jobs_to_write:
+                url = job['entry']['url']
+                try:
+                    _write_stage(job, claimed_slugs)
+                except Exception as e:
+                    job['outcome'], job['error'] = 'error', f"write: {e}"
+                if job['outcome'] == 'slug collision':
+                    print(f"\n-> [COLLISION] {Path(url).name}: Slug '{job['species'].slug}' is already taken "
+                          f"by {job['collides_with'] or 'an existing file'}.")
+                elif job['outcome'] == 'error':
+                    print(f"  [ERROR] Could not process {Path(url).name}: {job['error']}")
+                checkpoint.record(url, job['outcome'])
+        except KeyboardInterrupt:
+            checkpoint.save()
+            print(f"\n⏸️ Live run interrupted after {len(checkpoint.outcomes)} entries. Run again with --resume to continue.")
+            return
+        checkpoint.complete()
+
+        # The summary covers the whole logical run, including entries done before resuming.
+        created_files = checkpoint.keys_with_outcome('created')
+        skipped_count = checkpoint.counts()['invalid']
+        if checkpoint.resumed_count:
+            print(f"\n  -> {checkpoint.resumed_count} entries were processed before resuming.")
+        total_missing = len(set(missing_urls) | set(created_files))
+        remaining_count = total_missing - len(created_files)
+        final_message = f"\n✨ Live run complete. Generated {len(created_files)} file(s)."
         if skipped_count > 0:
             final_message += f" Skipped {skipped_count} file(s) due to validation errors."
+        collision_count = checkpoint.counts()['slug collision']
+        if collision_count > 0:
+            final_message += f" {collision_count} file(s) were not written because their slug was already taken."
         if remaining_count > 0:
             final_message += f" {remaining_count} missing files remain."
         print(final_message)
@@ -162,4 +388,9 @@ def run_scrape_new(generate_files=False, interactive=False, force=False):
     if not generate_files and not interactive:
         print("\n--- Dry Run Summary ---")
         print(f"✅ Found {len(creatable_entries)} entries that can be generated.")
-        print(f"⚠️ Found {len(uncreatable_entries)} entries that are missing context.")
\ No newline at end of file
+        print(f"⚠️ Found {len(uncreatable_entries)} entries that are missing context.")
+        if planned_slugs:
+            print(f"   -> {len(planned_slugs)} of them would be written.")
+
+    if shard:
+        write_shard()
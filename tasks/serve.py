@@ -0,0 +1,79 @@
+# tasks/serve.py
+
+import signal
+import threading
+import time
+
+from config import SPECIES_DIR, GENERA_DIR, CONTENT_DIR
+from core.config_manager import get_config_mtimes, reload_all_config
+from core.daemon import CommandServer, SOCKET_PATH
+from core.file_system import get_frontmatter_index, get_master_php_urls, refresh_php_manifest
+from core.link_rewriter import reset_url_map
+
+def _warm_up():
+    """Imports every task module and builds the indexes that commands share."""
+    import main
+    main.build_parser()
+    get_master_php_urls()
+    for directory in (SPECIES_DIR, GENERA_DIR, CONTENT_DIR):
+        if directory.is_dir():
+            get_frontmatter_index(directory)
+
+def _poll_for_changes(lock, poll_interval, stop_event):
+    """Keeps the in-memory indexes and configs in step with the files on disk."""
+    config_mtimes = get_config_mtimes()
+    while not stop_event.wait(poll_interval):
+        with lock:
+            try:
+                refresh_php_manifest()
+                content_changed = False
+                for directory in (SPECIES_DIR, GENERA_DIR, CONTENT_DIR):
+                    if directory.is_dir() and get_frontmatter_index(directory, refresh=False).refresh():
+                        content_changed = True
+                if content_changed:
+                    reset_url_map()
+
+                current_mtimes = get_config_mtimes()
+                if current_mtimes != config_mtimes:
+                    config_mtimes = current_mtimes
+                    reload_all_config()
+                    print("  -> Reloaded configuration files.")
+            except Exception as e:
+                print(f"  [ERROR] Could not refresh indexes: {e}")
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+def run_serve(poll_interval=2.0):
+    """
+    Runs a long-lived process that keeps the parsed configs, the PHP manifest
+    and the content indexes in memory, and runs the commands that main.py
+    forwards to it over a local Unix socket. Stop it with Ctrl+C.
+    """
+    import main
+
+    print("🚀 Starting mob-scraper daemon...")
+    start = time.perf_counter()
+    _warm_up()
+    print(f"  -> Warmed up in {time.perf_counter() - start:.2f}s.")
+
+    lock = threading.Lock()
+    stop_event = threading.Event()
+    poller = threading.Thread(target=_poll_for_changes, args=(lock, poll_interval, stop_event), daemon=True)
+
+    def run_locked(argv):
+        with lock:
+            return main.run_command(argv)
+
+    server = CommandServer(run_locked)
+    signal.signal(signal.SIGTERM, _stop)
+    poller.start()
+    print(f"  -> Listening on {SOCKET_PATH} (polling for changes every {poll_interval}s).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping daemon...")
+    finally:
+        stop_event.set()
+        server.server_close()
+    print("✨ Daemon stopped.")
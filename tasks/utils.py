@@ -1,47 +1,109 @@
 # tasks/utils.py
 
+import bisect
+import collections
+import random
 import re
 import config
-from bs4 import BeautifulSoup
+from core.references import get_reference_strings
 
-def get_contextual_data(missing_url, existing_species, existing_genera_by_url, existing_genera_by_slug):
+SPECIES_URL_PATTERN = re.compile(r'(.+)_(\d+)_(\d+)\.php$')
+GENUS_URL_PATTERN = re.compile(r'(.+)_(\d+)\.php$')
+
+class ContextResolver:
     """
-    Finds a neighboring or parent entry to provide context for a missing species.
-    This shared function is used by both the audit and scrape_new tasks.
+    Finds a neighboring or parent entry to provide context for missing species.
+    The existing entries are indexed once per run, grouped by (base, major),
+    so that resolving many missing URLs needs no string-built key probes.
+    This shared class is used by both the audit and scrape_new tasks.
     """
-    url_pattern = re.compile(r'(.+)_(\d+)_(\d+)\.php$')
-    match = url_pattern.search(missing_url)
-    if not match:
-        return None, None
-    base, major, minor = match.groups()
+    def __init__(self, existing_species, existing_genera_by_url, existing_genera_by_slug):
+        self.existing_genera_by_url = existing_genera_by_url
+        self.existing_genera_by_slug = existing_genera_by_slug
+
+        # (base, major) -> sorted minors, plus (base, major, minor) -> species data
+        minors_by_group = collections.defaultdict(set)
+        self.species_by_key = {}
+        for url, data in existing_species.items():
+            match = SPECIES_URL_PATTERN.search(url)
+            # Only canonical minors (no leading zeros) can be a neighbor of another URL.
+            if not match or match.group(3) != str(int(match.group(3))):
+                continue
+            base, major, minor = match.group(1), match.group(2), int(match.group(3))
+            minors_by_group[(base, major)].add(minor)
+            self.species_by_key[(base, major, minor)] = data
+        self.minors_by_group = {group: sorted(minors) for group, minors in minors_by_group.items()}
+
+        # (base, major) -> genus data, for both the '_1.php' and the plain '.php' URL formats
+        self.genera_by_unusual_url = {}
+        self.genera_by_standard_url = {}
+        for url, data in existing_genera_by_url.items():
+            match = SPECIES_URL_PATTERN.search(url)
+            if match and match.group(3) == '1':
+                self.genera_by_unusual_url[(match.group(1), match.group(2))] = data
+            match = GENUS_URL_PATTERN.search(url)
+            if match:
+                self.genera_by_standard_url[(match.group(1), match.group(2))] = data
 
-    # --- Logic Flow ---
-    if missing_url in existing_genera_by_url:
-        return existing_genera_by_url.get(missing_url), 'self-referential genus'
+        self.rule_counts = collections.Counter()
 
-    neighbor_minor = int(minor) - 1
-    if neighbor_minor > 0:
-        neighbor_url = f"{base}_{major}_{neighbor_minor}.php"
-        if neighbor_url in existing_species:
-             return existing_species.get(neighbor_url), 'species neighbor'
+    def _species_neighbor(self, base, major, minor):
+        """Returns the species directly preceding the given minor number, if any."""
+        minors = self.minors_by_group.get((base, major))
+        if not minors or minor - 1 <= 0:
+            return None
+        position = bisect.bisect_left(minors, minor) - 1
+        if position >= 0 and minors[position] == minor - 1:
+            return self.species_by_key[(base, major, minor - 1)]
+        return None
 
-    genus_url_format1 = f"{base}_{major}_1.php"
-    if genus_url_format1 in existing_genera_by_url:
-        return existing_genera_by_url.get(genus_url_format1), 'genus by unusual URL'
+    def resolve(self, missing_url):
+        """
+        Returns (context_data, context_type) for a single missing URL, where
+        context_type names the rule that matched. Returns (None, None) if none did.
+        """
+        match = SPECIES_URL_PATTERN.search(missing_url)
+        if not match:
+            return None, None
+        base, major, minor = match.group(1), match.group(2), int(match.group(3))
+        group = (base, major)
 
-    genus_url_format2 = f"{base}_{major}.php"
-    if genus_url_format2 in existing_genera_by_url:
-        return existing_genera_by_url.get(genus_url_format2), 'genus by standard URL'
+        # --- Logic Flow ---
+        if missing_url in self.existing_genera_by_url:
+            return self.existing_genera_by_url[missing_url], 'self-referential genus'
 
-    if '/part-4/' in missing_url:
-        try:
+        neighbor = self._species_neighbor(base, major, minor)
+        if neighbor is not None:
+            return neighbor, 'species neighbor'
+
+        if group in self.genera_by_unusual_url:
+            return self.genera_by_unusual_url[group], 'genus by unusual URL'
+
+        if group in self.genera_by_standard_url:
+            return self.genera_by_standard_url[group], 'genus by standard URL'
+
+        if '/part-4/' in missing_url:
             genus_slug = missing_url.split('/part-4/', 1)[1].split('/')[0]
-            if genus_slug in existing_genera_by_slug:
-                return existing_genera_by_slug.get(genus_slug), 'genus by slug'
-        except IndexError:
-            pass
-    
-    return None, None
+            if genus_slug in self.existing_genera_by_slug:
+                return self.existing_genera_by_slug[genus_slug], 'genus by slug'
+
+        return None, None
+
+    def resolve_all(self, missing_urls):
+        """
+        Resolves context for all missing URLs in one pass and returns a dict of
+        url -> (context_data, context_type). Per-rule counts are kept in rule_counts.
+        """
+        results = {}
+        for url in missing_urls:
+            context, context_type = self.resolve(url)
+            results[url] = (context, context_type)
+            self.rule_counts[context_type or 'no context'] += 1
+
+        print(f"Resolved context for {len(results)} missing URLs:")
+        for rule, count in self.rule_counts.most_common():
+            print(f"  - {rule}: {count}")
+        return results
 
 def get_book_from_url(url: str) -> str:
     """Extracts the book name (e.g., 'seven') from a legacy URL."""
@@ -56,34 +118,30 @@ def get_book_from_url(url: str) -> str:
 
 def load_reference_lookup():
     """
-    Scans all references.php files and returns a set of all reference strings.
+    Returns a set of all reference strings from all references.php files.
     """
     print("Building reference lookup from all references.php files...")
-    lookup = set()
-    reference_files = list(config.PHP_ROOT_DIR.glob('**/references.php'))
-    
-    for ref_path in reference_files:
-        try:
-            with open(ref_path, 'r', encoding='utf-8', errors='ignore') as f:
-                html_content = f.read()
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            container = None
-            for p_tag in soup.find_all('p'):
-                if re.search(r'\(\d{4}\)', p_tag.get_text()):
-                    container = p_tag
-                    break
-            
-            if container:
-                references_html = str(container)
-                individual_references = re.split(r'<br\s*/?>', references_html, flags=re.IGNORECASE)
-                for ref_html in individual_references:
-                    text = BeautifulSoup(ref_html, 'html.parser').get_text(strip=True)
-                    if text:
-                        lookup.add(text)
-        except Exception:
-            continue
-            
+    lookup = get_reference_strings()
     print(f"Reference lookup built with {len(lookup)} entries.")
-    return lookup
\ No newline at end of file
+    return lookup
+
+def stratified_sample(urls, size, seed=None) -> list:
+    """
+    Picks up to `size` URLs spread evenly over their directories (one per
+    genus folder in turn), so a small sample still covers the whole book.
+    """
+    rng = random.Random(seed)
+    by_directory = collections.defaultdict(list)
+    for url in sorted(urls):
+        by_directory[url.rsplit('/', 1)[0]].append(url)
+    groups = [by_directory[directory] for directory in sorted(by_directory)]
+    for group in groups:
+        rng.shuffle(group)
+
+    sample = []
+    while len(sample) < size and groups:
+        for group in groups:
+            if len(sample) < size:
+                sample.append(group.pop())
+        groups = [group for group in groups if group]
+    return sorted(sample)
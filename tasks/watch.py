@@ -0,0 +1,210 @@
+# tasks/watch.py
+
+import json
+import os
+import time
+from pathlib import Path
+
+from config import SPECIES_DIR, GENERA_DIR, CONTENT_DIR, PHP_ROOT_DIR, LEGACY_URL_BASE
+from core.config_manager import config_manager, get_config_mtimes, reload_all_config
+from core.corpus import close_archive, get_archive_path
+from core.file_system import get_frontmatter_index, index_slugs_to_urls, refresh_php_manifest
+from core.link_rewriter import reset_url_map
+from tasks.audit import reconcile_files, audit_species_file, audit_genus_file, write_audit_report
+from tasks.citation_audit import run_citation_audit
+from tasks.scrape_new import find_slug_collisions, has_specific_rules, scrape_entry
+from tasks.utils import get_book_from_url
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class _AuditResults:
+    """Per-file audit results for a directory, re-audited only when a file changes."""
+    def __init__(self, directory, audit_file):
+        self.directory = directory
+        self.audit_file = audit_file
+        self.entries = {}
+
+    def refresh(self) -> list:
+        """Re-audits new and changed files and returns the names of those that changed."""
+        changed = []
+        seen = set()
+        for file_path in self.directory.glob('**/*.md*'):
+            signature = _file_signature(file_path)
+            if signature is None or not file_path.is_file():
+                continue
+            seen.add(file_path)
+            cached = self.entries.get(file_path)
+            if cached and cached[0] == signature:
+                continue
+            try:
+                result = self.audit_file(file_path)
+            except Exception as e:
+                print(f"  [ERROR] Could not process {file_path.name}: {e}")
+                result = None
+            self.entries[file_path] = (signature, result)
+            changed.append(file_path.name)
+
+        for file_path in [path for path in self.entries if path not in seen]:
+            del self.entries[file_path]
+            changed.append(file_path.name)
+        return changed
+
+    def results(self) -> list:
+        return [result for _, result in self.entries.values() if result is not None]
+
+class _DryRunResults:
+    """
+    Dry-run scrape outcomes for the creatable missing entries. An entry is only
+    scraped again when its PHP page, its book's rules or its context changed.
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def _key(self, entry, book_name):
+        relative_path = entry['url'].replace(LEGACY_URL_BASE, "")
+        rules = config_manager.get_rules_for_book(book_name)
+        # read_legacy_html skips archived copies older than the PHP file, so a
+        # changed signature always means the re-scrape sees the edited page.
+        return (
+            _file_signature(PHP_ROOT_DIR / relative_path),
+            _file_signature(get_archive_path()),
+            json.dumps(rules, sort_keys=True, default=str),
+            json.dumps(entry['neighbor_data'], sort_keys=True, default=str),
+            entry['context_type'],
+        )
+
+    def _scrape(self, entry, book_name):
+        """Returns the entry's outcome and the slug its file would get (None if it was not scraped)."""
+        if not has_specific_rules(book_name):
+            return "no rules", None
+        species = scrape_entry(entry, book_name)
+        if species is None:
+            return "page missing", None
+        failed_fields = species.validate()
+        return (f"invalid ({', '.join(failed_fields)})" if failed_fields else "valid"), species.slug
+
+    def refresh(self, entries) -> list:
+        """Brings the outcomes up to date and returns (url, outcome) for those that changed."""
+        changed = []
+        current_urls = set()
+        for entry in entries:
+            url = entry['url']
+            current_urls.add(url)
+            book_name = get_book_from_url(url)
+            key = self._key(entry, book_name)
+            cached = self.entries.get(url)
+            if cached and cached[0] == key:
+                continue
+            try:
+                outcome, slug = self._scrape(entry, book_name)
+            except Exception as e:
+                outcome, slug = f"error ({e})", None
+            if not cached or cached[1] != outcome:
+                changed.append((url, outcome))
+            self.entries[url] = (key, outcome, slug)
+
+        for url in [url for url in self.entries if url not in current_urls]:
+            del self.entries[url]
+        return changed
+
+    def counts(self) -> dict:
+        counts = {}
+        for _, outcome, _ in self.entries.values():
+            label = outcome.split(' (')[0]
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def slug_collisions(self, existing_slugs: dict) -> list:
+        """(slug, legacy URLs) for every slug the scraped entries would collide on."""
+        return find_slug_collisions(
+            {url: slug for url, (_, _, slug) in self.entries.items()}, existing_slugs
+        )
+
+def _creatable_entries(reconciliation) -> list:
+    entries = []
+    for url in reconciliation['creatable_species_files']:
+        context_data, context_type = reconciliation['contexts'][url]
+        entries.append({'url': url, 'neighbor_data': context_data, 'context_type': context_type})
+    return entries
+
+def run_watch(poll_interval=2.0):
+    """
+    Polls MoB-PHP, the content directories and the YAML configs, and keeps the
+    dry-run scrape results and the audit reports up to date. Each cycle only
+    re-audits content files that changed and only re-scrapes missing entries
+    whose page, book rules or context changed. Stop it with Ctrl+C.
+    """
+    print(f"🚀 Watching for changes (polling every {poll_interval}s). Press Ctrl+C to stop.")
+    species_audit = _AuditResults(SPECIES_DIR, audit_species_file)
+    genera_audit = _AuditResults(GENERA_DIR, audit_genus_file)
+    dry_run = _DryRunResults()
+
+    php_dirs = None
+    config_mtimes = get_config_mtimes()
+    archive_signature = _file_signature(get_archive_path())
+    first_pass = True
+
+    try:
+        while True:
+            reasons = []
+
+            current_mtimes = get_config_mtimes()
+            if current_mtimes != config_mtimes:
+                config_mtimes = current_mtimes
+                reload_all_config()
+                reasons.append("configuration")
+
+            current_archive = _file_signature(get_archive_path())
+            if current_archive != archive_signature:
+                archive_signature = current_archive
+                close_archive()
+                reasons.append("corpus archive")
+
+            current_dirs = refresh_php_manifest()
+            if current_dirs != php_dirs:
+                php_dirs = current_dirs
+                reasons.append("PHP sources")
+
+            content_changed = False
+            for directory in (SPECIES_DIR, GENERA_DIR, CONTENT_DIR):
+                if directory.is_dir() and get_frontmatter_index(directory, refresh=False).refresh():
+                    content_changed = True
+            if content_changed:
+                reset_url_map()
+                reasons.append("content")
+
+            changed_species = species_audit.refresh()
+            changed_genera = genera_audit.refresh()
+            if changed_species or changed_genera:
+                reasons.append(f"{len(changed_species) + len(changed_genera)} content file(s)")
+
+            if reasons:
+                if not first_pass:
+                    print(f"\n🔄 Change detected in: {', '.join(reasons)}")
+                reconciliation = reconcile_files()
+
+                changed_outcomes = dry_run.refresh(_creatable_entries(reconciliation))
+                for url, outcome in changed_outcomes:
+                    print(f"  -> {Path(url).name}: {outcome}")
+                counts = ", ".join(f"{count} {label}" for label, count in sorted(dry_run.counts().items()))
+                print(f"Dry-run scrape: {len(changed_outcomes)} result(s) changed. Totals: {counts or 'none'}.")
+                collisions = dry_run.slug_collisions(index_slugs_to_urls(SPECIES_DIR))
+                if collisions:
+                    print(f"⚠️ {len(collisions)} slug collision(s) among the entries to create:")
+                    for slug, urls in collisions:
+                        print(f"  - {slug}: {' <-> '.join(urls)}")
+
+                write_audit_report(reconciliation, species_audit.results(), genera_audit.results())
+                if first_pass or changed_species or "configuration" in reasons:
+                    run_citation_audit()
+                print(f"✨ Reports updated. Watching...")
+                first_pass = False
+
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\n✨ Stopped watching.")